@@ -1,12 +1,70 @@
-from .file_and_model_selection import DataReaderFactory, FileProcessorFactory
-from .normalize_name import normalize_name as normalize_name
-from .similarity_score import RetrieveSimilarNames as RetrieveSimilarNames
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .company_store import CompanyStore as CompanyStore
+    from .connection_pool import ConnectionPool as ConnectionPool
+    from .connection_pool import get_default_pool as get_default_pool
+    from .dataset_registry import DEFAULT_DATASET as DEFAULT_DATASET
+    from .dataset_registry import DatasetRegistry as DatasetRegistry
+    from .dataset_registry import get_default_registry as get_default_registry
+    from .deduplicate import DeduplicatePeople as DeduplicatePeople
+    from .export_files import new_export_path as new_export_path
+    from .field_rules import FILTER_ONLY_FIELDS as FILTER_ONLY_FIELDS
+    from .field_rules import FieldRule as FieldRule
+    from .file_and_model_selection import DataReaderFactory as DataReaderFactory
+    from .file_and_model_selection import FileProcessorFactory as FileProcessorFactory
+    from .minhash import clear_signature_cache as clear_signature_cache
+    from .name_index import NameIndex as NameIndex
+    from .name_suggester import NameSuggester as NameSuggester
+    from .normalize_name import normalize_name as normalize_name
+    from .query_planner import QueryPlanner as QueryPlanner
+    from .similarity_score import RetrieveSimilarNames as RetrieveSimilarNames
+    from .upload_cache import UploadCache as UploadCache
+    from .upload_cache import get_default_upload_cache as get_default_upload_cache
+
+# Public names and their module. Modules are imported on first access, so a
+# script only loads the modules it uses
+_EXPORTS = {
+    "CompanyStore": ".company_store",
+    "ConnectionPool": ".connection_pool",
+    "get_default_pool": ".connection_pool",
+    "DEFAULT_DATASET": ".dataset_registry",
+    "DatasetRegistry": ".dataset_registry",
+    "get_default_registry": ".dataset_registry",
+    "DeduplicatePeople": ".deduplicate",
+    "new_export_path": ".export_files",
+    "FILTER_ONLY_FIELDS": ".field_rules",
+    "FieldRule": ".field_rules",
+    "DataReaderFactory": ".file_and_model_selection",
+    "FileProcessorFactory": ".file_and_model_selection",
+    "clear_signature_cache": ".minhash",
+    "NameIndex": ".name_index",
+    "NameSuggester": ".name_suggester",
+    "normalize_name": ".normalize_name",
+    "QueryPlanner": ".query_planner",
+    "RetrieveSimilarNames": ".similarity_score",
+    "UploadCache": ".upload_cache",
+    "get_default_upload_cache": ".upload_cache",
+}
+
+
+def __getattr__(name: str):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
 
 
 # Create convenience functions
 def get_columns_dataframe(file_path: str):
+    from .file_and_model_selection import DataReaderFactory
+
     return DataReaderFactory.get_columns_dataframe(file_path)
 
 
-def get_processor(file_path: str):
-    return FileProcessorFactory.get_processor(file_path)
+def get_processor(file_path: str, engine: str = "exact", **options):
+    from .file_and_model_selection import FileProcessorFactory
+
+    return FileProcessorFactory.get_processor(file_path, engine, **options)
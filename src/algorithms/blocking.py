@@ -0,0 +1,85 @@
+from pathlib import Path
+
+from .company_store import DERIVED_COLUMNS
+from .connection_pool import ConnectionPool
+from .field_rules import FieldRule
+from .similarity_score import RetrieveSimilarNamesForFile
+
+# SQL expressions over the company columns: rows sharing a value are compared.
+# Several keys catch different kinds of typos, the sorted tokens catch names
+# written with their tokens in another order.
+DEFAULT_BLOCKING_KEYS = {
+    "token_prefixes": (
+        "left(split_part(name_for_comparison, '-', 1), 2)"
+        " || '-' || left(split_part(name_for_comparison, '-', -1), 2)"
+    ),
+    "first_token": "split_part(name_for_comparison, '-', 1)",
+    "last_token": "split_part(name_for_comparison, '-', -1)",
+    "sorted_tokens": "name_key",
+}
+
+
+class BlockedSimilarNamesForFile(RetrieveSimilarNamesForFile):
+    """Comparison between two data sources restricted to blocks.
+
+    An uploaded name is only scored against the company rows sharing one of
+    its blocking keys (see `DEFAULT_BLOCKING_KEYS`), with the exact
+    Jaro-Winkler threshold. Company blocks larger than `max_block_size` are
+    skipped for that key. Matches sharing no key are missed, so the result is
+    a subset of the exhaustive result.
+    """
+
+    def __init__(
+        self,
+        data_source_type,
+        template_dir: Path | str = None,
+        pool: ConnectionPool = None,
+        blocking_keys: dict[str, str] = None,
+        max_block_size: int = 1000,
+    ):
+        super().__init__(data_source_type, template_dir, pool)
+        self.blocking_keys = blocking_keys or DEFAULT_BLOCKING_KEYS
+        self.max_block_size = max_block_size
+
+    def _query_params(
+        self,
+        data_for_comparison: str,
+        comparison_first_name: str,
+        comparison_family_name: str,
+        threshold: float,
+        data_source: str,
+        prune_with_bounds: bool,
+        field_rules: list[FieldRule] = None,
+    ) -> dict:
+        return {
+            **super()._query_params(
+                data_for_comparison,
+                comparison_first_name,
+                comparison_family_name,
+                threshold,
+                data_source,
+                prune_with_bounds,
+                field_rules,
+            ),
+            "blocking_keys": self.blocking_keys,
+            "max_block_size": self.max_block_size,
+            "name_key_expression": DERIVED_COLUMNS["name_key"],
+        }
+
+
+class BlockedSimilarNamesForCSV(BlockedSimilarNamesForFile):
+    """Blocked comparison with CSV files"""
+
+    def __init__(
+        self, template_dir: Path | str = None, pool: ConnectionPool = None, **options
+    ):
+        super().__init__("read_csv", template_dir, pool, **options)
+
+
+class BlockedSimilarNamesForParquet(BlockedSimilarNamesForFile):
+    """Blocked comparison with Parquet files"""
+
+    def __init__(
+        self, template_dir: Path | str = None, pool: ConnectionPool = None, **options
+    ):
+        super().__init__("read_parquet", template_dir, pool, **options)
@@ -0,0 +1,510 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from pathlib import Path
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+from .connection_pool import MACROS_FILE, ConnectionPool, get_default_pool
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COMPANY_FILE = "./data/fake_data.parquet"
+# Boolean column of the change files: the rows to delete, by id
+DELETED_COLUMN = "deleted"
+
+# Columns computed from the raw company columns at ingest, in order: each
+# expression can use the columns defined before it
+DERIVED_COLUMNS = {
+    "name_for_comparison": "normalize_name(first_name || '-' || family_name)",
+    "name_length": "length(name_for_comparison)::INTEGER",
+    "name_key": (
+        "array_to_string(list_sort(string_split(name_for_comparison, '-')), '-')"
+    ),
+    "name_char_mask": "name_char_mask(name_for_comparison)",
+}
+# Derived columns only used by the queries, left out of the results
+HIDDEN_COLUMNS = ("name_length", "name_key", "name_char_mask")
+
+
+def rules_hash() -> str:
+    """Hash of the normalization rules: the SQL macros and the derived column
+    expressions. A change of the rules changes the hash."""
+    rules = MACROS_FILE.read_text() + "".join(
+        f"\n{name}={expression}" for name, expression in DERIVED_COLUMNS.items()
+    )
+    return hashlib.sha256(rules.encode()).hexdigest()
+
+
+def _derived_select(relation: str) -> str:
+    """SELECT statement that replaces the derived columns of `relation` with
+    freshly computed ones, whether or not `relation` already holds them."""
+    derived = ", ".join(f"{expr} AS {name}" for name, expr in DERIVED_COLUMNS.items())
+    excluded = ", ".join(f"'{name}'" for name in DERIVED_COLUMNS)
+    return f"""SELECT *, {derived} FROM (
+        SELECT COLUMNS(c -> c NOT IN ({excluded})) FROM {relation}
+    )"""
+
+
+def _source_fingerprint(source: str) -> str:
+    """Path, modification time and size of a raw company file: regenerating
+    the file changes it."""
+    stat = Path(source).stat()
+    return f"{Path(source).resolve()}:{stat.st_mtime_ns}:{stat.st_size}"
+
+
+def _read_function(source: str) -> str:
+    return "read_csv" if Path(source).suffix.lower() == ".csv" else "read_parquet"
+
+
+@dataclass(frozen=True)
+class ChangeSet:
+    """Changes committed to the company table, sent to the listeners that
+    maintain derived structures.
+
+    Attributes:
+        removed_ids (np.ndarray): Ids deleted or replaced by an update. None
+            for a full reload.
+        added (pd.DataFrame): Inserted and updated rows, with their `id` and
+            `name_for_comparison`. None for a full reload.
+        version (int): Version of the company table after the change.
+        full_reload (bool): The whole table was rewritten, by `load` or
+            `refresh_derived_columns`: listeners rebuild from the table.
+    """
+
+    removed_ids: np.ndarray | None
+    added: pd.DataFrame | None
+    version: int
+    full_reload: bool = False
+
+
+@dataclass(frozen=True)
+class ChangeSummary:
+    inserted: int
+    updated: int
+    deleted: int
+    version: int
+
+
+class CompanyStore:
+    """
+    Company people table, persisted in a DuckDB database file.
+
+    The database file is attached to the pooled database, so the query
+    runners read the table (`data_source`) like any other relation. Changes
+    are applied by `id` in a single transaction: DuckDB's MVCC keeps serving
+    concurrent queries from the previous snapshot until the commit.
+
+    The normalized name and the other `DERIVED_COLUMNS` are computed once, in
+    bulk, when rows are ingested: values found in the raw files are ignored.
+    The table records the `rules_hash` it was computed with and the
+    fingerprint of its raw file: `prepare` recomputes the columns when the
+    rules change and reloads the file when it's regenerated, so queries never
+    normalize company rows.
+
+    Derived structures, like a `NameIndex`, subscribe with `add_listener` and
+    receive each committed `ChangeSet`, so they can update incrementally.
+
+    DuckDB lets a single process open the database file. The first process to
+    attach it is the writer. With `publish_snapshots`, for deployments with
+    several app processes, the writer also publishes a parquet snapshot of the
+    table next to the database (`snapshot_path`) after every commit. The other
+    processes get a read-only store: its `data_source` reads the latest
+    snapshot, `poll_snapshot` notifies its listeners when a newer one is
+    published, and it refuses changes.
+
+    Attributes:
+        database_path (Path): DuckDB database file holding the table.
+        alias (str): Name of the attached database.
+        pool (ConnectionPool): Pool the database is attached to.
+        read_only (bool): Whether another process holds the database file.
+        publish_snapshots (bool): Whether the writer publishes snapshots.
+    """
+
+    def __init__(
+        self,
+        database_path: Path | str = "./data/company.duckdb",
+        alias: str = "company_store",
+        pool: ConnectionPool = None,
+        publish_snapshots: bool = False,
+    ):
+        self.database_path = Path(database_path)
+        self.alias = alias
+        self.pool = pool or get_default_pool()
+        self.publish_snapshots = publish_snapshots
+        self.read_only = False
+        self._listeners: list[Callable[[ChangeSet], None]] = []
+        self._write_lock = threading.Lock()
+        self._snapshot_lock = threading.Lock()
+        # Modification time and version of the snapshot a read-only store last
+        # notified its listeners of
+        self._snapshot_state: tuple[int, int] | None = None
+        self.attach()
+
+    @property
+    def data_source(self) -> str:
+        """Relation to pass as `data_source` to the query runners."""
+        if self.read_only:
+            return f"read_parquet('{self.snapshot_path}')"
+        return f"{self.alias}.people"
+
+    @property
+    def snapshot_path(self) -> Path:
+        """Parquet snapshot of the table, published by a writer process with
+        `publish_snapshots`."""
+        return self.database_path.with_name(
+            f"{self.database_path.stem}_snapshot.parquet"
+        )
+
+    def attach(self) -> None:
+        """Attach the database file, or fall back to the published snapshot
+        when another process holds it."""
+        if self.read_only:
+            return
+        self.database_path.parent.mkdir(parents=True, exist_ok=True)
+        with self.pool.connection() as connection:
+            try:
+                connection.execute(
+                    f"ATTACH IF NOT EXISTS '{self.database_path}' AS {self.alias}"
+                )
+            except duckdb.IOException as error:
+                if "lock" not in str(error).lower():
+                    raise
+                logger.warning(
+                    "%s is held by another process, reading its snapshot %s",
+                    self.database_path,
+                    self.snapshot_path,
+                )
+                self.read_only = True
+                return
+            connection.execute(
+                f"""CREATE TABLE IF NOT EXISTS {self.alias}.metadata
+                (key VARCHAR PRIMARY KEY, value VARCHAR)"""
+            )
+
+    def detach(self) -> None:
+        """Detach the database file, releasing the memory of its table.
+        `attach` makes it available again, without reloading it."""
+        if self.read_only:
+            return
+        with self.pool.connection() as connection:
+            connection.execute(f"DETACH DATABASE IF EXISTS {self.alias}")
+
+    def memory_bytes(self) -> int:
+        """Size of the used blocks of the database, the memory its table
+        takes once read."""
+        if self.read_only:
+            return (
+                self.snapshot_path.stat().st_size if self.snapshot_path.exists() else 0
+            )
+        with self.pool.connection() as connection:
+            row = connection.execute(
+                """SELECT used_blocks * block_size FROM pragma_database_size()
+                WHERE database_name = ?""",
+                [self.alias],
+            ).fetchone()
+        return int(row[0]) if row else 0
+
+    def is_loaded(self) -> bool:
+        if self.read_only:
+            return self.snapshot_path.exists()
+        with self.pool.connection() as connection:
+            return bool(
+                connection.execute(
+                    """SELECT count(*) FROM duckdb_tables()
+                    WHERE database_name = ? AND table_name = 'people'""",
+                    [self.alias],
+                ).fetchone()[0]
+            )
+
+    def load(self, source: str) -> None:
+        """(Re)create the company table from a full raw company file, and
+        compute its derived columns. Reloading bumps the version, and the
+        listeners receive a full reload `ChangeSet`.
+
+        Args:
+            source (str): Path to a parquet or CSV file with the company data.
+        """
+        self._check_writable()
+        relation = f"{_read_function(source)}('{source}')"
+        with self._write_lock:
+            with self.pool.connection() as connection:
+                connection.execute("BEGIN TRANSACTION")
+                try:
+                    connection.execute(
+                        f"""CREATE OR REPLACE TABLE {self.data_source} AS
+                        {_derived_select(relation)}"""
+                    )
+                    previous = self._get_metadata(connection, "version")
+                    version = 0 if previous is None else int(previous) + 1
+                    self._set_metadata(connection, "version", version)
+                    self._set_metadata(connection, "rules_hash", rules_hash())
+                    self._set_metadata(
+                        connection, "source_fingerprint", _source_fingerprint(source)
+                    )
+                    connection.execute("COMMIT")
+                except Exception:
+                    connection.execute("ROLLBACK")
+                    raise
+            self._notify(ChangeSet(None, None, version, full_reload=True))
+        self._publish_snapshot()
+
+    def prepare(self, source: str = DEFAULT_COMPANY_FILE) -> None:
+        """Make the table ready to query: load `source` if the table doesn't
+        exist yet or `source` changed since it was loaded, recompute the
+        derived columns if the rules changed.
+
+        A read-only store only checks that the writer published a snapshot.
+
+        Raises:
+            FileNotFoundError: the store is read-only and no snapshot is
+                published: the writer process needs `publish_snapshots`.
+        """
+        if self.read_only:
+            if not self.is_loaded():
+                raise FileNotFoundError(
+                    f"{self.database_path} is held by another process, which "
+                    f"doesn't publish {self.snapshot_path}"
+                )
+            self._snapshot_state = self._read_snapshot_state()
+        elif not self.is_loaded() or self._source_changed(source):
+            self.load(source)
+        elif self.stored_rules_hash() != rules_hash():
+            self.refresh_derived_columns()
+        elif self.publish_snapshots and not self.snapshot_path.exists():
+            self._publish_snapshot()
+
+    def stored_rules_hash(self) -> str | None:
+        """Hash of the rules the derived columns were computed with."""
+        if self.read_only:
+            return self._snapshot_metadata().get("rules_hash")
+        with self.pool.connection() as connection:
+            return self._get_metadata(connection, "rules_hash")
+
+    def refresh_derived_columns(self) -> None:
+        """Recompute the derived columns of every row, in bulk. Bumps the
+        version, and the listeners receive a full reload `ChangeSet`."""
+        self._check_writable()
+        with self._write_lock:
+            with self.pool.connection() as connection:
+                connection.execute("BEGIN TRANSACTION")
+                try:
+                    connection.execute(
+                        f"""CREATE OR REPLACE TABLE {self.data_source} AS
+                        {_derived_select(self.data_source)}"""
+                    )
+                    version = int(self._get_metadata(connection, "version") or 0) + 1
+                    self._set_metadata(connection, "version", version)
+                    self._set_metadata(connection, "rules_hash", rules_hash())
+                    connection.execute("COMMIT")
+                except Exception:
+                    connection.execute("ROLLBACK")
+                    raise
+            self._notify(ChangeSet(None, None, version, full_reload=True))
+        self._publish_snapshot()
+
+    def version(self) -> int:
+        """Version of the company table, 0 after the first load and bumped by
+        every committed change batch, reload and refresh."""
+        if self.read_only:
+            return int(self._snapshot_metadata().get("version", 0))
+        with self.pool.connection() as connection:
+            return int(self._get_metadata(connection, "version") or 0)
+
+    def add_listener(self, listener: Callable[[ChangeSet], None]) -> None:
+        """Call `listener` with every committed `ChangeSet`. The changes are
+        committed before, so a failing listener is logged, not raised."""
+        self._listeners.append(listener)
+
+    def apply_changes(
+        self, upserts: pd.DataFrame = None, deletes: Iterable[int] = None
+    ) -> ChangeSummary:
+        """Insert, update and delete company rows by `id`, in one transaction.
+
+        Args:
+            upserts (pd.DataFrame, optional): Rows to insert, or to replace
+                when their `id` exists. Their derived columns are computed.
+            deletes (Iterable[int], optional): Ids of the rows to delete.
+
+        Returns:
+            ChangeSummary: number of rows inserted, updated and deleted.
+
+        Raises:
+            PermissionError: the store is read-only.
+        """
+        self._check_writable()
+        upserts = upserts if upserts is not None else pd.DataFrame({"id": []})
+        deletes = pd.DataFrame({"id": list(deletes or [])}, dtype="int64")
+
+        with self._write_lock:
+            with self.pool.connection() as connection:
+                connection.register("upserts", upserts)
+                connection.register("deletes", deletes)
+                connection.execute("BEGIN TRANSACTION")
+                try:
+                    updated, deleted = connection.execute(
+                        f"""SELECT
+                            count(*) FILTER (id IN (SELECT id FROM upserts)),
+                            count(*) FILTER (
+                                id IN (SELECT id FROM deletes)
+                                AND id NOT IN (SELECT id FROM upserts)
+                            )
+                        FROM {self.data_source}"""
+                    ).fetchone()
+                    removed_ids = connection.execute(
+                        f"""DELETE FROM {self.data_source}
+                        WHERE id IN (
+                            SELECT id FROM upserts UNION SELECT id FROM deletes
+                        )
+                        RETURNING id"""
+                    ).fetchnumpy()["id"]
+                    if len(upserts):
+                        connection.execute(
+                            f"""INSERT INTO {self.data_source} BY NAME
+                            {_derived_select("upserts")}"""
+                        )
+                    added = connection.execute(
+                        f"""SELECT id, name_for_comparison FROM {self.data_source}
+                        WHERE id IN (SELECT id FROM upserts)"""
+                    ).df()
+                    version = int(self._get_metadata(connection, "version") or 0) + 1
+                    self._set_metadata(connection, "version", version)
+                    connection.execute("COMMIT")
+                except Exception:
+                    connection.execute("ROLLBACK")
+                    raise
+                finally:
+                    connection.unregister("upserts")
+                    connection.unregister("deletes")
+            self._notify(ChangeSet(np.asarray(removed_ids), added, version))
+        self._publish_snapshot()
+        return ChangeSummary(
+            inserted=len(added) - updated,
+            updated=updated,
+            deleted=deleted,
+            version=version,
+        )
+
+    def apply_change_file(self, path: Path | str) -> ChangeSummary:
+        """Apply a parquet or CSV file of changes, like a daily HR feed: the
+        rows whose `DELETED_COLUMN` is true are deleted by id, the others are
+        upserted (see `apply_changes`)."""
+        self._check_writable()
+        with self.pool.connection() as connection:
+            changes = connection.execute(
+                f"SELECT * FROM {_read_function(str(path))}(?)", [str(path)]
+            ).df()
+        if DELETED_COLUMN not in changes.columns:
+            return self.apply_changes(upserts=changes)
+        deleted = changes[DELETED_COLUMN].fillna(False).astype(bool)
+        return self.apply_changes(
+            upserts=changes[~deleted].drop(columns=DELETED_COLUMN),
+            deletes=changes.loc[deleted, "id"].astype("int64").tolist(),
+        )
+
+    def poll_snapshot(self) -> bool:
+        """Notify the listeners of a read-only store with a full reload
+        `ChangeSet` when the writer published a newer snapshot, so the
+        structures derived from the table are rebuilt. Only checks the
+        modification time of the snapshot until it changes.
+
+        Returns:
+            bool: whether a newer snapshot was found.
+        """
+        if not self.read_only or not self.snapshot_path.exists():
+            return False
+        previous = self._snapshot_state
+        if previous and self.snapshot_path.stat().st_mtime_ns == previous[0]:
+            return False
+        self._snapshot_state = self._read_snapshot_state()
+        version = self._snapshot_state[1]
+        if previous and version == previous[1]:
+            return False
+        self._notify(ChangeSet(None, None, version, full_reload=True))
+        return True
+
+    def _read_snapshot_state(self) -> tuple[int, int]:
+        mtime = self.snapshot_path.stat().st_mtime_ns
+        return mtime, self.version()
+
+    def _source_changed(self, source: str) -> bool:
+        if not Path(source).exists():
+            return False
+        with self.pool.connection() as connection:
+            stored = self._get_metadata(connection, "source_fingerprint")
+        return stored != _source_fingerprint(source)
+
+    def _notify(self, change_set: ChangeSet) -> None:
+        for listener in self._listeners:
+            try:
+                listener(change_set)
+            except Exception:
+                logger.exception(
+                    "Listener %r failed on version %d of %s",
+                    listener,
+                    change_set.version,
+                    self.data_source,
+                )
+
+    def _check_writable(self) -> None:
+        if self.read_only:
+            raise PermissionError(
+                f"{self.database_path} is held by another process, "
+                f"changes go through it"
+            )
+
+    def _publish_snapshot(self) -> None:
+        """With `publish_snapshots`, write the committed table to
+        `snapshot_path`, with its version and rules hash in the parquet
+        metadata.
+
+        The table is read in a transaction, so the version matches the rows,
+        and out of the write lock, so the next changes don't wait for it. The
+        file is written aside and moved in place, so readers never see a
+        partial snapshot.
+        """
+        if not self.publish_snapshots:
+            return
+        partial = self.snapshot_path.with_name(f"{self.snapshot_path.name}.partial")
+        with self._snapshot_lock, self.pool.connection() as connection:
+            connection.execute("BEGIN TRANSACTION")
+            try:
+                version = int(self._get_metadata(connection, "version") or 0)
+                stored_hash = self._get_metadata(connection, "rules_hash") or ""
+                connection.execute(
+                    f"""COPY {self.data_source} TO '{partial}' (
+                        FORMAT parquet, COMPRESSION zstd,
+                        KV_METADATA {{
+                            version: '{version}', rules_hash: '{stored_hash}'
+                        }}
+                    )"""
+                )
+            finally:
+                connection.execute("COMMIT")
+            partial.replace(self.snapshot_path)
+
+    def _snapshot_metadata(self) -> dict[str, str]:
+        with self.pool.connection() as connection:
+            rows = connection.execute(
+                "SELECT key, value FROM parquet_kv_metadata(?)",
+                [str(self.snapshot_path)],
+            ).fetchall()
+        return {key.decode(): value.decode() for key, value in rows}
+
+    def _get_metadata(self, connection, key: str) -> str | None:
+        row = connection.execute(
+            f"SELECT value FROM {self.alias}.metadata WHERE key = ?", [key]
+        ).fetchone()
+        return row[0] if row else None
+
+    def _set_metadata(self, connection, key: str, value) -> None:
+        connection.execute(
+            f"INSERT OR REPLACE INTO {self.alias}.metadata VALUES (?, ?)",
+            [key, str(value)],
+        )
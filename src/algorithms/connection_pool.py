@@ -0,0 +1,167 @@
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+
+import duckdb
+
+MACROS_FILE = Path(__file__).resolve().parent / "sql" / "macros.sql"
+
+
+@dataclass(frozen=True)
+class PoolMetrics:
+    """Snapshot of the pool usage, for monitoring saturation and wait time.
+
+    Attributes:
+        size (int): Number of connections held by the pool.
+        in_use (int): Connections currently checked out.
+        peak_in_use (int): Highest number of connections checked out at once.
+        checkouts (int): Total number of checkouts since the pool was created.
+        waits (int): Checkouts that had to wait for a connection to be
+            returned, including the ones that timed out.
+        total_wait_seconds (float): Time spent waiting, over all checkouts.
+        max_wait_seconds (float): Longest single wait.
+    """
+
+    size: int
+    in_use: int
+    peak_in_use: int
+    checkouts: int
+    waits: int
+    total_wait_seconds: float
+    max_wait_seconds: float
+
+    @property
+    def saturation(self) -> float:
+        """Share of the pool currently checked out, between 0 and 1."""
+        return self.in_use / self.size if self.size else 0.0
+
+    @property
+    def mean_wait_seconds(self) -> float:
+        """Average wait of the checkouts that had to wait."""
+        return self.total_wait_seconds / self.waits if self.waits else 0.0
+
+
+class ConnectionPool:
+    """
+    Pool of DuckDB connections that share one database.
+
+    DuckDB cursors created from the same connection point to the same
+    database instance (same tables, macros and attached databases), but each
+    one can run a query concurrently with the others. The pool creates a fixed
+    number of those cursors and hands them out to the query runners, so
+    concurrent Taipy sessions don't serialize on the process-wide default
+    connection.
+
+    Attributes:
+        size (int): Number of pooled connections.
+        database (str): DuckDB database the connections share.
+    """
+
+    def __init__(self, size: int = None, database: str = ":memory:"):
+        """
+        Create the shared database, its SQL macros and the pooled connections.
+
+        Args:
+            size (int, optional): Number of connections. Defaults to the
+                number of CPU cores.
+            database (str, optional): DuckDB database path. Defaults to an
+                in-memory database.
+        """
+        self.size = size or os.cpu_count() or 1
+        self.database = database
+        self._database = duckdb.connect(database)
+        self._database.execute(MACROS_FILE.read_text())
+
+        self._available = queue.LifoQueue(maxsize=self.size)
+        for _ in range(self.size):
+            self._available.put(self._database.cursor())
+
+        self._lock = threading.Lock()
+        self._in_use = 0
+        self._peak_in_use = 0
+        self._checkouts = 0
+        self._waits = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    @contextmanager
+    def connection(self, timeout: float = None):
+        """Check out a connection for the duration of the `with` block.
+
+        Args:
+            timeout (float, optional): Seconds to wait for a free connection.
+                Defaults to waiting forever.
+
+        Raises:
+            TimeoutError: no connection was returned within `timeout`.
+
+        Yields:
+            duckdb.DuckDBPyConnection: connection to the shared database.
+        """
+        connection = self._checkout(timeout)
+        try:
+            yield connection
+        finally:
+            self._return(connection)
+
+    def metrics(self) -> PoolMetrics:
+        """Returns a snapshot of the pool usage."""
+        with self._lock:
+            return PoolMetrics(
+                size=self.size,
+                in_use=self._in_use,
+                peak_in_use=self._peak_in_use,
+                checkouts=self._checkouts,
+                waits=self._waits,
+                total_wait_seconds=self._total_wait,
+                max_wait_seconds=self._max_wait,
+            )
+
+    def _checkout(self, timeout: float = None) -> duckdb.DuckDBPyConnection:
+        try:
+            connection = self._available.get_nowait()
+        except queue.Empty:
+            connection = self._wait_for_connection(timeout)
+
+        with self._lock:
+            self._in_use += 1
+            self._peak_in_use = max(self._peak_in_use, self._in_use)
+            self._checkouts += 1
+        return connection
+
+    def _wait_for_connection(self, timeout: float = None):
+        start = time.perf_counter()
+        try:
+            return self._available.get(timeout=timeout)
+        except queue.Empty as e:
+            raise TimeoutError(
+                f"No DuckDB connection available after {timeout} seconds"
+            ) from e
+        finally:
+            wait = time.perf_counter() - start
+            with self._lock:
+                self._waits += 1
+                self._total_wait += wait
+                self._max_wait = max(self._max_wait, wait)
+
+    def _return(self, connection: duckdb.DuckDBPyConnection) -> None:
+        with self._lock:
+            self._in_use -= 1
+        self._available.put(connection)
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def get_default_pool() -> ConnectionPool:
+    """Returns the process-wide pool, creating it on first use."""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = ConnectionPool()
+        return _default_pool
@@ -0,0 +1,574 @@
+from __future__ import annotations
+
+import logging
+import re
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .company_store import (
+    DEFAULT_COMPANY_FILE,
+    ChangeSet,
+    ChangeSummary,
+    CompanyStore,
+)
+from .connection_pool import ConnectionPool, get_default_pool
+from .minhash import clear_signature_cache, signature_cache_bytes
+from .name_index import NameIndex
+from .name_suggester import NameSuggester
+from .query_planner import available_memory_bytes
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Directory of the business units' people files, one dataset per file
+DATASET_DIRECTORY = "./data/datasets"
+DEFAULT_DATASET = "company"
+# Whether the stores publish a snapshot for other app processes, see
+# `CompanyStore`: only needed when several processes serve the datasets
+PUBLISH_SNAPSHOTS = False
+# Seconds between two `DatasetRegistry.sync` of `DatasetRegistry.watch`
+SYNC_INTERVAL = 10.0
+
+
+@dataclass(frozen=True)
+class DatasetStats:
+    """Statistics of a dataset, computed when it's loaded or changed.
+
+    Attributes:
+        rows (int): Number of people.
+        distinct_names (int): Number of distinct normalized names.
+        memory_bytes (int): Memory of the table, suggestions, results and
+            MinHash band hashes.
+        cached_results (int): Number of results in the result cache.
+        hits (int): Results served from the cache since the dataset was
+            loaded.
+        misses (int): Results computed since the dataset was loaded.
+    """
+
+    rows: int
+    distinct_names: int
+    memory_bytes: int
+    cached_results: int
+    hits: int
+    misses: int
+
+    def describe(self) -> str:
+        return (
+            f"{self.rows} people, {self.distinct_names} distinct names, "
+            f"~{self.memory_bytes / 1024**2:.0f} MB in memory, "
+            f"{self.cached_results} cached results"
+        )
+
+
+class Dataset:
+    """
+    A company dataset: its table in its own `CompanyStore` database, its
+    `NameIndex` of candidates, its `NameSuggester`, its statistics and an LRU
+    cache of its query results.
+
+    The dataset is loaded on first use. Unloading it detaches its database
+    and drops its in-memory structures, loading it again attaches the
+    database file: the table is only ingested again if its source file or
+    the normalization rules changed (see `CompanyStore.prepare`). Committed
+    changes clear the results, the suggestions and the MinHash band hashes of
+    the dataset, and a reload of the table drops its name index, rebuilt on
+    its next use.
+
+    Change files dropped in its inbox (`inbox_directory`) are applied by
+    `sync`, in the process holding the database. In a process reading the
+    snapshot of another one, `sync` picks up the newer snapshots instead.
+
+    The size of the table is measured when it's loaded or changed, so
+    `memory_bytes` doesn't query the database. A dataset is pinned while
+    queries run on it (see `DatasetRegistry.use`), and the registry never
+    unloads a pinned dataset.
+
+    Attributes:
+        name (str): Name of the dataset.
+        source (str): Raw people file, ingested on the first load.
+        store (CompanyStore): Store of the dataset, None until loaded.
+        suggester (NameSuggester): Suggestions of the dataset's names.
+        name_index (NameIndex): Approximate candidates of the person
+            searches, next to the database in `name_index/<alias>`. Opened or
+            built on first use, for the callers accepting missed matches.
+        max_cached_results (int): Number of results kept by the cache, 0
+            turns it off.
+        pins (int): Number of queries running on the dataset.
+        publish_snapshots (bool): Whether the store publishes snapshots.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        source: str,
+        database_path: Path | str,
+        alias: str,
+        pool: ConnectionPool,
+        max_cached_results: int = 128,
+        publish_snapshots: bool = False,
+    ):
+        self.name = name
+        self.source = source
+        self.database_path = Path(database_path)
+        self.alias = alias
+        self.pool = pool
+        self.max_cached_results = max_cached_results
+        self.publish_snapshots = publish_snapshots
+        self.store: CompanyStore | None = None
+        self.suggester: NameSuggester | None = None
+        self._name_index: NameIndex | None = None
+        self.loaded = False
+        self.pins = 0
+        self._store_bytes = 0
+        self._results: OrderedDict[Hashable, pd.DataFrame] = OrderedDict()
+        self._result_bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._stats: tuple[int, int] | None = None
+        self._lock = threading.RLock()
+
+    @property
+    def data_source(self) -> str:
+        """Relation to pass as `data_source` to the query runners."""
+        return self.store.data_source
+
+    @property
+    def index_directory(self) -> Path:
+        return self.database_path.parent / "name_index" / self.alias
+
+    @property
+    def inbox_directory(self) -> Path:
+        """Directory of the change files waiting to be applied."""
+        return self.database_path.parent / "changes" / self.alias
+
+    @property
+    def name_index(self) -> NameIndex:
+        with self._lock:
+            if self._name_index is None:
+                self._name_index = NameIndex.open_or_build(
+                    self.index_directory, self.store
+                )
+            return self._name_index
+
+    def load(self) -> bool:
+        """Attach the dataset's database, ingesting the source on first use.
+
+        Returns:
+            bool: whether the dataset was loaded, False if it already was.
+        """
+        with self._lock:
+            if self.loaded:
+                return False
+            self._attach()
+            self.store.prepare(self.source)
+            if not self.store.read_only:
+                # Writes the ingested table to the database blocks, measured
+                # by `memory_bytes`, out of the write-ahead log
+                with self.pool.connection() as connection:
+                    connection.execute(f"CHECKPOINT {self.alias}")
+            self._store_bytes = self.store.memory_bytes()
+            self.loaded = True
+            logger.info("Dataset %s loaded", self.name)
+            return True
+
+    def held_elsewhere(self) -> bool:
+        """Whether another process holds the dataset's database."""
+        with self._lock:
+            self._attach()
+            return self.store.read_only
+
+    def queue_changes(self, path: Path | str) -> Path:
+        """Copy a change file to the inbox, applied by the `sync` of the
+        process holding the database. The copy is moved in place once
+        complete, and the files are applied in the order they were queued.
+
+        Returns:
+            Path: the queued file.
+        """
+        path = Path(path)
+        self.inbox_directory.mkdir(parents=True, exist_ok=True)
+        queued = self.inbox_directory / f"{time.time_ns()}_{path.name}"
+        partial = queued.with_name(f"{queued.name}.partial")
+        shutil.copyfile(path, partial)
+        partial.replace(queued)
+        return queued
+
+    def sync(self) -> None:
+        """Apply the change files of the inbox, or pick up the newer snapshot
+        of the process holding the database. A change file that fails is
+        renamed `<file>.failed`, and not applied again."""
+        if not self.loaded:
+            return
+        if self.store.read_only:
+            self.store.poll_snapshot()
+            return
+        if not self.inbox_directory.exists():
+            return
+        for path in sorted(self.inbox_directory.iterdir()):
+            if path.suffix.lower() not in {".parquet", ".csv"}:
+                continue
+            try:
+                summary = self.store.apply_change_file(path)
+            except Exception:
+                logger.exception("Changes %s of dataset %s failed", path, self.name)
+                path.replace(path.with_name(f"{path.name}.failed"))
+                continue
+            path.unlink()
+            logger.info(
+                "Changes %s applied to dataset %s: %s", path, self.name, summary
+            )
+
+    def unload(self) -> None:
+        """Release the memory of the dataset: its table, its band hashes, its
+        suggestions and its cached results."""
+        with self._lock:
+            if not self.loaded:
+                return
+            clear_signature_cache(self.pool, self.data_source)
+            self.store.detach()
+            self.suggester.clear()
+            self._name_index = None
+            self._clear_results()
+            self._stats = None
+            self._store_bytes = 0
+            self.loaded = False
+            logger.info("Dataset %s unloaded", self.name)
+
+    def cached(
+        self, key: Hashable, compute: Callable[[], pd.DataFrame]
+    ) -> pd.DataFrame:
+        """Result of `compute`, from the result cache when the same `key` was
+        computed since the last change of the dataset.
+
+        Returns:
+            pd.DataFrame: a copy of the result, callers can modify it.
+        """
+        if not self.max_cached_results:
+            with self._lock:
+                self._misses += 1
+            return compute()
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                self._hits += 1
+                return self._results[key].copy()
+        result = compute()
+        with self._lock:
+            self._misses += 1
+            if key not in self._results:
+                self._results[key] = result.copy()
+                self._result_bytes += _frame_bytes(result)
+            while len(self._results) > self.max_cached_results:
+                _, evicted = self._results.popitem(last=False)
+                self._result_bytes -= _frame_bytes(evicted)
+        return result
+
+    def memory_bytes(self) -> int:
+        """Approximate memory held by the dataset, 0 when unloaded: its table,
+        its suggestions, its cached results and the MinHash band hashes of its
+        table, in the pooled database."""
+        if not self.loaded:
+            return 0
+        return (
+            self._store_bytes
+            + self.suggester.memory_bytes()
+            + self._result_bytes
+            + signature_cache_bytes(self.pool, self.data_source)
+        )
+
+    def stats(self) -> DatasetStats:
+        if self._stats is None:
+            with self.pool.connection() as connection:
+                self._stats = connection.execute(
+                    f"""SELECT count(*), count(DISTINCT name_for_comparison)
+                    FROM {self.data_source}"""
+                ).fetchone()
+        rows, distinct_names = self._stats
+        return DatasetStats(
+            rows=rows,
+            distinct_names=distinct_names,
+            memory_bytes=self.memory_bytes(),
+            cached_results=len(self._results),
+            hits=self._hits,
+            misses=self._misses,
+        )
+
+    def _attach(self) -> None:
+        if self.store is None:
+            self.store = CompanyStore(
+                self.database_path, self.alias, self.pool, self.publish_snapshots
+            )
+            self.suggester = NameSuggester(self.store)
+            self.store.add_listener(self.suggester.invalidate)
+            self.store.add_listener(self._on_change)
+        else:
+            self.store.attach()
+
+    def _on_change(self, change_set: ChangeSet) -> None:
+        with self._lock:
+            if self._name_index is not None:
+                if change_set.full_reload:
+                    self._name_index = None
+                else:
+                    self._name_index.apply_changes(change_set)
+        clear_signature_cache(self.pool, self.data_source)
+        store_bytes = self.store.memory_bytes()
+        with self._lock:
+            self._clear_results()
+            self._stats = None
+            self._store_bytes = store_bytes
+
+    def _clear_results(self) -> None:
+        self._results.clear()
+        self._result_bytes = 0
+        self._hits = 0
+        self._misses = 0
+
+
+def _frame_bytes(frame: pd.DataFrame) -> int:
+    return int(frame.memory_usage(deep=True).sum())
+
+
+class DatasetRegistry:
+    """
+    Company datasets the pages and query runners can select from, one per
+    business unit, sharing a memory budget.
+
+    Each dataset has its own DuckDB database file, attached under its own
+    alias to the pooled database, and its own suggestions, statistics and
+    result cache (see `Dataset`). Selecting a dataset keeps everything that
+    is already loaded. When loading a dataset takes the loaded ones over
+    `memory_budget_bytes`, the least recently selected ones are unloaded
+    whole, never the dataset being loaded nor the pinned ones, which queries
+    are still running on: those are unloaded by a later load once released.
+
+    Attributes:
+        pool (ConnectionPool): Pool the datasets are attached to.
+        memory_budget_bytes (int): Memory the loaded datasets can hold,
+            defaults to `memory_share` of the available memory.
+        directory (Path): Directory of the datasets' database files.
+        publish_snapshots (bool): Whether the stores publish snapshots.
+    """
+
+    def __init__(
+        self,
+        pool: ConnectionPool = None,
+        memory_budget_bytes: int = None,
+        memory_share: float = 0.25,
+        directory: Path | str = DATASET_DIRECTORY,
+        publish_snapshots: bool = False,
+    ):
+        self.pool = pool or get_default_pool()
+        self.memory_budget_bytes = memory_budget_bytes or int(
+            memory_share * available_memory_bytes()
+        )
+        self.directory = Path(directory)
+        self.publish_snapshots = publish_snapshots
+        self._datasets: dict[str, Dataset] = {}
+        # Loaded datasets, the least recently selected first
+        self._recent: OrderedDict[str, None] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def register(
+        self,
+        name: str,
+        source: str,
+        database_path: Path | str = None,
+        alias: str = None,
+    ) -> Dataset:
+        """Add a dataset, loaded on its first selection.
+
+        Args:
+            name (str): Name of the dataset, shown in the pages.
+            source (str): Parquet or CSV file with the people of the dataset.
+            database_path (Path | str, optional): DuckDB database file of the
+                dataset. Defaults to `<directory>/<name>.duckdb`.
+            alias (str, optional): Name of the attached database. Defaults
+                to `dataset_<name>`.
+        """
+        slug = re.sub(r"\W", "_", name.lower())
+        dataset = Dataset(
+            name,
+            source,
+            database_path or self.directory / f"{slug}.duckdb",
+            alias or f"dataset_{slug}",
+            self.pool,
+            publish_snapshots=self.publish_snapshots,
+        )
+        with self._lock:
+            if name in self._datasets:
+                raise ValueError(f"The dataset {name} is already registered")
+            self._datasets[name] = dataset
+        return dataset
+
+    def discover(self) -> list[str]:
+        """Register the parquet and CSV files of `directory` not registered
+        yet, named after their file.
+
+        Returns:
+            list[str]: names of the new datasets.
+        """
+        names = []
+        for path in sorted(self.directory.glob("*")):
+            if path.suffix.lower() in {".parquet", ".csv"} and path.stem not in self:
+                self.register(path.stem, str(path))
+                names.append(path.stem)
+        return names
+
+    def names(self) -> list[str]:
+        return list(self._datasets)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._datasets
+
+    def get(self, name: str, pin: bool = False) -> Dataset:
+        """The loaded dataset `name`, as the most recently selected one. The
+        memory budget is enforced when the dataset had to be loaded.
+
+        Args:
+            name (str): Name of the dataset.
+            pin (bool, optional): Pin the dataset until `release`, so it isn't
+                unloaded while a query runs on it. Defaults to False.
+
+        Raises:
+            KeyError: when no dataset is registered under `name`.
+        """
+        if name not in self._datasets:
+            raise KeyError(f"No dataset registered under {name}")
+        dataset = self._datasets[name]
+        if pin:
+            with self._lock:
+                dataset.pins += 1
+        try:
+            loaded = dataset.load()
+        except BaseException:
+            if pin:
+                self.release(name)
+            raise
+        with self._lock:
+            self._recent[name] = None
+            self._recent.move_to_end(name)
+        if loaded:
+            self.enforce_budget(keep=name)
+        return dataset
+
+    def release(self, name: str) -> None:
+        """Unpin the dataset `name`, pinned by `get`."""
+        with self._lock:
+            self._datasets[name].pins -= 1
+
+    @contextmanager
+    def use(self, name: str) -> Iterator[Dataset]:
+        """The loaded dataset `name`, pinned until the end of the block."""
+        dataset = self.get(name, pin=True)
+        try:
+            yield dataset
+        finally:
+            self.release(name)
+
+    def ingest(self, name: str, path: Path | str) -> ChangeSummary | None:
+        """Apply a change file to the dataset `name`, see
+        `CompanyStore.apply_change_file`. When another process holds its
+        database, the file is queued in its inbox instead (see `sync`).
+
+        Returns:
+            ChangeSummary | None: the applied changes, None when queued.
+
+        Raises:
+            KeyError: when no dataset is registered under `name`.
+        """
+        if name not in self._datasets:
+            raise KeyError(f"No dataset registered under {name}")
+        if self._datasets[name].held_elsewhere():
+            queued = self._datasets[name].queue_changes(path)
+            logger.info("Changes queued as %s for the process holding %s", queued, name)
+            return None
+        with self.use(name) as dataset:
+            return dataset.store.apply_change_file(path)
+
+    def sync(self) -> None:
+        """`Dataset.sync` the loaded datasets, pinned meanwhile."""
+        with self._lock:
+            loaded = [self._datasets[name] for name in self._recent]
+            for dataset in loaded:
+                dataset.pins += 1
+        try:
+            for dataset in loaded:
+                try:
+                    dataset.sync()
+                except Exception:
+                    logger.exception("Sync of dataset %s failed", dataset.name)
+        finally:
+            with self._lock:
+                for dataset in loaded:
+                    dataset.pins -= 1
+
+    def watch(self, interval: float = SYNC_INTERVAL) -> threading.Thread:
+        """`sync` every `interval` seconds in a daemon thread, so a running
+        app applies the queued change files and picks up newer snapshots."""
+
+        def run():
+            while True:
+                time.sleep(interval)
+                self.sync()
+
+        thread = threading.Thread(target=run, name="dataset-sync", daemon=True)
+        thread.start()
+        return thread
+
+    def enforce_budget(self, keep: str = None) -> list[str]:
+        """Unload the least recently selected datasets until the loaded ones
+        fit in the memory budget. `keep` and the pinned datasets are never
+        unloaded.
+
+        Returns:
+            list[str]: names of the unloaded datasets.
+        """
+        unloaded = []
+        with self._lock:
+            loaded = {name: self._datasets[name] for name in self._recent}
+            memory = {name: dataset.memory_bytes() for name, dataset in loaded.items()}
+            for name in list(self._recent):
+                if sum(memory.values()) <= self.memory_budget_bytes:
+                    break
+                if name == keep or loaded[name].pins:
+                    continue
+                loaded[name].unload()
+                del self._recent[name]
+                del memory[name]
+                unloaded.append(name)
+        return unloaded
+
+    def memory_bytes(self) -> int:
+        """Memory held by the loaded datasets."""
+        return sum(dataset.memory_bytes() for dataset in self._datasets.values())
+
+
+_default_registry = None
+_default_registry_lock = threading.Lock()
+
+
+def get_default_registry() -> DatasetRegistry:
+    """Returns the application's registry: the default company dataset, in
+    the default company database, and the files of `DATASET_DIRECTORY`."""
+    global _default_registry
+    with _default_registry_lock:
+        if _default_registry is None:
+            _default_registry = DatasetRegistry(publish_snapshots=PUBLISH_SNAPSHOTS)
+            _default_registry.register(
+                DEFAULT_DATASET,
+                DEFAULT_COMPANY_FILE,
+                database_path="./data/company.duckdb",
+                alias="company_store",
+            )
+            _default_registry.discover()
+        return _default_registry
@@ -0,0 +1,156 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .blocking import DEFAULT_BLOCKING_KEYS
+from .company_store import HIDDEN_COLUMNS
+from .connection_pool import ConnectionPool
+from .similarity_score import QueryRunner
+
+
+class UnionFind:
+    """Disjoint sets over the integers 0 to size - 1."""
+
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+        self.rank = [0] * size
+
+    def find(self, item: int) -> int:
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, item_a: int, item_b: int) -> None:
+        root_a, root_b = self.find(item_a), self.find(item_b)
+        if root_a == root_b:
+            return
+        if self.rank[root_a] < self.rank[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        if self.rank[root_a] == self.rank[root_b]:
+            self.rank[root_a] += 1
+
+
+def cluster_pairs(pairs: pd.DataFrame) -> pd.DataFrame:
+    """Group the ids linked by duplicate pairs into clusters.
+
+    Args:
+        pairs (pd.DataFrame): `id_a`, `id_b` and `jaro_winkler_similarity_score`
+            of the duplicate pairs.
+
+    Returns:
+        pd.DataFrame: `id`, `cluster_id` (smallest id of the cluster),
+            `cluster_size` and `best_score` (best score of the id's pairs).
+    """
+    columns = ["id", "cluster_id", "cluster_size", "best_score"]
+    if pairs.empty:
+        return pd.DataFrame(columns=columns)
+
+    ids, positions = np.unique(
+        np.concatenate([pairs["id_a"], pairs["id_b"]]), return_inverse=True
+    )
+    positions_a, positions_b = np.split(positions, 2)
+    clusters = UnionFind(len(ids))
+    for position_a, position_b in zip(
+        positions_a.tolist(), positions_b.tolist(), strict=True
+    ):
+        clusters.union(position_a, position_b)
+
+    roots = np.fromiter(
+        (clusters.find(position) for position in range(len(ids))),
+        dtype=np.int64,
+        count=len(ids),
+    )
+    cluster_ids = pd.Series(ids).groupby(roots).transform("min").to_numpy()
+    scores = pd.concat(
+        [
+            pairs[["id_a", "jaro_winkler_similarity_score"]].set_axis(
+                ["id", "score"], axis=1
+            ),
+            pairs[["id_b", "jaro_winkler_similarity_score"]].set_axis(
+                ["id", "score"], axis=1
+            ),
+        ]
+    )
+    best_scores = scores.groupby("id")["score"].max()
+
+    result = pd.DataFrame({"id": ids, "cluster_id": cluster_ids})
+    result["cluster_size"] = result.groupby("cluster_id")["id"].transform("size")
+    result["best_score"] = result["id"].map(best_scores)
+    return result[columns]
+
+
+class DeduplicatePeople(QueryRunner):
+    """Finds clusters of likely duplicate people inside one company dataset.
+
+    Comparing every row with every other row is quadratic, so the rows are
+    only compared within blocks of rows sharing a blocking key (see
+    `DEFAULT_BLOCKING_KEYS`), with the same `jaro_winkler_similarity > threshold`
+    rule as the searches. In the blocks larger than `max_block_size`, the rows
+    are sorted by name and each one is only compared with the `window_size`
+    next names (sorted neighbourhood), which bounds the work; the other keys
+    still compare those rows with their whole blocks. The duplicate pairs
+    are then grouped into clusters with union-find, so a cluster can hold
+    people linked through a chain of close names.
+
+    The company data needs the derived columns computed by `CompanyStore`.
+    """
+
+    def __init__(
+        self,
+        template_dir: Path | str = None,
+        pool: ConnectionPool = None,
+        blocking_keys: dict[str, str] = None,
+        max_block_size: int = 1000,
+        window_size: int = 50,
+    ):
+        super().__init__(template_dir, pool)
+        self.blocking_keys = blocking_keys or DEFAULT_BLOCKING_KEYS
+        self.max_block_size = max_block_size
+        self.window_size = window_size
+
+    def find_pairs(self, threshold: float, data_source: str) -> pd.DataFrame:
+        """Pairs of ids (`id_a` < `id_b`) whose names are above the threshold."""
+        return self.execute(
+            "duplicate_pairs.sql.j2",
+            threshold=threshold,
+            data_source=data_source,
+            blocking_keys=self.blocking_keys,
+            max_block_size=self.max_block_size,
+            window_size=self.window_size,
+        )
+
+    def windowed_rows(self, data_source: str) -> int:
+        """Number of rows in a block larger than `max_block_size` for at
+        least one key, only compared with their neighbours in that block."""
+        return int(
+            self.execute(
+                "oversized_blocks.sql.j2",
+                data_source=data_source,
+                blocking_keys=self.blocking_keys,
+                max_block_size=self.max_block_size,
+            )["windowed_rows"].iloc[0]
+        )
+
+    def run(self, threshold: float, data_source: str) -> pd.DataFrame:
+        """Find the clusters of likely duplicates.
+
+        Args:
+            threshold (float): jaro-winkler threshold value
+            data_source (str): Company data to deduplicate.
+
+        Returns:
+            pd.DataFrame: one row per person in a cluster, with the
+                `cluster_id`, `cluster_size`, best score and company columns.
+        """
+        clusters = cluster_pairs(self.find_pairs(threshold, data_source))
+        return self.execute(
+            "duplicate_clusters.sql.j2",
+            relations={"clusters": clusters},
+            data_source=data_source,
+            clusters_relation="clusters",
+            hidden_columns=HIDDEN_COLUMNS,
+        )
@@ -0,0 +1,33 @@
+import time
+import uuid
+from pathlib import Path
+
+EXPORT_DIRECTORY = "./data/exports"
+EXPORT_EXTENSIONS = {"parquet": ".parquet", "csv": ".csv.gz"}
+
+
+def new_export_path(
+    file_format: str,
+    directory: Path | str = EXPORT_DIRECTORY,
+    max_age_seconds: float = 3600,
+) -> Path:
+    """Unique path for an export file, in a directory only holding exports.
+
+    Export files are removed once downloaded, the ones older than
+    `max_age_seconds` (downloads that never finished) are removed here.
+
+    Args:
+        file_format (str): "parquet" or "csv".
+        directory (Path | str, optional): Directory of the export files.
+        max_age_seconds (float, optional): Age of the exports to remove.
+
+    Returns:
+        Path: path of the new export file, which doesn't exist yet.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    expired_before = time.time() - max_age_seconds
+    for path in directory.iterdir():
+        if path.stat().st_mtime < expired_before:
+            path.unlink(missing_ok=True)
+    return directory / f"{uuid.uuid4().hex}{EXPORT_EXTENSIONS[file_format]}"
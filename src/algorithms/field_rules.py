@@ -0,0 +1,113 @@
+from dataclasses import dataclass
+
+# SQL normalization of the values compared by the field rules
+FIELD_NORMALIZERS = {
+    "exact": "CAST({} AS VARCHAR)",
+    "name": "NULLIF(normalize_name({}), '')",
+    "email": "normalize_email({})",
+    "phone": "normalize_phone({})",
+}
+# Company fields usable in multi-field matches, and their default normalizer
+COMPANY_FIELDS = {
+    "email": "email",
+    "phone": "phone",
+    "city": "name",
+    "country": "name",
+}
+FIELD_MODES = ("filter", "boost")
+# Coarse company fields, shared by too many people to rank the matches
+FILTER_ONLY_FIELDS = ("city", "country")
+
+
+def _quote(column: str) -> str:
+    return '"' + column.replace('"', '""') + '"'
+
+
+@dataclass(frozen=True)
+class FieldRule:
+    """Maps an uploaded column to a company field, compared by equality of the
+    normalized values, a lot cheaper than the string metrics.
+
+    A "filter" field must be equal: only the company rows with the same value
+    are compared with the name, with an equality join instead of a cross
+    join. A "boost" field only ranks the names above the threshold: its
+    `weight` counts in the weighted score when both values are known, for
+    the equal ones. City and country are shared by too many people to rank
+    by, they can only be filters (see `FILTER_ONLY_FIELDS`).
+
+    Attributes:
+        company_column (str): Column of the company data.
+        upload_column (str): Column of the uploaded file.
+        mode (str): "filter" or "boost".
+        weight (float): Weight of a boost field in the weighted score, the
+            name similarity weighs 1.
+        normalizer (str): Key of `FIELD_NORMALIZERS`, defaults to the one of
+            the company field in `COMPANY_FIELDS`, or "exact".
+    """
+
+    company_column: str
+    upload_column: str
+    mode: str = "boost"
+    weight: float = 0.25
+    normalizer: str = ""
+
+    def __post_init__(self):
+        if self.mode not in FIELD_MODES:
+            raise ValueError(
+                f"The field mode needs to be one of {FIELD_MODES}, found {self.mode}"
+            )
+        if self.normalizer_key not in FIELD_NORMALIZERS:
+            raise ValueError(
+                f"The normalizer needs to be one of {list(FIELD_NORMALIZERS)}, "
+                f"found {self.normalizer}"
+            )
+        if self.mode == "boost" and self.company_column in FILTER_ONLY_FIELDS:
+            raise ValueError(
+                f"The {self.company_column} field can only be a filter, not a boost"
+            )
+        if self.weight < 0:
+            raise ValueError(f"The weight can't be negative, found {self.weight}")
+
+    @property
+    def normalizer_key(self) -> str:
+        return self.normalizer or COMPANY_FIELDS.get(self.company_column, "exact")
+
+    def company_sql(self, relation: str) -> str:
+        return FIELD_NORMALIZERS[self.normalizer_key].format(
+            f"{relation}.{_quote(self.company_column)}"
+        )
+
+    def upload_sql(self, relation: str) -> str:
+        return FIELD_NORMALIZERS[self.normalizer_key].format(
+            f"{relation}.{_quote(self.upload_column)}"
+        )
+
+
+def field_rule_params(field_rules: list[FieldRule]) -> dict:
+    """Parameters of the multi-field comparison query.
+
+    The threshold applies to the name similarity alone, so a boost never turns
+    a name below it into a match. The weighted score of the matches is the
+    weighted mean of the name similarity (weight 1) and of the boost fields
+    whose values are both known (1 when equal, 0 otherwise): a missing value
+    doesn't lower it.
+    """
+    return {
+        "field_filters": [
+            {
+                "upload": rule.upload_sql("input_data"),
+                "company": rule.company_sql("data_source"),
+            }
+            for rule in field_rules
+            if rule.mode == "filter"
+        ],
+        "field_boosts": [
+            {
+                "upload": rule.upload_sql("input_data"),
+                "company": rule.company_sql("data_source"),
+                "weight": rule.weight,
+            }
+            for rule in field_rules
+            if rule.mode == "boost"
+        ],
+    }
@@ -1,39 +1,91 @@
+from __future__ import annotations
+
 from pathlib import Path
 from typing import Type
 
 import pandas as pd
 import pyarrow.parquet as pq
 
+from .blocking import BlockedSimilarNamesForCSV, BlockedSimilarNamesForParquet
+from .minhash import MinHashSimilarNamesForCSV, MinHashSimilarNamesForParquet
 from .similarity_score import (
     RetrieveSimilarNamesForCSV,
     RetrieveSimilarNamesForFile,
     RetrieveSimilarNamesForParquet,
+    StreamingSimilarNamesForCSV,
+    StreamingSimilarNamesForParquet,
 )
 
 
+def _read_csv_columns(path: str) -> pd.DataFrame:
+    return pd.read_csv(path, nrows=0)
+
+
+def _read_parquet_columns(path: str) -> pd.DataFrame:
+    return pq.ParquetFile(path).schema_arrow.empty_table().to_pandas()
+
+
 class FileProcessorFactory:
-    _processors: dict[str, Type[RetrieveSimilarNamesForFile]] = {
-        ".csv": RetrieveSimilarNamesForCSV,
-        ".parquet": RetrieveSimilarNamesForParquet,
+    """Processors by matching engine and file extension.
+
+    The "exact" engine compares every uploaded name with the company data,
+    and "streaming" does it in chunks of names to bound the memory. The
+    "blocked" engine only scores the company rows sharing a blocking key with
+    the name, and "minhash" the candidates found with MinHash/LSH.
+    `QueryPlanner` picks an engine for a comparison.
+    """
+
+    _processors: dict[str, dict[str, Type[RetrieveSimilarNamesForFile]]] = {
+        "exact": {
+            ".csv": RetrieveSimilarNamesForCSV,
+            ".parquet": RetrieveSimilarNamesForParquet,
+        },
+        "streaming": {
+            ".csv": StreamingSimilarNamesForCSV,
+            ".parquet": StreamingSimilarNamesForParquet,
+        },
+        "blocked": {
+            ".csv": BlockedSimilarNamesForCSV,
+            ".parquet": BlockedSimilarNamesForParquet,
+        },
+        "minhash": {
+            ".csv": MinHashSimilarNamesForCSV,
+            ".parquet": MinHashSimilarNamesForParquet,
+        },
     }
 
     @classmethod
     def register_processor(
-        cls, extension: str, processor: Type[RetrieveSimilarNamesForFile]
+        cls,
+        extension: str,
+        processor: Type[RetrieveSimilarNamesForFile],
+        engine: str = "exact",
     ) -> None:
-        """Register a new file processor for a given extension."""
-        cls._processors[extension.lower()] = processor
+        """Register a new file processor for a given extension and engine."""
+        cls._processors.setdefault(engine, {})[extension.lower()] = processor
+
+    @classmethod
+    def engines(cls) -> list[str]:
+        return list(cls._processors)
 
     @classmethod
-    def get_processor(cls, file_path: str) -> RetrieveSimilarNamesForFile:
-        """Get the appropriate processor for the given file path."""
+    def get_processor(
+        cls, file_path: str, engine: str = "exact", **options
+    ) -> RetrieveSimilarNamesForFile:
+        """Get the appropriate processor for the given file path and engine.
+        The options are passed to the processor, like the LSH `bands` and
+        `rows` of the "minhash" engine."""
         file_extension = cls._get_file_extension(file_path)
-        processor_class = cls._processors.get(file_extension)
+        if engine not in cls._processors:
+            raise ValueError(
+                f"The engine needs to be one of {cls.engines()}, found {engine}"
+            )
+        processor_class = cls._processors[engine].get(file_extension)
         if processor_class is None:
             raise ValueError(
                 f"The file type needs to be csv or parquet, found {file_extension}"
             )
-        return processor_class()
+        return processor_class(**options)
 
     @staticmethod
     def _get_file_extension(file_path: str) -> str:
@@ -45,10 +97,8 @@ class FileProcessorFactory:
 
 class DataReaderFactory:
     _readers: dict[str, callable] = {
-        ".csv": lambda path: pd.read_csv(path, nrows=0),
-        ".parquet": lambda path: pq.ParquetFile(path)
-        .schema_arrow.empty_table()
-        .to_pandas(),
+        ".csv": _read_csv_columns,
+        ".parquet": _read_parquet_columns,
     }
 
     @classmethod
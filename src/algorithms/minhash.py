@@ -0,0 +1,181 @@
+import hashlib
+import threading
+import weakref
+from pathlib import Path
+
+from .connection_pool import ConnectionPool, get_default_pool
+from .field_rules import FieldRule
+from .similarity_score import RetrieveSimilarNamesForFile
+
+# Prefix of the tables caching the band hashes of the company data
+SIGNATURE_TABLE_PREFIX = "minhash_bands_"
+
+_signature_lock = threading.Lock()
+# Estimated bytes of the band hash tables of each pool, by table name, measured
+# when they're created: the tables only hold 8-byte integers
+_signature_bytes: weakref.WeakKeyDictionary[ConnectionPool, dict[str, int]] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _signature_table_prefix(data_source: str) -> str:
+    return SIGNATURE_TABLE_PREFIX + hashlib.sha256(data_source.encode()).hexdigest()[:8]
+
+
+def clear_signature_cache(pool: ConnectionPool = None, data_source: str = None) -> None:
+    """Drop the cached band hashes of the company data, to call when the
+    company data changes (for instance as a `CompanyStore` listener).
+
+    Args:
+        pool (ConnectionPool, optional): Pool holding the cache.
+        data_source (str, optional): Only drop the band hashes of this
+            company relation. Defaults to all of them.
+    """
+    pool = pool or get_default_pool()
+    prefix = (
+        _signature_table_prefix(data_source) if data_source else SIGNATURE_TABLE_PREFIX
+    )
+    with _signature_lock, pool.connection() as connection:
+        tables = connection.execute(
+            """SELECT table_name FROM duckdb_tables()
+            WHERE database_name = current_database()
+            AND starts_with(table_name, ?)""",
+            [prefix],
+        ).fetchall()
+        for (table_name,) in tables:
+            connection.execute(f"DROP TABLE IF EXISTS {table_name}")
+        sizes = _signature_bytes.get(pool, {})
+        for table_name in [name for name in sizes if name.startswith(prefix)]:
+            del sizes[table_name]
+
+
+def signature_cache_bytes(pool: ConnectionPool = None, data_source: str = None) -> int:
+    """Estimated memory of the cached band hashes of the company data, without
+    querying the database.
+
+    Args:
+        pool (ConnectionPool, optional): Pool holding the cache.
+        data_source (str, optional): Only count the band hashes of this
+            company relation. Defaults to all of them.
+    """
+    pool = pool or get_default_pool()
+    prefix = (
+        _signature_table_prefix(data_source) if data_source else SIGNATURE_TABLE_PREFIX
+    )
+    with _signature_lock:
+        return sum(
+            size
+            for table_name, size in _signature_bytes.get(pool, {}).items()
+            if table_name.startswith(prefix)
+        )
+
+
+class MinHashSimilarNamesForFile(RetrieveSimilarNamesForFile):
+    """Approximate comparison between two data sources, for large uploads.
+
+    Each normalized name gets a MinHash signature over its character
+    shingles (`shingle_size` characters, with start and end markers). The
+    signature is cut into `bands` bands of `rows` min-hashes, and only the
+    names sharing at least one band with a company row (locality-sensitive
+    hashing) are scored with the exact Jaro-Winkler similarity, with the same
+    threshold as the exhaustive comparison. The result is a subset of the
+    exhaustive result.
+
+    Two names with a shingle Jaccard similarity `s` become candidates with a
+    probability of `1 - (1 - s ** rows) ** bands`: more bands raise the
+    recall, more rows skip more dissimilar pairs, both at some latency cost.
+
+    The band hashes of the company data are computed once per data source
+    and parameters, and cached in the pooled database until
+    `clear_signature_cache` is called.
+    """
+
+    def __init__(
+        self,
+        data_source_type,
+        template_dir: Path | str = None,
+        pool: ConnectionPool = None,
+        bands: int = 24,
+        rows: int = 3,
+        shingle_size: int = 2,
+    ):
+        super().__init__(data_source_type, template_dir, pool)
+        self.bands = bands
+        self.rows = rows
+        self.shingle_size = shingle_size
+
+    def _query_params(
+        self,
+        data_for_comparison: str,
+        comparison_first_name: str,
+        comparison_family_name: str,
+        threshold: float,
+        data_source: str,
+        prune_with_bounds: bool,
+        field_rules: list[FieldRule] = None,
+    ) -> dict:
+        return {
+            **super()._query_params(
+                data_for_comparison,
+                comparison_first_name,
+                comparison_family_name,
+                threshold,
+                data_source,
+                prune_with_bounds,
+                field_rules,
+            ),
+            "company_bands": self.company_bands(data_source),
+            **self._lsh_params(),
+        }
+
+    def company_bands(self, data_source: str) -> str:
+        """Name of the table with the band hashes of `data_source`, created on
+        first use."""
+        # Prefixed by the hash of the relation, to drop the tables of a relation
+        key = f"{self.bands}|{self.rows}|{self.shingle_size}"
+        table_name = (
+            f"{_signature_table_prefix(data_source)}_"
+            f"{hashlib.sha256(key.encode()).hexdigest()[:8]}"
+        )
+        sql = self.render_query(
+            "minhash_company_bands.sql.j2",
+            table_name=table_name,
+            data_source=data_source,
+            **self._lsh_params(),
+        )
+        with _signature_lock, self.pool.connection() as connection:
+            connection.execute(sql)
+            sizes = _signature_bytes.setdefault(self.pool, {})
+            if table_name not in sizes:
+                rows, columns = connection.execute(
+                    """SELECT estimated_size, column_count FROM duckdb_tables()
+                    WHERE database_name = current_database() AND table_name = ?""",
+                    [table_name],
+                ).fetchone()
+                sizes[table_name] = 8 * rows * columns
+        return table_name
+
+    def _lsh_params(self) -> dict:
+        return {
+            "bands": self.bands,
+            "rows": self.rows,
+            "shingle_size": self.shingle_size,
+        }
+
+
+class MinHashSimilarNamesForCSV(MinHashSimilarNamesForFile):
+    """Approximate comparison with CSV files"""
+
+    def __init__(
+        self, template_dir: Path | str = None, pool: ConnectionPool = None, **lsh_params
+    ):
+        super().__init__("read_csv", template_dir, pool, **lsh_params)
+
+
+class MinHashSimilarNamesForParquet(MinHashSimilarNamesForFile):
+    """Approximate comparison with Parquet files"""
+
+    def __init__(
+        self, template_dir: Path | str = None, pool: ConnectionPool = None, **lsh_params
+    ):
+        super().__init__("read_parquet", template_dir, pool, **lsh_params)
@@ -0,0 +1,374 @@
+from __future__ import annotations
+
+import json
+import logging
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from .company_store import ChangeSet
+from .connection_pool import ConnectionPool, get_default_pool
+
+if TYPE_CHECKING:
+    from .company_store import CompanyStore
+
+logger = logging.getLogger(__name__)
+
+INDEX_FORMAT_VERSION = 2
+
+# Normalized names only hold a-z and dashes, 0 pads the name boundaries and 28
+# catches anything else, so a trigram fits in a code below 29**3
+_ALPHABET_SIZE = 29
+_NGRAM_CODES = _ALPHABET_SIZE**3
+_SOUNDEX_DIGITS = dict.fromkeys("bfpv", "1")
+_SOUNDEX_DIGITS.update(dict.fromkeys("cgjkqsxz", "2"))
+_SOUNDEX_DIGITS.update(dict.fromkeys("dt", "3"))
+_SOUNDEX_DIGITS.update({"l": "4", "m": "5", "n": "5", "r": "6"})
+
+_ARRAYS = (
+    "ids",
+    "name_offsets",
+    "name_bytes",
+    "lengths",
+    "ngram_offsets",
+    "ngram_postings",
+    "phonetic_keys",
+    "phonetic_order",
+    "phonetic_sorted_keys",
+)
+
+
+def _char_code(char: str) -> int:
+    if "a" <= char <= "z":
+        return ord(char) - ord("a") + 1
+    if char == "-":
+        return 27
+    return 28
+
+
+def ngram_codes(name: str) -> np.ndarray:
+    """Distinct trigram codes of a normalized name, padded at both ends."""
+    codes = [0] + [_char_code(char) for char in name] + [0]
+    if len(codes) < 3:
+        return np.empty(0, dtype=np.int32)
+    codes = np.asarray(codes, dtype=np.int32)
+    trigrams = codes[:-2] * _ALPHABET_SIZE**2 + codes[1:-1] * _ALPHABET_SIZE + codes[2:]
+    return np.unique(trigrams)
+
+
+def _soundex(token: str) -> int:
+    """American Soundex of a token, packed as letter * 1000 + digits."""
+    if not token or not "a" <= token[0] <= "z":
+        return 0
+    digits = []
+    previous = _SOUNDEX_DIGITS.get(token[0])
+    for char in token[1:]:
+        digit = _SOUNDEX_DIGITS.get(char)
+        if digit and digit != previous:
+            digits.append(digit)
+        if char not in "hw":
+            previous = digit
+    letter = ord(token[0]) - ord("a") + 1
+    return letter * 1000 + int("".join(digits[:3]).ljust(3, "0"))
+
+
+def phonetic_key(name: str, swapped: bool = False) -> int:
+    """Soundex of the first and last tokens of a normalized name, packed in
+    32 bits. `swapped` builds the key of the inverted name (last name first).
+    """
+    tokens = [token for token in name.split("-") if token]
+    if not tokens:
+        return 0
+    first, last = _soundex(tokens[0]), _soundex(tokens[-1])
+    if swapped:
+        first, last = last, first
+    return (first << 16) | last
+
+
+class NameIndex:
+    """
+    Compact on-disk index of the company names, opened with memory mapping.
+
+    The index holds flat arrays, one `.npy` file each, aligned on the company
+    rows: `ids`, the normalized names (`name_bytes` sliced by `name_offsets`),
+    their `lengths`, their `phonetic_keys`, and the trigram postings in CSR
+    layout (`ngram_postings[ngram_offsets[code]:ngram_offsets[code + 1]]` are
+    the rows holding the trigram `code`). The phonetic postings are the rows
+    sorted by key (`phonetic_order`) and their keys (`phonetic_sorted_keys`),
+    searched by bisection. Opening the index maps the files
+    read-only, so every worker process on a host shares the same pages.
+
+    Attributes:
+        directory (Path): Directory holding the index files.
+        ids (np.ndarray): Company `id` of each indexed row.
+        lengths (np.ndarray): Length of each normalized name.
+        phonetic_keys (np.ndarray): Soundex key of each normalized name.
+    """
+
+    def __init__(
+        self,
+        directory: Path | str | None,
+        arrays: dict[str, np.ndarray],
+        data_version: int = 0,
+    ):
+        self.directory = Path(directory) if directory else None
+        self.data_version = data_version
+        for name in _ARRAYS:
+            setattr(self, name, arrays[name])
+        self._removed = None
+        self._delta_names: dict[int, str] = {}
+        self._delta = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @staticmethod
+    def _build_arrays(ids, names) -> dict[str, np.ndarray]:
+        names = ["" if name is None else str(name) for name in names]
+        encoded = [name.encode("ascii", "replace") for name in names]
+        lengths = np.fromiter((len(name) for name in encoded), dtype=np.int32)
+        name_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=name_offsets[1:])
+
+        row_ngrams = [ngram_codes(name) for name in names]
+        counts = np.fromiter((len(codes) for codes in row_ngrams), dtype=np.int64)
+        codes = np.concatenate(row_ngrams) if row_ngrams else np.empty(0, np.int32)
+        rows = np.repeat(np.arange(len(names), dtype=np.int32), counts)
+        order = np.argsort(codes, kind="stable")
+        ngram_offsets = np.zeros(_NGRAM_CODES + 1, dtype=np.int64)
+        np.cumsum(np.bincount(codes, minlength=_NGRAM_CODES), out=ngram_offsets[1:])
+        phonetic_keys = np.fromiter(
+            (phonetic_key(name) for name in names), dtype=np.uint32
+        )
+        phonetic_order = np.argsort(phonetic_keys, kind="stable").astype(np.int32)
+
+        return {
+            "ids": np.asarray(ids, dtype=np.int64),
+            "name_offsets": name_offsets,
+            "name_bytes": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+            "lengths": lengths,
+            "ngram_offsets": ngram_offsets,
+            "ngram_postings": rows[order],
+            "phonetic_keys": phonetic_keys,
+            "phonetic_order": phonetic_order,
+            "phonetic_sorted_keys": phonetic_keys[phonetic_order],
+        }
+
+    @classmethod
+    def build(
+        cls,
+        ids,
+        names,
+        directory: Path | str | None,
+        mmap: bool = True,
+        data_version: int = 0,
+    ) -> NameIndex:
+        """Write the index files for the given rows.
+
+        Each file is written aside and moved in place, so the processes that
+        mapped the previous files keep reading them until they reopen the
+        index. The metadata is moved last.
+
+        Args:
+            ids (Sequence[int]): Company ids.
+            names (Sequence[str]): Normalized names, aligned on `ids`.
+            directory (Path | str | None): Directory to write the index to.
+                None keeps the index in memory, without files.
+            mmap (bool, optional): Open the written index with memory mapping.
+                Defaults to True.
+            data_version (int, optional): Version of the company data the
+                index is built from, see `CompanyStore.version`. Defaults to 0.
+
+        Returns:
+            NameIndex: the index written in `directory`.
+        """
+        arrays = cls._build_arrays(ids, names)
+        if directory is None:
+            return cls(None, arrays, data_version)
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for name, array in arrays.items():
+            partial = directory / f"{name}.npy.partial"
+            with partial.open("wb") as file:
+                np.save(file, array)
+            partial.replace(directory / f"{name}.npy")
+        partial = directory / "meta.json.partial"
+        partial.write_text(
+            json.dumps(
+                {
+                    "version": INDEX_FORMAT_VERSION,
+                    "rows": len(arrays["ids"]),
+                    "data_version": data_version,
+                }
+            )
+        )
+        partial.replace(directory / "meta.json")
+        if mmap:
+            return cls.open(directory)
+        return cls(directory, arrays, data_version)
+
+    @classmethod
+    def build_from_source(
+        cls,
+        directory: Path | str | None,
+        data_source: str = "read_parquet('./data/fake_data.parquet')",
+        pool: ConnectionPool = None,
+        data_version: int = 0,
+    ) -> NameIndex:
+        """Write the index for a company data source with `id` and
+        `name_for_comparison` columns."""
+        pool = pool or get_default_pool()
+        with pool.connection() as connection:
+            rows = connection.execute(
+                f"SELECT id, name_for_comparison FROM {data_source}"
+            ).fetchnumpy()
+        return cls.build(
+            rows["id"],
+            rows["name_for_comparison"],
+            directory,
+            data_version=data_version,
+        )
+
+    @classmethod
+    def open(cls, directory: Path | str, data_version: int = None) -> NameIndex:
+        """Open an index written by `build`, with read-only memory mapping.
+
+        Args:
+            directory (Path | str): Directory of the index files.
+            data_version (int, optional): Version of the company data the
+                index must be built from. Defaults to any version.
+
+        Raises:
+            FileNotFoundError: the directory doesn't hold an index
+            ValueError: the index was written with another format version, or
+                from another version of the company data
+        """
+        directory = Path(directory)
+        meta_file = directory / "meta.json"
+        if not meta_file.exists():
+            raise FileNotFoundError(f"No name index found in '{directory}'")
+        meta = json.loads(meta_file.read_text())
+        if meta.get("version") != INDEX_FORMAT_VERSION:
+            raise ValueError(
+                f"Name index version {meta.get('version')} in '{directory}' "
+                f"is not supported, rebuild it"
+            )
+        if data_version is not None and meta.get("data_version") != data_version:
+            raise ValueError(
+                f"Name index in '{directory}' was built from version "
+                f"{meta.get('data_version')} of the company data, not {data_version}"
+            )
+        arrays = {
+            name: np.load(directory / f"{name}.npy", mmap_mode="r") for name in _ARRAYS
+        }
+        return cls(directory, arrays, meta.get("data_version", 0))
+
+    @classmethod
+    def open_or_build(cls, directory: Path | str, store: CompanyStore) -> NameIndex:
+        """Open the index of the company data of `store`, building it first
+        when it's missing, written with another format version or stale: its
+        `data_version` isn't the store's version, for instance when another
+        process applied changes since it was written.
+
+        A read-only store doesn't own the index files, its writer process
+        does: a stale index is then rebuilt in memory only.
+        """
+        version = store.version()
+        try:
+            return cls.open(directory, data_version=version)
+        except (FileNotFoundError, ValueError) as error:
+            logger.info("Building the name index: %s", error)
+            return cls.build_from_source(
+                None if store.read_only else directory,
+                store.data_source,
+                store.pool,
+                version,
+            )
+
+    def name(self, position: int) -> str:
+        """Normalized name of the indexed row at `position`."""
+        start, end = self.name_offsets[position], self.name_offsets[position + 1]
+        return bytes(self.name_bytes[start:end]).decode("ascii")
+
+    def candidate_positions(self, name: str, min_shared_ngrams: int = 1) -> np.ndarray:
+        """Rows sharing at least `min_shared_ngrams` trigrams with `name`, or
+        sounding like it (first and last name in either order)."""
+        postings = [
+            self.ngram_postings[self.ngram_offsets[code] : self.ngram_offsets[code + 1]]
+            for code in ngram_codes(name)
+        ]
+        postings = [rows for rows in postings if len(rows)]
+        if not postings:
+            by_ngram = np.empty(0, dtype=np.int64)
+        elif min_shared_ngrams <= 1:
+            by_ngram = np.unique(np.concatenate(postings))
+        else:
+            shared = np.bincount(np.concatenate(postings), minlength=len(self))
+            by_ngram = np.flatnonzero(shared >= min_shared_ngrams)
+
+        key = phonetic_key(name)
+        if not key:
+            return by_ngram
+        by_sound = [
+            self.phonetic_order[
+                np.searchsorted(self.phonetic_sorted_keys, key, "left") : (
+                    np.searchsorted(self.phonetic_sorted_keys, key, "right")
+                )
+            ]
+            for key in {key, phonetic_key(name, swapped=True)}
+        ]
+        return np.union1d(by_ngram, np.concatenate(by_sound))
+
+    def candidates(self, name: str, min_shared_ngrams: int = 1) -> np.ndarray:
+        """Company ids of the candidate rows for `name`, to be scored with the
+        exact metric.
+
+        The candidates are approximate: they're not a superset of the names
+        above a Jaro-Winkler threshold. A misspelled name can share no trigram
+        with `name` and sound different, yet score above 0.9 ("luc-leeb" for
+        "lwucl-eelb"). A higher `min_shared_ngrams` returns fewer candidates
+        and misses more of them.
+        """
+        positions = self.candidate_positions(name, min_shared_ngrams)
+        if self._removed is not None:
+            positions = positions[~self._removed[positions]]
+        ids = np.asarray(self.ids[positions])
+        if self._delta is not None:
+            ids = np.union1d(
+                ids, self._delta.candidates(name, min_shared_ngrams=min_shared_ngrams)
+            )
+        return ids
+
+    def apply_changes(self, change_set: ChangeSet) -> None:
+        """Update the index with a `ChangeSet` committed to the company table.
+
+        The memory-mapped files are never rewritten: removed rows are masked
+        and added rows go to a small in-memory delta index, rebuilt from the
+        changed rows only. Build a new index to merge them back in.
+
+        Raises:
+            ValueError: the change set is a full reload, the index must be
+                rebuilt (see `open_or_build`).
+        """
+        if change_set.full_reload:
+            raise ValueError(
+                f"Version {change_set.version} reloaded the company table, "
+                f"rebuild the name index"
+            )
+        removed = np.isin(self.ids, change_set.removed_ids)
+        self._removed = removed if self._removed is None else self._removed | removed
+        for id_ in change_set.removed_ids:
+            self._delta_names.pop(int(id_), None)
+        self._delta_names.update(
+            zip(
+                change_set.added["id"].astype("int64").tolist(),
+                change_set.added["name_for_comparison"],
+                strict=True,
+            )
+        )
+        self._delta = NameIndex(
+            None,
+            self._build_arrays(list(self._delta_names), self._delta_names.values()),
+        )
+        self.data_version = change_set.version
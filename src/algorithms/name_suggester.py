@@ -0,0 +1,150 @@
+import logging
+import sys
+import threading
+from bisect import bisect_left
+
+from .company_store import ChangeSet, CompanyStore
+from .normalize_name import normalize_name
+
+logger = logging.getLogger(__name__)
+
+
+def _rotations(name: str) -> list[str]:
+    """The name and its token rotations, so a name is found from any of its
+    tokens: "jean-luc-picard", "luc-picard-jean", "picard-jean-luc"."""
+    tokens = name.split("-")
+    return ["-".join(tokens[start:] + tokens[:start]) for start in range(len(tokens))]
+
+
+class NameSuggester:
+    """
+    As-you-type suggestions of company names, from an in-memory sorted array
+    searched with binary search.
+
+    The array holds every distinct normalized company name and its token
+    rotations, so typing a family name first also finds the name. A prefix
+    search is a bisection followed by a scan of the matching keys, and takes
+    microseconds even for millions of names.
+
+    Suggestions only help to type a name: the Jaro-Winkler search runs when
+    the user commits to a name. So after a change of the company data, the
+    array is rebuilt in a background thread while the searches keep using the
+    previous one, swapped for the new one when it's ready. Only the first
+    search, without any array yet, waits for the build.
+
+    Attributes:
+        store (CompanyStore): Company data the names come from.
+    """
+
+    def __init__(self, store: CompanyStore):
+        self.store = store
+        # Sorted keys and the name of each key, swapped at once on refresh
+        self._entries: tuple[list[str], list[str]] = ([], [])
+        self._built = False
+        self._memory_bytes = 0
+        self._stale = True
+        # Bumped by `clear`, so a rebuild started before doesn't swap its array
+        self._generation = 0
+        self._rebuild: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def refresh(self) -> None:
+        """Rebuild the array from the company names."""
+        # Cleared first, so a change committed during the rebuild isn't lost
+        self._stale = False
+        generation = self._generation
+        with self.store.pool.connection() as connection:
+            names = connection.execute(
+                f"SELECT DISTINCT name_for_comparison FROM {self.store.data_source}"
+            ).fetchall()
+        entries = sorted(
+            (key, name) for (name,) in names if name for key in _rotations(name)
+        )
+        if generation != self._generation:
+            return
+        keys = [key for key, _ in entries]
+        self._entries = (keys, [name for _, name in entries])
+        self._memory_bytes = sum(map(sys.getsizeof, keys)) + 16 * len(entries)
+        self._built = True
+
+    def memory_bytes(self) -> int:
+        """Approximate memory of the array: the keys and a pointer per name,
+        measured when it's built."""
+        return self._memory_bytes
+
+    def invalidate(self, change_set: ChangeSet = None) -> None:
+        """Rebuild the array on the next search, as a `CompanyStore` listener."""
+        self._stale = True
+
+    def clear(self) -> None:
+        """Release the array, rebuilt on the next search."""
+        self._stale = True
+        self._built = False
+        self._generation += 1
+        self._entries = ([], [])
+        self._memory_bytes = 0
+
+    def wait(self, timeout: float = None) -> bool:
+        """Wait for the background rebuild, if one is running.
+
+        Returns:
+            bool: whether no rebuild is running anymore.
+        """
+        rebuild = self._rebuild
+        if rebuild is None:
+            return True
+        rebuild.join(timeout)
+        return not rebuild.is_alive()
+
+    def _refresh_if_stale(self) -> None:
+        if not self._stale:
+            return
+        with self._lock:
+            if not self._stale:
+                return
+            if not self._built:
+                self.refresh()
+            elif self._rebuild is None or not self._rebuild.is_alive():
+                self._rebuild = threading.Thread(
+                    target=self._refresh_in_background,
+                    name="name-suggester-rebuild",
+                    daemon=True,
+                )
+                self._rebuild.start()
+
+    def _refresh_in_background(self) -> None:
+        try:
+            self.refresh()
+        except Exception:
+            # Retried on the next search, the previous array is still served
+            self._stale = True
+            logger.exception("Rebuilding the name suggestions failed")
+
+    def suggest(self, text: str, limit: int = 10) -> list[str]:
+        """Distinct normalized company names with a token starting like `text`.
+
+        Args:
+            text (str): What the user typed, normalized before the search.
+            limit (int, optional): Maximum number of suggestions.
+
+        Returns:
+            list[str]: suggestions, in alphabetical order of the matched
+                rotation.
+        """
+        prefix = normalize_name(text)
+        if not prefix:
+            return []
+        self._refresh_if_stale()
+
+        keys, names = self._entries
+        suggestions = []
+        position = bisect_left(keys, prefix)
+        while (
+            position < len(keys)
+            and len(suggestions) < limit
+            and keys[position].startswith(prefix)
+        ):
+            if names[position] not in suggestions:
+                suggestions.append(names[position])
+            position += 1
+        return suggestions
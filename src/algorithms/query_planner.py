@@ -0,0 +1,180 @@
+import logging
+import math
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .connection_pool import ConnectionPool, get_default_pool
+
+logger = logging.getLogger(__name__)
+
+# Bytes read to estimate the number of rows of a CSV file
+_CSV_SAMPLE_BYTES = 1024**2
+
+
+def available_memory_bytes() -> int:
+    """Memory available to new allocations, from /proc/meminfo on Linux,
+    free physical memory elsewhere."""
+    meminfo = Path("/proc/meminfo")
+    if meminfo.exists():
+        for line in meminfo.read_text().splitlines():
+            if line.startswith("MemAvailable:"):
+                return int(line.split()[1]) * 1024
+    return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+
+
+@dataclass(frozen=True)
+class PlanEstimates:
+    """Inputs of a plan.
+
+    Attributes:
+        upload_rows (int): Estimated number of uploaded rows.
+        company_rows (int): Number of company rows.
+        threshold (float): Jaro-Winkler threshold of the comparison.
+        available_memory_bytes (int): Memory available on the machine.
+        memory_bytes (int): Estimated memory needed by a single comparison.
+    """
+
+    upload_rows: int
+    company_rows: int
+    threshold: float
+    available_memory_bytes: int
+    memory_bytes: int
+
+    @property
+    def pairs(self) -> int:
+        """Pairs scored by an exhaustive comparison."""
+        return self.upload_rows * self.company_rows
+
+
+@dataclass(frozen=True)
+class QueryPlan:
+    """Execution strategy chosen for a comparison.
+
+    Attributes:
+        engine (str): `FileProcessorFactory` engine running the comparison.
+        reason (str): Why the engine was chosen.
+        estimates (PlanEstimates): Estimates the choice is based on.
+        options (dict): Options of the engine's processor.
+    """
+
+    engine: str
+    reason: str
+    estimates: PlanEstimates
+    options: dict = field(default_factory=dict)
+
+    def describe(self) -> str:
+        estimates = self.estimates
+        options = "".join(f", {name}={value}" for name, value in self.options.items())
+        return (
+            f"engine={self.engine}{options} ({self.reason}): "
+            f"~{estimates.upload_rows} uploaded rows x {estimates.company_rows} "
+            f"company rows = {estimates.pairs:.2e} pairs, threshold "
+            f"{estimates.threshold}, ~{estimates.memory_bytes / 1024**2:.0f} MB "
+            f"needed, {estimates.available_memory_bytes / 1024**2:.0f} MB available"
+        )
+
+
+class QueryPlanner:
+    """
+    Picks the execution strategy of a file comparison from estimates of its
+    size, instead of always running the exhaustive comparison:
+
+    - "exact" when the exhaustive comparison scores at most
+      `max_exhaustive_pairs` pairs, or when the threshold is below
+      `min_approximate_threshold`: candidates would then miss many matches.
+      "streaming", the exhaustive comparison in chunks, instead when a single
+      comparison would need more than `memory_share` of the available memory.
+    - "blocked" up to `max_blocked_pairs` pairs.
+    - "minhash" above, its candidate search doesn't grow with the pairs.
+
+    The number of pairs decides first: tight memory alone never turns a
+    comparison the exhaustive engines can afford into an approximate one, nor
+    a huge comparison into a streaming one that would take hours.
+
+    The memory needed is estimated from the rows held by the query: the
+    uploaded rows with `matches_per_name` matches each, and the company rows,
+    at `bytes_per_row` each.
+    """
+
+    def __init__(
+        self,
+        pool: ConnectionPool = None,
+        max_exhaustive_pairs: int = 10**8,
+        max_blocked_pairs: int = 10**10,
+        min_approximate_threshold: float = 0.85,
+        memory_share: float = 0.5,
+        matches_per_name: int = 20,
+        bytes_per_row: int = 200,
+    ):
+        self.pool = pool or get_default_pool()
+        self.max_exhaustive_pairs = max_exhaustive_pairs
+        self.max_blocked_pairs = max_blocked_pairs
+        self.min_approximate_threshold = min_approximate_threshold
+        self.memory_share = memory_share
+        self.matches_per_name = matches_per_name
+        self.bytes_per_row = bytes_per_row
+
+    def estimate(
+        self, data_for_comparison: str, threshold: float, data_source: str
+    ) -> PlanEstimates:
+        upload_rows = self._estimate_upload_rows(data_for_comparison)
+        with self.pool.connection() as connection:
+            company_rows = connection.execute(
+                f"SELECT count(*) FROM {data_source}"
+            ).fetchone()[0]
+        memory_bytes = (
+            upload_rows * (1 + self.matches_per_name) + company_rows
+        ) * self.bytes_per_row
+        return PlanEstimates(
+            upload_rows=upload_rows,
+            company_rows=company_rows,
+            threshold=threshold,
+            available_memory_bytes=available_memory_bytes(),
+            memory_bytes=memory_bytes,
+        )
+
+    def plan(
+        self, data_for_comparison: str, threshold: float, data_source: str
+    ) -> QueryPlan:
+        """Choose the engine comparing `data_for_comparison` with
+        `data_source`, and log the plan."""
+        plan = self.choose(self.estimate(data_for_comparison, threshold, data_source))
+        logger.info("Query plan for %s: %s", data_for_comparison, plan.describe())
+        return plan
+
+    def choose(self, estimates: PlanEstimates) -> QueryPlan:
+        if estimates.pairs <= self.max_exhaustive_pairs:
+            return self._exhaustive("small comparison", estimates)
+        if estimates.threshold < self.min_approximate_threshold:
+            return self._exhaustive("threshold too low for candidate search", estimates)
+        if estimates.pairs <= self.max_blocked_pairs:
+            return QueryPlan("blocked", "large comparison", estimates)
+        return QueryPlan("minhash", "very large comparison", estimates)
+
+    def _exhaustive(self, reason: str, estimates: PlanEstimates) -> QueryPlan:
+        """Exhaustive comparison, in chunks when a single query doesn't fit in
+        the memory budget."""
+        memory_budget = self.memory_share * estimates.available_memory_bytes
+        if estimates.memory_bytes > memory_budget:
+            return QueryPlan(
+                "streaming",
+                f"{reason}, not enough memory for a single query",
+                estimates,
+                {"chunks": math.ceil(estimates.memory_bytes / memory_budget)},
+            )
+        return QueryPlan("exact", reason, estimates)
+
+    def _estimate_upload_rows(self, data_for_comparison: str) -> int:
+        """Exact for parquet files (from the metadata), extrapolated from the
+        first lines for CSV files."""
+        path = Path(data_for_comparison)
+        if path.suffix.lower() != ".csv":
+            with self.pool.connection() as connection:
+                return connection.execute(
+                    f"SELECT count(*) FROM read_parquet('{path}')"
+                ).fetchone()[0]
+        with path.open("rb") as file:
+            sample = file.read(_CSV_SAMPLE_BYTES)
+        lines = max(sample.count(b"\n"), 1)
+        return max(round(path.stat().st_size * lines / max(len(sample), 1)) - 1, 0)
@@ -1,9 +1,27 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-import duckdb
 import pandas as pd
 from jinja2 import Environment, FileSystemLoader
 
+from .company_store import HIDDEN_COLUMNS
+from .connection_pool import ConnectionPool, get_default_pool
+from .field_rules import FieldRule, field_rule_params
+
+if TYPE_CHECKING:
+    from .name_index import NameIndex
+
+# DuckDB COPY options of the export file formats
+COPY_OPTIONS = {
+    "parquet": "FORMAT parquet, COMPRESSION zstd",
+    "csv": "FORMAT csv, HEADER, COMPRESSION gzip",
+}
+# Rows returned to the pages, complete results are exported to files
+RESULT_LIMIT = 50000
+
 
 class QueryRunner:
     """
@@ -13,23 +31,30 @@ class QueryRunner:
     from a specified directory, rendering them with parameters, and
     executing the resulting SQL using DuckDB.
 
+    Queries run on a connection checked out from a `ConnectionPool`, so
+    runners used by different sessions can execute concurrently.
+
     Attributes:
         jinja_env (jinja2.Environment): Environment for loading SQL templates.
         template_dir (Path): Directory containing SQL template files.
+        pool (ConnectionPool): Pool providing the DuckDB connections.
     """
 
-    def __init__(self, template_dir: Path | str = None):
+    def __init__(self, template_dir: Path | str = None, pool: ConnectionPool = None):
         """
         Initialize QueryRunner with a directory for SQL templates.
 
         Args:
             template_dir (Path | str, optional): Path to SQL template directory.
                 Defaults to './sql' relative to this file.
+            pool (ConnectionPool, optional): Connection pool to run the
+                queries on. Defaults to the process-wide pool.
         """
         self.template_dir = Path(
             template_dir or Path(__file__).resolve().parent / "sql"
         )
         self.jinja_env = Environment(loader=FileSystemLoader(self.template_dir))
+        self.pool = pool or get_default_pool()
 
     def render_query(self, template_name: str, **params) -> str:
         """Creates the query from the template and the provided variables.
@@ -59,29 +84,106 @@ class QueryRunner:
                     params {params}"
             ) from e
 
-    def execute(self, template_name: str, **params) -> pd.DataFrame:
+    def execute(
+        self, template_name: str, relations: dict = None, **params
+    ) -> pd.DataFrame:
         """Executes the SQL query
 
         Args:
             template_name (str): name of the SQL template file to create the
         query.
+            relations (dict, optional): DataFrames or Arrow tables to register
+        as views, by name, on the connection running the query.
 
         Returns:
             pd.DataFrame: SQL query's result
         """
         sql = self.render_query(template_name, **params)
-        return duckdb.execute(sql).df()
+        relations = relations or {}
+        with self.pool.connection() as connection:
+            for name, relation in relations.items():
+                connection.register(name, relation)
+            try:
+                return connection.execute(sql).df()
+            finally:
+                for name in relations:
+                    connection.unregister(name)
+
+    def copy_to(
+        self,
+        template_name: str,
+        output_path: Path | str,
+        file_format: str = "parquet",
+        relations: dict = None,
+        **params,
+    ) -> int:
+        """Writes the SQL query's result to a file with DuckDB `COPY`, without
+        fetching the rows in Python.
+
+        Args:
+            template_name (str): name of the SQL template file to create the
+        query.
+            output_path (Path | str): File to write.
+            file_format (str, optional): "parquet" (zstd) or "csv" (gzip).
+        Defaults to "parquet".
+            relations (dict, optional): DataFrames or Arrow tables to register
+        as views, by name, on the connection running the query.
+
+        Raises:
+            ValueError: the file format isn't supported
+
+        Returns:
+            int: number of rows written.
+        """
+        if file_format not in COPY_OPTIONS:
+            raise ValueError(
+                f"The export format needs to be one of {list(COPY_OPTIONS)}, "
+                f"found {file_format}"
+            )
+        sql = self.render_query(template_name, **params)
+        relations = relations or {}
+        with self.pool.connection() as connection:
+            for name, relation in relations.items():
+                connection.register(name, relation)
+            try:
+                return connection.execute(
+                    f"COPY ({sql}) TO '{output_path}' ({COPY_OPTIONS[file_format]})"
+                ).fetchone()[0]
+            finally:
+                for name in relations:
+                    connection.unregister(name)
 
 
 class RetrieveSimilarNames(QueryRunner):
     """Executes a query to find a single person in the population file using
-    jaro-winkler similarity and a threshold value."""
+    jaro-winkler similarity and a threshold value.
+
+    With a `NameIndex`, only the candidate rows returned by the index are
+    scored, instead of every row of the company data. The index candidates
+    are approximate and can miss matches, so the pages scan every row.
+
+    With `prune_with_bounds`, rows whose Jaro-Winkler upper bound (from the
+    name lengths and character masks) can't reach the threshold are filtered
+    out before scoring. The bound is safe: pruning never changes the result.
+    The company data needs the `name_length` and `name_char_mask` columns
+    computed by `CompanyStore`.
+    """
+
+    def __init__(
+        self,
+        template_dir: Path | str = None,
+        pool: ConnectionPool = None,
+        candidate_index: NameIndex = None,
+    ):
+        super().__init__(template_dir, pool)
+        self.candidate_index = candidate_index
 
     def run(
         self,
         person_name: str,
         threshold: int,
         data_source: str = "read_parquet('./data/fake_data.parquet')",
+        prune_with_bounds: bool = False,
     ) -> pd.DataFrame:
         """Execute the comparison query to find similar names
 
@@ -90,24 +192,101 @@ class RetrieveSimilarNames(QueryRunner):
             threshold (int): jaro-winkler threshold value
             data_source (str, optional): Company data to query. Defaults to
         "read_parquet('./data/fake_data.parquet')".
+            prune_with_bounds (bool, optional): Skip the rows that can't reach
+        the threshold, see the class docstring. Defaults to False.
 
         Returns:
             pd.DataFrame: Result of the SQL query, with all rows of the result.
         """
-        return self.execute(
+        relations, params = self._query(
+            person_name, threshold, data_source, prune_with_bounds
+        )
+        return self.execute("find_person.sql.j2", relations=relations, **params)
+
+    def export(
+        self,
+        output_path: Path | str,
+        person_name: str,
+        threshold: float,
+        data_source: str = "read_parquet('./data/fake_data.parquet')",
+        prune_with_bounds: bool = False,
+        file_format: str = "parquet",
+    ) -> int:
+        """Write all the similar names to a file, see `QueryRunner.copy_to`.
+
+        Returns:
+            int: number of rows written.
+        """
+        relations, params = self._query(
+            person_name, threshold, data_source, prune_with_bounds
+        )
+        return self.copy_to(
             "find_person.sql.j2",
-            person_name=person_name,
-            threshold=threshold,
-            data_source=data_source,
+            output_path,
+            file_format,
+            relations=relations,
+            **params,
         )
 
+    def _query(
+        self,
+        person_name: str,
+        threshold: float,
+        data_source: str,
+        prune_with_bounds: bool,
+    ) -> tuple[dict, dict]:
+        relations = {}
+        if self.candidate_index is not None:
+            candidate_ids = self.candidate_index.candidates(person_name)
+            relations["candidate_ids"] = pd.DataFrame({"id": candidate_ids})
+        params = {
+            "person_name": person_name,
+            "threshold": threshold,
+            "data_source": data_source,
+            "candidate_relation": "candidate_ids" if relations else None,
+            "prune_with_bounds": prune_with_bounds,
+            "hidden_columns": HIDDEN_COLUMNS,
+        }
+        return relations, params
+
+
+@dataclass(frozen=True)
+class InputNameStats:
+    """Number of uploaded rows and of distinct normalized names among them."""
+
+    input_rows: int
+    distinct_names: int
+
+    @property
+    def duplicates_eliminated(self) -> int:
+        return self.input_rows - self.distinct_names
+
 
 class RetrieveSimilarNamesForFile(QueryRunner):
     """Executes a query to compare names between two data sources using
-    jaro-winkler similarity and a threshold value."""
+    jaro-winkler similarity and a threshold value.
 
-    def __init__(self, data_source_type, template_dir: Path | str = None):
-        super().__init__(template_dir)
+    Uploaded rows are collapsed to distinct normalized names before the
+    comparison: each distinct name is scored once against the company data,
+    then the scores are joined back to every uploaded row holding that name.
+
+    With `prune_with_bounds`, pairs whose Jaro-Winkler upper bound can't reach
+    the threshold are skipped, like in `RetrieveSimilarNames`.
+
+    With `field_rules`, the comparison also matches other uploaded columns
+    (email, phone, city...) with company fields, see `FieldRule`. Filter
+    fields restrict the names compared to the company rows with the same
+    values, boost fields rank the matches by a `weighted_similarity_score`.
+    The threshold applies to the name similarity in both cases.
+    """
+
+    def __init__(
+        self,
+        data_source_type,
+        template_dir: Path | str = None,
+        pool: ConnectionPool = None,
+    ):
+        super().__init__(template_dir, pool)
         self.data_source_type = data_source_type
 
     def run(
@@ -117,6 +296,8 @@ class RetrieveSimilarNamesForFile(QueryRunner):
         comparison_family_name: str,
         threshold: float,
         data_source: str = "read_parquet('./data/fake_data.parquet')",
+        prune_with_bounds: bool = False,
+        field_rules: list[FieldRule] = None,
     ) -> pd.DataFrame:
         """Execute the comparison query between two data sources
 
@@ -127,32 +308,191 @@ class RetrieveSimilarNamesForFile(QueryRunner):
             threshold (float): jaro-winkler threshold value
             data_source (str, optional): Primary data to query. Defaults to
                 "read_parquet('./data/fake_data.parquet')".
+            prune_with_bounds (bool, optional): Skip the pairs that can't reach
+                the threshold. Needs `name_length` and `name_char_mask` columns
+                in the primary data. Defaults to False.
+            field_rules (list[FieldRule], optional): Other columns compared
+                with company fields, see the class docstring. Defaults to None.
 
         Returns:
             pd.DataFrame: Result of the SQL query with similarity scores.
         """
-        sql_statement_for_comparison = (
-            f"{self.data_source_type}('{data_for_comparison}')"
+        return self._fetch(
+            self._query_params(
+                data_for_comparison,
+                comparison_first_name,
+                comparison_family_name,
+                threshold,
+                data_source,
+                prune_with_bounds,
+                field_rules,
+            )
         )
-        return self.execute(
+
+    def export(
+        self,
+        output_path: Path | str,
+        data_for_comparison: str,
+        comparison_first_name: str,
+        comparison_family_name: str,
+        threshold: float,
+        data_source: str = "read_parquet('./data/fake_data.parquet')",
+        prune_with_bounds: bool = False,
+        file_format: str = "parquet",
+        field_rules: list[FieldRule] = None,
+    ) -> int:
+        """Write all the similar names to a file, without the row limit of
+        `run`, see `QueryRunner.copy_to`.
+
+        Returns:
+            int: number of rows written.
+        """
+        return self.copy_to(
             "compare_names.sql.j2",
-            threshold=threshold,
-            data_source=data_source,
-            data_for_comparison=sql_statement_for_comparison,
+            output_path,
+            file_format,
+            **self._query_params(
+                data_for_comparison,
+                comparison_first_name,
+                comparison_family_name,
+                threshold,
+                data_source,
+                prune_with_bounds,
+                field_rules,
+            ),
+        )
+
+    def _fetch(self, params: dict) -> pd.DataFrame:
+        return self.execute("compare_names.sql.j2", limit=RESULT_LIMIT, **params)
+
+    def _query_params(
+        self,
+        data_for_comparison: str,
+        comparison_first_name: str,
+        comparison_family_name: str,
+        threshold: float,
+        data_source: str,
+        prune_with_bounds: bool,
+        field_rules: list[FieldRule] = None,
+    ) -> dict:
+        return {
+            "threshold": threshold,
+            "data_source": data_source,
+            "data_for_comparison": self._comparison_relation(data_for_comparison),
+            "comparison_first_name": comparison_first_name,
+            "comparison_family_name": comparison_family_name,
+            "prune_with_bounds": prune_with_bounds,
+            **field_rule_params(field_rules or []),
+        }
+
+    def describe_input(
+        self,
+        data_for_comparison: str,
+        comparison_first_name: str,
+        comparison_family_name: str,
+    ) -> InputNameStats:
+        """Count the uploaded rows and the distinct names that get scored.
+
+        Args:
+            data_for_comparison (str): Path to comparison data file
+            comparison_first_name (str): Column name for first name in comparison data
+            comparison_family_name (str): Column name for family name in comparison data
+
+        Returns:
+            InputNameStats: number of rows and of distinct normalized names.
+        """
+        stats = self.execute(
+            "input_name_stats.sql.j2",
+            data_for_comparison=self._comparison_relation(data_for_comparison),
             comparison_first_name=comparison_first_name,
             comparison_family_name=comparison_family_name,
         )
+        return InputNameStats(
+            input_rows=int(stats["input_rows"].iloc[0]),
+            distinct_names=int(stats["distinct_names"].iloc[0]),
+        )
+
+    def _comparison_relation(self, data_for_comparison: str) -> str:
+        return f"{self.data_source_type}('{data_for_comparison}')"
 
 
 class RetrieveSimilarNamesForCSV(RetrieveSimilarNamesForFile):
     """Specialized class for comparing with CSV files"""
 
-    def __init__(self, template_dir: Path | str = None):
-        super().__init__("read_csv", template_dir)
+    def __init__(self, template_dir: Path | str = None, pool: ConnectionPool = None):
+        super().__init__("read_csv", template_dir, pool)
 
 
 class RetrieveSimilarNamesForParquet(RetrieveSimilarNamesForFile):
     """Specialized class for comparing with Parquet files"""
 
-    def __init__(self, template_dir: Path | str = None):
-        super().__init__("read_parquet", template_dir)
+    def __init__(self, template_dir: Path | str = None, pool: ConnectionPool = None):
+        super().__init__("read_parquet", template_dir, pool)
+
+
+class StreamingSimilarNamesForFile(RetrieveSimilarNamesForFile):
+    """Exhaustive comparison between two data sources, in chunks.
+
+    The distinct uploaded names are split into `chunks` chunks by hash, and
+    each chunk is compared in its own query, so a query needs about a
+    `chunks`-th of the memory of a single comparison. Only the best
+    `RESULT_LIMIT` rows over the chunks are kept: once that many rows are
+    found, the next chunks only return rows above the lowest of them, which
+    also tightens the pruning bounds without boost fields. Exports run as a
+    single `COPY`, which already streams its rows to the file.
+    """
+
+    def __init__(
+        self,
+        data_source_type,
+        template_dir: Path | str = None,
+        pool: ConnectionPool = None,
+        chunks: int = 4,
+    ):
+        super().__init__(data_source_type, template_dir, pool)
+        self.chunks = chunks
+
+    def _fetch(self, params: dict) -> pd.DataFrame:
+        best, score = None, None
+        for chunk in range(self.chunks):
+            chunk_params = {**params, "chunks": self.chunks, "chunk": chunk}
+            if best is not None and len(best) == RESULT_LIMIT:
+                floor = float(best[score].iloc[-1])
+                if params.get("field_boosts"):
+                    # The threshold applies to the name score, not the weighted one
+                    chunk_params["score_floor"] = floor
+                else:
+                    chunk_params["threshold"] = max(params["threshold"], floor)
+            results = super()._fetch(chunk_params)
+            score = (
+                "weighted_similarity_score"
+                if "weighted_similarity_score" in results.columns
+                else "jaro_winkler_similarity_score"
+            )
+            best = (
+                results
+                if best is None
+                else pd.concat([best, results], ignore_index=True)
+                .sort_values(score, ascending=False, kind="stable")
+                .head(RESULT_LIMIT)
+                .reset_index(drop=True)
+            )
+        return best
+
+
+class StreamingSimilarNamesForCSV(StreamingSimilarNamesForFile):
+    """Comparison in chunks with CSV files"""
+
+    def __init__(
+        self, template_dir: Path | str = None, pool: ConnectionPool = None, **options
+    ):
+        super().__init__("read_csv", template_dir, pool, **options)
+
+
+class StreamingSimilarNamesForParquet(StreamingSimilarNamesForFile):
+    """Comparison in chunks with Parquet files"""
+
+    def __init__(
+        self, template_dir: Path | str = None, pool: ConnectionPool = None, **options
+    ):
+        super().__init__("read_parquet", template_dir, pool, **options)
@@ -0,0 +1,80 @@
+CREATE MACRO IF NOT EXISTS normalize_name(text) AS
+TRIM(
+    REGEXP_REPLACE(
+        REGEXP_REPLACE(
+            REGEXP_REPLACE(
+                LOWER(strip_accents(text)
+                ),
+                '[^a-z\s]', '-', 'g'
+            ),
+            '[\s\-]+', '-', 'g'
+        ),
+        '^-+|-+$', '', 'g'
+    ),
+    '-'
+);
+
+-- One bit per character of a normalized name: a-z, dash, anything else
+CREATE MACRO IF NOT EXISTS name_char_mask(name) AS
+COALESCE(
+    list_aggregate(
+        list_transform(
+            string_split(name, ''),
+            c -> 1::BIGINT << (
+                CASE
+                    WHEN c BETWEEN 'a' AND 'z' THEN ascii(c) - 97
+                    WHEN c = '-' THEN 26
+                    ELSE 27
+                END
+            )
+        ),
+        'bit_or'
+    ),
+    0
+);
+
+-- Most characters two names can match: each character of a name missing
+-- from the other name can't be matched
+CREATE MACRO IF NOT EXISTS jaro_max_matches(length_a, mask_a, length_b, mask_b) AS
+greatest(
+    least(
+        length_a - bit_count(mask_a & ~mask_b),
+        length_b - bit_count(mask_b & ~mask_a)
+    ),
+    0
+);
+
+-- Upper bound of jaro_winkler_similarity from the lengths and character masks
+-- of two names: jaro <= (m / length_a + m / length_b + 1) / 3 with m the
+-- matches, and the Winkler prefix boost adds at most 4 * 0.1 * (1 - jaro)
+CREATE MACRO IF NOT EXISTS jaro_winkler_upper_bound(
+    length_a, mask_a, length_b, mask_b
+) AS
+CASE
+    WHEN jaro_max_matches(length_a, mask_a, length_b, mask_b) = 0 THEN 0.0
+    ELSE 0.4 + 0.2 * (
+        jaro_max_matches(length_a, mask_a, length_b, mask_b) / length_a
+        + jaro_max_matches(length_a, mask_a, length_b, mask_b) / length_b
+        + 1
+    )
+END;
+
+-- Division-free form of jaro_winkler_upper_bound(...) > threshold, bounding
+-- the matches by each side separately so the cheapest check filters first.
+-- A small tolerance keeps the filter safe from rounding errors.
+CREATE MACRO IF NOT EXISTS jaro_winkler_can_exceed(
+    length_a, mask_a, length_b, mask_b, threshold
+) AS
+(length_a - bit_count(mask_a & ~mask_b)) * (length_a + length_b)
+    >= (5 * (threshold - 0.6) - 1e-9)::DOUBLE * length_a * length_b
+AND (length_b - bit_count(mask_b & ~mask_a)) * (length_a + length_b)
+    >= (5 * (threshold - 0.6) - 1e-9)::DOUBLE * length_a * length_b;
+
+-- Normalized values of the fields compared by equality in multi-field matches
+CREATE MACRO IF NOT EXISTS normalize_email(email) AS
+NULLIF(LOWER(TRIM(email)), '');
+
+-- The last 9 digits, the national number of most countries, so "+33 6 88 30
+-- 02 11" and "06.88.30.02.11" are equal
+CREATE MACRO IF NOT EXISTS normalize_phone(phone) AS
+NULLIF(RIGHT(REGEXP_REPLACE(phone, '[^0-9]', '', 'g'), 9), '');
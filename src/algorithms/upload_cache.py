@@ -0,0 +1,134 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from .connection_pool import ConnectionPool, get_default_pool
+
+
+class UploadCache:
+    """
+    Parquet copies of the uploaded CSV files, so the comparisons only read the
+    name columns of compact columnar data, instead of parsing the whole CSV
+    text on every run.
+
+    Copies are keyed by the SHA-256 of the file content: uploading the same
+    file again, under any name, reuses its copy. The hash of an uploaded file
+    is kept while its modification time and size don't change, so the searches
+    and exports of the same upload don't read it again. Each use refreshes the
+    copy's modification time. Copies unused for `max_age_seconds` are evicted, then
+    the least recently used ones until the cache holds at most
+    `max_total_bytes`.
+
+    Attributes:
+        directory (Path): Directory holding the parquet copies.
+        max_age_seconds (float): Age after which an unused copy is evicted.
+        max_total_bytes (int): Size limit of the cache directory.
+        pool (ConnectionPool): Pool running the conversions.
+        max_hashes (int): Number of uploaded files whose hash is kept.
+    """
+
+    def __init__(
+        self,
+        directory: Path | str = "./data/upload_cache",
+        max_age_seconds: float = 24 * 3600,
+        max_total_bytes: int = 1024**3,
+        pool: ConnectionPool = None,
+        max_hashes: int = 1024,
+    ):
+        self.directory = Path(directory)
+        self.max_age_seconds = max_age_seconds
+        self.max_total_bytes = max_total_bytes
+        self.pool = pool or get_default_pool()
+        self.max_hashes = max_hashes
+        self._lock = threading.Lock()
+        # Hash of each uploaded file, with the modification time and size of
+        # the file when it was hashed
+        self._hashes: OrderedDict[str, tuple[int, int, str]] = OrderedDict()
+
+    def columnar_copy(self, file_path: str) -> str:
+        """Path of the parquet copy of a CSV file, converting it on first use.
+        Other files are returned unchanged."""
+        if Path(file_path).suffix.lower() != ".csv":
+            return file_path
+
+        target = self.directory / f"{self._content_hash(file_path)}.parquet"
+        with self._lock:
+            if target.exists():
+                os.utime(target)
+            else:
+                self._convert(file_path, target)
+            self.evict(keep=target)
+        return str(target)
+
+    def evict(self, keep: Path = None) -> list[Path]:
+        """Remove the expired copies, then the least recently used ones over
+        the size limit. `keep` is never removed.
+
+        Returns:
+            list[Path]: removed copies.
+        """
+        copies = sorted(
+            (path.stat().st_mtime, path.stat().st_size, path)
+            for path in self.directory.glob("*.parquet")
+        )
+        expired_before = time.time() - self.max_age_seconds
+        total_bytes = sum(size for _, size, _ in copies)
+        removed = []
+        for modified, size, path in copies:
+            if path == keep:
+                continue
+            if modified >= expired_before and total_bytes <= self.max_total_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total_bytes -= size
+            removed.append(path)
+        return removed
+
+    def _content_hash(self, file_path: str) -> str:
+        key = str(Path(file_path).resolve())
+        stat = Path(key).stat()
+        with self._lock:
+            if key in self._hashes:
+                modified, size, digest = self._hashes[key]
+                if (modified, size) == (stat.st_mtime_ns, stat.st_size):
+                    self._hashes.move_to_end(key)
+                    return digest
+        digest = content_hash(key)
+        with self._lock:
+            self._hashes[key] = (stat.st_mtime_ns, stat.st_size, digest)
+            self._hashes.move_to_end(key)
+            while len(self._hashes) > self.max_hashes:
+                self._hashes.popitem(last=False)
+        return digest
+
+    def _convert(self, file_path: str, target: Path) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        partial = target.with_suffix(".parquet.partial")
+        with self.pool.connection() as connection:
+            connection.execute(
+                f"""COPY (SELECT * FROM read_csv('{file_path}'))
+                TO '{partial}' (FORMAT parquet, COMPRESSION zstd)"""
+            )
+        partial.replace(target)
+
+
+def content_hash(file_path: str) -> str:
+    """SHA-256 of the file content."""
+    with Path(file_path).open("rb") as file:
+        return hashlib.file_digest(file, "sha256").hexdigest()
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_upload_cache() -> UploadCache:
+    """Returns the application's upload cache, creating it on first use."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = UploadCache()
+        return _default_cache
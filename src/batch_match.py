@@ -0,0 +1,145 @@
+"""Batch matching for Taipy Person Finder.
+
+Compares a whole file, or a single name, with the company data without the
+GUI, and writes every match to a parquet file with DuckDB, for nightly jobs.
+The script only imports the modules it uses (no Taipy), so short jobs start
+fast.
+
+Run it from the `src` directory, like the application:
+
+    uv run --directory src batch_match.py --input uploads.csv \\
+        --first-name-column first_name --family-name-column family_name \\
+        --output matches.parquet --threshold 0.9 \\
+        --field phone=phone_number --field-mode filter
+
+    uv run --directory src batch_match.py --name "John Doe" --output john.parquet
+"""
+
+import argparse
+import logging
+import sys
+import time
+
+ENGINES = ["auto", "exact", "streaming", "blocked", "minhash"]
+
+logger = logging.getLogger("batch_match")
+
+
+def parse_args(argv: list[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--input", help="CSV or parquet file with the names")
+    source.add_argument("--name", help="Single person name to look for")
+    parser.add_argument("--output", required=True, help="Parquet file to write")
+    parser.add_argument("--first-name-column", default="first_name")
+    parser.add_argument("--family-name-column", default="family_name")
+    parser.add_argument("--threshold", type=float, default=0.9)
+    parser.add_argument(
+        "--engine",
+        choices=ENGINES,
+        help="Matching engine of --input file comparisons. exact (the default)"
+        " writes every match, auto lets the planner choose and can pick an"
+        " approximate engine that misses some. A --name search always scores"
+        " every company row exactly",
+    )
+    parser.add_argument(
+        "--field",
+        action="append",
+        default=[],
+        metavar="COMPANY_FIELD=COLUMN",
+        help="Also match a column of the input file with a company field"
+        " (email, phone, city, country...), can be repeated",
+    )
+    parser.add_argument(
+        "--field-mode",
+        choices=["filter", "boost"],
+        default="boost",
+        help="filter only compares names with equal fields, boost ranks the"
+        " matches by their equal fields (not city nor country, always filters)",
+    )
+    parser.add_argument(
+        "--database",
+        default="./data/batch_company.duckdb",
+        help="DuckDB database of the company data, apart from the app's one so"
+        " both can run at the same time",
+    )
+    parser.add_argument(
+        "--company-file",
+        default="./data/fake_data.parquet",
+        help="Raw company data, ingested when the database is empty",
+    )
+    args = parser.parse_args(argv)
+    if args.name is not None and (args.engine or args.field):
+        parser.error("--engine and --field only apply to --input file comparisons")
+    args.engine = args.engine or "exact"
+    from algorithms import FILTER_ONLY_FIELDS
+
+    for field in args.field:
+        if "=" not in field:
+            parser.error(f"--field needs COMPANY_FIELD=COLUMN, found {field}")
+        company_field = field.split("=", 1)[0]
+        if args.field_mode == "boost" and company_field in FILTER_ONLY_FIELDS:
+            parser.error(f"--field {company_field} needs --field-mode filter")
+    return args
+
+
+def match_file(args: argparse.Namespace, data_source: str) -> int:
+    from algorithms import FieldRule, QueryPlanner, get_processor
+
+    field_rules = [
+        FieldRule(*field.split("=", 1), mode=args.field_mode) for field in args.field
+    ]
+
+    engine, options = args.engine, {}
+    if engine == "auto":
+        plan = QueryPlanner().plan(args.input, args.threshold, data_source)
+        engine, options = plan.engine, plan.options
+    return get_processor(args.input, engine, **options).export(
+        args.output,
+        data_for_comparison=args.input,
+        comparison_first_name=args.first_name_column,
+        comparison_family_name=args.family_name_column,
+        threshold=args.threshold,
+        data_source=data_source,
+        prune_with_bounds=True,
+        field_rules=field_rules,
+    )
+
+
+def match_name(args: argparse.Namespace, data_source: str) -> int:
+    from algorithms import RetrieveSimilarNames, normalize_name
+
+    return RetrieveSimilarNames().export(
+        args.output,
+        normalize_name(args.name),
+        args.threshold,
+        data_source=data_source,
+        prune_with_bounds=True,
+    )
+
+
+def main(argv: list[str] = None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(
+        format="%(asctime)s %(name)s %(levelname)s: %(message)s", level=logging.INFO
+    )
+    from algorithms import CompanyStore
+
+    start = time.perf_counter()
+    store = CompanyStore(args.database)
+    store.prepare(args.company_file)
+    if args.input:
+        rows = match_file(args, store.data_source)
+    else:
+        rows = match_name(args, store.data_source)
+    logger.info(
+        "%d matches written to %s in %.1f s",
+        rows,
+        args.output,
+        time.perf_counter() - start,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,26 @@
+from taipy.gui import hold_control, resume_control
+
+from algorithms import get_default_registry
+
+
+def describe_dataset(dataset_name):
+    with get_default_registry().use(dataset_name) as dataset:
+        return dataset.stats().describe()
+
+
+def select_dataset_callback(state):
+    """Results of the previous dataset are cleared, the new dataset is loaded
+    unless it's still in memory."""
+    with state as s:
+        hold_control(s, message=f"Loading {s.dataset_name}")
+        try:
+            s.dataset_report = describe_dataset(s.dataset_name)
+            s.person_name = ""
+            s.name_suggestions = []
+            s.df_similar_person = s.df_similar_person.head(0)
+            s.df_similar_people = s.df_similar_people.head(0)
+            s.comparison_report = ""
+            s.df_duplicates = s.df_duplicates.head(0)
+            s.duplicates_report = ""
+        finally:
+            resume_control(s)
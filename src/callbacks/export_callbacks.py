@@ -0,0 +1,29 @@
+from pathlib import Path
+from urllib.parse import unquote, urlparse
+
+from taipy.gui import download
+
+from algorithms.export_files import EXPORT_DIRECTORY, EXPORT_EXTENSIONS
+
+
+def remove_export(state, id, payload):
+    """Remove the export file once the browser downloaded it.
+
+    Several exports can be downloading at once, so the file is the one of this
+    download: the last part of its URL, the second argument of the payload.
+    """
+    url = payload.get("args", [])[-1]
+    file_name = unquote(urlparse(url).path.rsplit("/", 1)[-1])
+    if file_name:
+        (Path(EXPORT_DIRECTORY) / file_name).unlink(missing_ok=True)
+
+
+def download_export(state, output_path, name, file_format):
+    """Stream an export file from disk to the browser."""
+    with state as s:
+        download(
+            s,
+            content=str(output_path),
+            name=f"{name}{EXPORT_EXTENSIONS[file_format]}",
+            on_action=remove_export,
+        )
@@ -0,0 +1,40 @@
+from taipy.gui import hold_control, resume_control
+
+from algorithms import DEFAULT_DATASET, DeduplicatePeople, get_default_registry
+
+
+def find_duplicates(threshold_duplicates, dataset_name=DEFAULT_DATASET):
+    with get_default_registry().use(dataset_name) as dataset:
+        df_duplicates = dataset.cached(
+            ("duplicates", threshold_duplicates),
+            lambda: DeduplicatePeople().run(threshold_duplicates, dataset.data_source),
+        )
+    df_duplicates["jaro_winkler_similarity_score"] = df_duplicates[
+        "jaro_winkler_similarity_score"
+    ].round(2)
+    return df_duplicates
+
+
+def count_windowed_rows(dataset_name=DEFAULT_DATASET):
+    with get_default_registry().use(dataset_name) as dataset:
+        return DeduplicatePeople().windowed_rows(dataset.data_source)
+
+
+def find_duplicates_callback(state):
+    with state as s:
+        hold_control(s, message="Looking for Duplicates")
+        try:
+            df_duplicates = find_duplicates(s.threshold_duplicates, s.dataset_name)
+            s.df_duplicates = df_duplicates
+            s.duplicates_report = (
+                f"{df_duplicates['cluster_id'].nunique()} clusters of likely "
+                f"duplicates, holding {len(df_duplicates)} people."
+            )
+            windowed_rows = count_windowed_rows(s.dataset_name)
+            if windowed_rows:
+                s.duplicates_report += (
+                    f" {windowed_rows} people in oversized blocks were only"
+                    " compared with their nearest names in those blocks."
+                )
+        finally:
+            resume_control(s)
@@ -1,6 +1,20 @@
 from taipy.gui import hold_control, notify, resume_control
 
-from algorithms import get_columns_dataframe, get_processor
+from algorithms import (
+    DEFAULT_DATASET,
+    FILTER_ONLY_FIELDS,
+    FieldRule,
+    QueryPlanner,
+    get_columns_dataframe,
+    get_default_registry,
+    get_default_upload_cache,
+    get_processor,
+    new_export_path,
+)
+from callbacks.export_callbacks import download_export
+
+# Choice of the field selectors when the company field isn't matched
+NO_FIELD = "(not used)"
 
 
 def _notify_file_failure(state, message):
@@ -21,13 +35,21 @@ def _assign_bound_values(state, dataset_colums):
         s.dataset_colums = dataset_colums
         s.column_first_name = dataset_colums[0]
         s.column_last_name = dataset_colums[1]
+        s.field_colums = [NO_FIELD] + dataset_colums
+        s.column_email = NO_FIELD
+        s.column_phone = NO_FIELD
+        s.column_city = NO_FIELD
+        s.column_country = NO_FIELD
 
 
 def upload_file(state):
     with state as s:
         s.df_similar_people = s.df_similar_people.head(0)
+        s.comparison_report = ""
         try:
             people_for_comparison = get_columns_dataframe(s.file_for_comparison)
+            # Converted at upload, so the first comparison doesn't wait for it
+            get_default_upload_cache().columnar_copy(s.file_for_comparison)
         except Exception:
             _notify_file_failure(s, "The file can't be read.")
             return
@@ -38,18 +60,157 @@ def upload_file(state):
             _assign_bound_values(s, dataset_colums)
 
 
+def get_field_rules(field_columns, field_mode):
+    """Rules of the company fields mapped to an uploaded column.
+
+    Args:
+        field_columns (dict): Uploaded column of each company field, or
+            `NO_FIELD`.
+        field_mode (str): "filter" or "boost", for all the fields but the
+            `FILTER_ONLY_FIELDS`, always filters.
+    """
+    return [
+        FieldRule(
+            company_column,
+            upload_column,
+            "filter" if company_column in FILTER_ONLY_FIELDS else field_mode,
+        )
+        for company_column, upload_column in field_columns.items()
+        if upload_column and upload_column != NO_FIELD
+    ]
+
+
+def _field_columns(state):
+    return {
+        "email": state.column_email,
+        "phone": state.column_phone,
+        "city": state.column_city,
+        "country": state.column_country,
+    }
+
+
+def comparison_data(file_for_comparison):
+    """File the comparisons read: the columnar copy of CSV files.
+
+    Resolved for each query, since the cache can evict the copy of a file
+    uploaded a while ago: it's then converted again.
+    """
+    return get_default_upload_cache().columnar_copy(file_for_comparison)
+
+
+def get_runner(file_for_comparison, threshold, engine, data_source):
+    """Processor of the engine, chosen by the query planner for "auto"."""
+    if engine != "auto":
+        return get_processor(file_for_comparison, engine), None
+    plan = QueryPlanner().plan(file_for_comparison, threshold, data_source)
+    return get_processor(file_for_comparison, plan.engine, **plan.options), plan
+
+
+def find_similar_people(
+    file_for_comparison,
+    first_name,
+    last_name,
+    threshold,
+    engine="exact",
+    field_rules=None,
+    dataset_name=DEFAULT_DATASET,
+):
+    with get_default_registry().use(dataset_name) as dataset:
+        data_source = dataset.data_source
+        runner, plan = get_runner(file_for_comparison, threshold, engine, data_source)
+        df_similar_people = runner.run(
+            data_for_comparison=file_for_comparison,
+            comparison_first_name=first_name,
+            comparison_family_name=last_name,
+            threshold=threshold,
+            data_source=data_source,
+            prune_with_bounds=True,
+            field_rules=field_rules,
+        )
+    for score in ["jaro_winkler_similarity_score", "weighted_similarity_score"]:
+        if score in df_similar_people.columns:
+            df_similar_people[score] = df_similar_people[score].round(2)
+    if plan is not None:
+        df_similar_people.attrs["query_plan"] = plan.describe()
+    return df_similar_people
+
+
+def export_similar_people(
+    file_for_comparison,
+    first_name,
+    last_name,
+    threshold,
+    engine,
+    file_format,
+    field_rules=None,
+    dataset_name=DEFAULT_DATASET,
+):
+    output_path = new_export_path(file_format)
+    with get_default_registry().use(dataset_name) as dataset:
+        data_source = dataset.data_source
+        runner, _ = get_runner(file_for_comparison, threshold, engine, data_source)
+        runner.export(
+            output_path,
+            data_for_comparison=file_for_comparison,
+            comparison_first_name=first_name,
+            comparison_family_name=last_name,
+            threshold=threshold,
+            data_source=data_source,
+            prune_with_bounds=True,
+            file_format=file_format,
+            field_rules=field_rules,
+        )
+    return output_path
+
+
+def describe_uploaded_names(file_for_comparison, first_name, last_name):
+    stats = get_processor(file_for_comparison).describe_input(
+        file_for_comparison, first_name, last_name
+    )
+    return (
+        f"{stats.input_rows} uploaded rows, {stats.distinct_names} distinct names: "
+        f"{stats.duplicates_eliminated} duplicates scored only once."
+    )
+
+
 def look_for_similar_people(state):
     with state as s:
         hold_control(s, message="Lookig for Similar People")
-        runner = get_processor(s.file_for_comparison)
-        df_similar_people = runner.run(
-            data_for_comparison=s.file_for_comparison,
-            comparison_first_name=s.column_first_name,
-            comparison_family_name=s.column_last_name,
-            threshold=s.threshold_people,
-        )
-        df_similar_people["jaro_winkler_similarity_score"] = df_similar_people[
-            "jaro_winkler_similarity_score"
-        ].round(2)
-        s.df_similar_people = df_similar_people
-        resume_control(s)
+        try:
+            data_for_comparison = comparison_data(s.file_for_comparison)
+            df_similar_people = find_similar_people(
+                data_for_comparison,
+                s.column_first_name,
+                s.column_last_name,
+                s.threshold_people,
+                s.engine_people,
+                get_field_rules(_field_columns(s), s.field_mode_people),
+                s.dataset_name,
+            )
+            s.df_similar_people = df_similar_people
+            s.comparison_report = describe_uploaded_names(
+                data_for_comparison, s.column_first_name, s.column_last_name
+            )
+            if "query_plan" in df_similar_people.attrs:
+                s.comparison_report += f" Plan: {df_similar_people.attrs['query_plan']}"
+        finally:
+            resume_control(s)
+
+
+def export_similar_people_callback(state):
+    with state as s:
+        hold_control(s, message="Exporting Similar People")
+        try:
+            output_path = export_similar_people(
+                comparison_data(s.file_for_comparison),
+                s.column_first_name,
+                s.column_last_name,
+                s.threshold_people,
+                s.engine_people,
+                s.export_format,
+                get_field_rules(_field_columns(s), s.field_mode_people),
+                s.dataset_name,
+            )
+        finally:
+            resume_control(s)
+        download_export(s, output_path, "similar_people", s.export_format)
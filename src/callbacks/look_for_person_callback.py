@@ -1,9 +1,26 @@
-from algorithms import RetrieveSimilarNames, normalize_name
+from taipy.gui import hold_control, resume_control
 
+from algorithms import (
+    DEFAULT_DATASET,
+    RetrieveSimilarNames,
+    get_default_registry,
+    new_export_path,
+    normalize_name,
+)
+from callbacks.export_callbacks import download_export
 
-def look_for_person(name, threshold_person):
-    runner = RetrieveSimilarNames()
-    df_similar_person = runner.run(name, threshold_person)
+
+def look_for_person(name, threshold_person, dataset_name=DEFAULT_DATASET):
+    with get_default_registry().use(dataset_name) as dataset:
+        df_similar_person = dataset.cached(
+            ("similar_person", name, threshold_person),
+            lambda: RetrieveSimilarNames().run(
+                name,
+                threshold_person,
+                data_source=dataset.data_source,
+                prune_with_bounds=True,
+            ),
+        )
     df_similar_person["jaro_winkler_similarity_score"] = df_similar_person[
         "jaro_winkler_similarity_score"
     ].round(2)
@@ -12,5 +29,50 @@ def look_for_person(name, threshold_person):
 
 def look_for_person_callback(state):
     with state as s:
+        s.name_suggestions = []
         name = normalize_name(s.person_name)
-        s.df_similar_person = look_for_person(name, s.threshold_person)
+        s.df_similar_person = look_for_person(name, s.threshold_person, s.dataset_name)
+
+
+def suggest_names_callback(state):
+    """Suggestions as the user types, the input debounces the calls"""
+    with state as s:
+        with get_default_registry().use(s.dataset_name) as dataset:
+            s.name_suggestions = dataset.suggester.suggest(s.person_name)
+
+
+def select_suggestion_callback(state):
+    with state as s:
+        s.person_name = s.selected_suggestion
+    look_for_person_callback(state)
+
+
+def export_similar_person(
+    name, threshold_person, file_format, dataset_name=DEFAULT_DATASET
+):
+    output_path = new_export_path(file_format)
+    with get_default_registry().use(dataset_name) as dataset:
+        RetrieveSimilarNames().export(
+            output_path,
+            name,
+            threshold_person,
+            data_source=dataset.data_source,
+            prune_with_bounds=True,
+            file_format=file_format,
+        )
+    return output_path
+
+
+def export_similar_person_callback(state):
+    with state as s:
+        hold_control(s, message="Exporting Similar People")
+        try:
+            output_path = export_similar_person(
+                normalize_name(s.person_name),
+                s.threshold_person,
+                s.export_format,
+                s.dataset_name,
+            )
+        finally:
+            resume_control(s)
+        download_export(s, output_path, "similar_person", s.export_format)
@@ -0,0 +1,64 @@
+"""Daily changes of the company data for Taipy Person Finder.
+
+Applies a parquet or CSV file of changes to a dataset by `id`: the rows whose
+`deleted` column is true are deleted, the others are inserted or updated. When
+the app is running, it holds the dataset's database: the file is then queued
+in the dataset's inbox, and the app applies it within `SYNC_INTERVAL` seconds.
+
+Run it from the `src` directory, like the application:
+
+    uv run --directory src ingest_changes.py hr_feed.parquet --dataset company
+"""
+
+import argparse
+import logging
+import sys
+
+logger = logging.getLogger("ingest_changes")
+
+
+def parse_args(argv: list[str] = None) -> argparse.Namespace:
+    from algorithms import DEFAULT_DATASET
+
+    parser = argparse.ArgumentParser(
+        description="Apply a file of changes to a company dataset, by id"
+    )
+    parser.add_argument(
+        "changes",
+        help="Parquet or CSV file with the changed rows, and a boolean"
+        " `deleted` column for the rows to delete",
+    )
+    parser.add_argument(
+        "--dataset",
+        default=DEFAULT_DATASET,
+        help="Dataset to change, defaults to the default company dataset",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] = None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(
+        format="%(asctime)s %(name)s %(levelname)s: %(message)s", level=logging.INFO
+    )
+    from algorithms import get_default_registry
+
+    registry = get_default_registry()
+    if args.dataset not in registry:
+        logger.error("No dataset %s, found %s", args.dataset, registry.names())
+        return 2
+    summary = registry.ingest(args.dataset, args.changes)
+    if summary is not None:
+        logger.info(
+            "%d inserted, %d updated, %d deleted: version %d of %s",
+            summary.inserted,
+            summary.updated,
+            summary.deleted,
+            summary.version,
+            args.dataset,
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,309 @@
+"""Load test for Taipy Person Finder.
+
+Simulates concurrent GUI sessions in-process: each session runs the same
+functions as the page callbacks (`look_for_person` and `find_similar_people`)
+in a realistic mix, with some think time between actions. At the end, the
+script prints throughput, tail latency, result cache hits, memory over time
+and connection pool usage.
+
+The sessions search a sample of the company names, so most searches repeat.
+The result cache of the dataset is off during the run, for the latencies to
+measure the queries, unless `--result-cache` is given.
+
+Run it from the `src` directory, like the application:
+
+    uv run --directory src load_test.py --sessions 16 --duration 60
+"""
+
+import argparse
+import logging
+import random
+import resource
+import string
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from algorithms import DEFAULT_DATASET, get_default_pool, get_default_registry
+from callbacks.find_people_callbacks import find_similar_people
+from callbacks.look_for_person_callback import look_for_person
+
+COMPARISON_FILE = "./data/trial_dataset.parquet"
+
+logger = logging.getLogger("load_test")
+
+
+@dataclass
+class LoadTestConfig:
+    sessions: int = 8
+    duration: float = 30.0
+    file_share: float = 0.1
+    think_time: float = 0.5
+    threshold: float = 0.9
+    comparison_file: str = COMPARISON_FILE
+    memory_interval: float = 1.0
+    seed: int = 1
+    result_cache: bool = False
+
+
+@dataclass
+class LoadTestResults:
+    started_at: float
+    finished_at: float = 0.0
+    latencies: dict[str, list[float]] = field(default_factory=dict)
+    # Failures of each operation, by exception class
+    errors: dict[str, dict[str, int]] = field(default_factory=dict)
+    memory_samples: list[tuple[float, float]] = field(default_factory=list)
+    # Results of the dataset's result cache during the run
+    cache_hits: int = 0
+    cache_misses: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def record(
+        self, operation: str, latency: float, error: BaseException = None
+    ) -> None:
+        """Record a latency, or a failure of `operation`. The traceback of the
+        first failure is logged."""
+        with self._lock:
+            if error is None:
+                self.latencies.setdefault(operation, []).append(latency)
+                return
+            first_error = not self.errors
+            errors = self.errors.setdefault(operation, {})
+            name = type(error).__name__
+            errors[name] = errors.get(name, 0) + 1
+        if first_error:
+            logger.error("First failure of %s", operation, exc_info=error)
+
+
+def percentile(values: list[float], share: float) -> float:
+    """Nearest-rank percentile, `share` between 0 and 1."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(share * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summarize(results: LoadTestResults) -> list[dict]:
+    """Throughput and latency statistics for each operation."""
+    elapsed = max(results.finished_at - results.started_at, 1e-9)
+    operations = sorted(set(results.latencies) | set(results.errors))
+    summary = []
+    for operation in operations:
+        latencies = results.latencies.get(operation, [])
+        summary.append(
+            {
+                "operation": operation,
+                "count": len(latencies),
+                "errors": sum(results.errors.get(operation, {}).values()),
+                "throughput_per_s": len(latencies) / elapsed,
+                "p50_ms": percentile(latencies, 0.50) * 1000,
+                "p95_ms": percentile(latencies, 0.95) * 1000,
+                "p99_ms": percentile(latencies, 0.99) * 1000,
+                "max_ms": max(latencies, default=0.0) * 1000,
+            }
+        )
+    return summary
+
+
+def current_rss_mb() -> float:
+    """Resident memory of the process, falls back to peak memory off Linux."""
+    statm = Path("/proc/self/statm")
+    if statm.exists():
+        resident_pages = int(statm.read_text().split()[1])
+        return resident_pages * resource.getpagesize() / 1024**2
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _add_typo(name: str, rng: random.Random) -> str:
+    """Replace one letter, to simulate a user typing the name with a mistake."""
+    if not name or rng.random() < 0.5:
+        return name
+    position = rng.randrange(len(name))
+    return name[:position] + rng.choice(string.ascii_lowercase) + name[position + 1 :]
+
+
+def _sample_names(size: int = 1000) -> list[str]:
+    with (
+        get_default_registry().use(DEFAULT_DATASET) as dataset,
+        dataset.pool.connection() as connection,
+    ):
+        rows = connection.execute(
+            f"""SELECT name_for_comparison
+            FROM {dataset.data_source}
+            USING SAMPLE {size} ROWS"""
+        ).fetchall()
+    return [row[0] for row in rows]
+
+
+def _run_session(
+    config: LoadTestConfig,
+    names: list[str],
+    results: LoadTestResults,
+    stop: threading.Event,
+    seed: int,
+) -> None:
+    rng = random.Random(seed)
+    while not stop.is_set():
+        start = time.perf_counter()
+        error = None
+        if rng.random() < config.file_share:
+            operation = "find_similar_people"
+            try:
+                find_similar_people(
+                    config.comparison_file,
+                    "first_name",
+                    "family_name",
+                    config.threshold,
+                )
+            except Exception as e:
+                error = e
+        else:
+            operation = "look_for_person"
+            try:
+                look_for_person(_add_typo(rng.choice(names), rng), config.threshold)
+            except Exception as e:
+                error = e
+        results.record(operation, time.perf_counter() - start, error)
+        stop.wait(rng.expovariate(1 / config.think_time) if config.think_time else 0)
+
+
+def _sample_memory(
+    results: LoadTestResults, stop: threading.Event, interval: float
+) -> None:
+    while True:
+        results.memory_samples.append(
+            (time.perf_counter() - results.started_at, current_rss_mb())
+        )
+        if stop.wait(interval):
+            return
+
+
+def run_load_test(config: LoadTestConfig) -> LoadTestResults:
+    """Run `config.sessions` simulated sessions for `config.duration` seconds."""
+    names = _sample_names()
+    with get_default_registry().use(DEFAULT_DATASET) as dataset:
+        max_cached_results = dataset.max_cached_results
+        if not config.result_cache:
+            dataset.max_cached_results = 0
+        before = dataset.stats()
+        try:
+            results = _run_sessions(config, names)
+        finally:
+            dataset.max_cached_results = max_cached_results
+        after = dataset.stats()
+    results.cache_hits = after.hits - before.hits
+    results.cache_misses = after.misses - before.misses
+    return results
+
+
+def _run_sessions(config: LoadTestConfig, names: list[str]) -> LoadTestResults:
+    stop = threading.Event()
+    results = LoadTestResults(started_at=time.perf_counter())
+
+    threads = [
+        threading.Thread(
+            target=_run_session,
+            args=(config, names, results, stop, config.seed + session),
+        )
+        for session in range(config.sessions)
+    ]
+    threads.append(
+        threading.Thread(
+            target=_sample_memory, args=(results, stop, config.memory_interval)
+        )
+    )
+    for thread in threads:
+        thread.start()
+    stop.wait(config.duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    results.finished_at = time.perf_counter()
+    return results
+
+
+def print_report(results: LoadTestResults) -> None:
+    print(f"Elapsed: {results.finished_at - results.started_at:.1f} s\n")
+    print(
+        f"{'operation':<22}{'count':>8}{'errors':>8}{'ops/s':>9}"
+        f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+    )
+    for row in summarize(results):
+        print(
+            f"{row['operation']:<22}{row['count']:>8}{row['errors']:>8}"
+            f"{row['throughput_per_s']:>9.2f}{row['p50_ms']:>10.1f}"
+            f"{row['p95_ms']:>10.1f}{row['p99_ms']:>10.1f}{row['max_ms']:>10.1f}"
+        )
+    print(f"\nResult cache: {results.cache_hits} hits, {results.cache_misses} misses")
+
+    for operation, errors in sorted(results.errors.items()):
+        counts = ", ".join(f"{name}: {count}" for name, count in sorted(errors.items()))
+        print(f"  {operation} failures: {counts}")
+
+    print("\nMemory over time:")
+    for elapsed, rss_mb in results.memory_samples:
+        print(f"  {elapsed:>7.1f} s  {rss_mb:>9.1f} MB")
+
+    metrics = get_default_pool().metrics()
+    print(
+        f"\nConnection pool: size {metrics.size}, peak in use "
+        f"{metrics.peak_in_use}, {metrics.waits}/{metrics.checkouts} checkouts "
+        f"waited, mean wait {metrics.mean_wait_seconds * 1000:.1f} ms, "
+        f"max wait {metrics.max_wait_seconds * 1000:.1f} ms"
+    )
+
+
+def parse_args(argv: list[str] = None) -> LoadTestConfig:
+    defaults = LoadTestConfig()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=defaults.sessions)
+    parser.add_argument(
+        "--duration", type=float, default=defaults.duration, help="Seconds"
+    )
+    parser.add_argument(
+        "--file-share",
+        type=float,
+        default=defaults.file_share,
+        help="Share of actions that compare a whole file, between 0 and 1",
+    )
+    parser.add_argument(
+        "--think-time",
+        type=float,
+        default=defaults.think_time,
+        help="Mean seconds a session waits between two actions",
+    )
+    parser.add_argument("--threshold", type=float, default=defaults.threshold)
+    parser.add_argument("--comparison-file", default=defaults.comparison_file)
+    parser.add_argument(
+        "--memory-interval",
+        type=float,
+        default=defaults.memory_interval,
+        help="Seconds between two memory samples",
+    )
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument(
+        "--result-cache",
+        action="store_true",
+        help="Serve repeated searches from the result cache of the dataset,"
+        " like the application. Off by default, to measure the queries",
+    )
+    args = parser.parse_args(argv)
+    return LoadTestConfig(
+        sessions=args.sessions,
+        duration=args.duration,
+        file_share=args.file_share,
+        think_time=args.think_time,
+        threshold=args.threshold,
+        comparison_file=args.comparison_file,
+        memory_interval=args.memory_interval,
+        seed=args.seed,
+        result_cache=args.result_cache,
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(format="%(asctime)s %(name)s %(levelname)s: %(message)s")
+    print_report(run_load_test(parse_args()))
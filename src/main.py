@@ -1,18 +1,45 @@
+import logging
+
 import pandas as pd
 from taipy.gui import Gui
+from werkzeug.serving import is_running_from_reloader
 
-from pages import find_people_page, find_person_page, root
+from algorithms import DEFAULT_DATASET, get_default_registry
+from pages import find_duplicates_page, find_people_page, find_person_page, root
 
 string_similarity_pages = {
     "/": root,
     "find_person": find_person_page,
     "find_people": find_people_page,
+    "find_duplicates": find_duplicates_page,
 }
 
 stylekit = {"color_primary": "#DF2D8F", "color_secondary": "#3a3a3a"}
 
 if __name__ == "__main__":
+    # Log the query plans
+    logging.basicConfig(format="%(asctime)s %(name)s %(levelname)s: %(message)s")
+    logging.getLogger("algorithms").setLevel(logging.INFO)
+
+    use_reloader = True
+    registry = get_default_registry()
+    dataset_name = DEFAULT_DATASET
+    dataset_names = registry.names()
+    dataset_report = ""
+    # The reloader's parent process only restarts the serving one: it must not
+    # hold the databases, the serving process would only read their snapshots
+    if is_running_from_reloader() or not use_reloader:
+        # Ingest the default company data (or check it is current) before
+        # serving, the other datasets are loaded when selected
+        default_dataset = registry.get(DEFAULT_DATASET)
+        default_dataset.suggester.refresh()
+        dataset_report = default_dataset.stats().describe()
+        # Applies the change files queued by `ingest_changes.py`
+        registry.watch()
+
     person_name = ""
+    name_suggestions = []
+    selected_suggestion = ""
     threshold_person = 0.90
     df_similar_person = pd.DataFrame()
 
@@ -23,12 +50,26 @@ if __name__ == "__main__":
     column_first_name = ""
     column_last_name = ""
     threshold_people = 0.90
+    engine_people = "exact"
+    field_colums = []
+    column_email = ""
+    column_phone = ""
+    column_city = ""
+    column_country = ""
+    field_mode_people = "boost"
     df_similar_people = pd.DataFrame()
+    comparison_report = ""
+
+    threshold_duplicates = 0.95
+    df_duplicates = pd.DataFrame()
+    duplicates_report = ""
+
+    export_format = "parquet"
 
     gui = Gui(pages=string_similarity_pages, css_file="./css/main.css")
     gui.run(
         title="Taipy 🔎 Person Finder",
         favicon="./img/logo.png",
         stylekit=stylekit,
-        use_reloader=True,
+        use_reloader=use_reloader,
     )
@@ -1,3 +1,4 @@
+from .find_duplicates import find_duplicates_page as find_duplicates_page
 from .find_people import find_people_page as find_people_page
 from .find_person import find_person_page as find_person_page
 from .root import root as root
@@ -0,0 +1,34 @@
+import taipy.gui.builder as tgb
+
+from callbacks.find_duplicates_callback import find_duplicates_callback
+
+with tgb.Page() as find_duplicates_page:
+    tgb.text(
+        "## Find **Duplicates** in the Database",
+        mode="md",
+        class_name="color-primary",
+    )
+    tgb.text(
+        """The app groups the people of the company data whose names are above
+        the similarity threshold into clusters. Each cluster has the id of its
+        first person and needs manual validation.
+        """,
+        mode="md",
+    )
+    with tgb.layout("4 1"):
+        tgb.button(
+            label="Find Duplicates",
+            on_action=find_duplicates_callback,
+            class_name="fullwidth plain",
+        )
+        tgb.slider(
+            "{threshold_duplicates}",
+            min=0.8,
+            max=1,
+            step=0.05,
+            continuous=False,
+            hover_text="Threshold for Jaro-Winkler Score",
+        )
+
+    tgb.text("{duplicates_report}", class_name="color-secondary")
+    tgb.table("{df_duplicates}", rebuild=True, downloadable=True, filter=True)
@@ -1,6 +1,10 @@
 import taipy.gui.builder as tgb
 
-from callbacks.find_people_callbacks import look_for_similar_people, upload_file
+from callbacks.find_people_callbacks import (
+    export_similar_people_callback,
+    look_for_similar_people,
+    upload_file,
+)
 
 with tgb.Page() as find_people_page:
     tgb.text(
@@ -30,7 +34,7 @@ with tgb.Page() as find_people_page:
             mode="md",
             class_name="color-primary",
         )
-        with tgb.layout("1 1 1"):
+        with tgb.layout("1 1 1 1"):
             tgb.selector(
                 "{column_first_name}",
                 lov="{dataset_colums}",
@@ -51,6 +55,38 @@ with tgb.Page() as find_people_page:
                 continuous=False,
                 hover_text="Threshold for Jaro-Winkler Score",
             )
+            tgb.toggle(
+                "{engine_people}",
+                lov=["exact", "streaming", "auto", "blocked", "minhash"],
+                hover_text="exact and streaming score every pair. blocked and"
+                " minhash only score candidates: faster for large files, but"
+                " may miss some matches. auto picks the engine from the size"
+                " of the comparison, and can pick an approximate one",
+            )
+
+        tgb.text(
+            """Optionally, match other columns with the company's email, phone,
+             city or country: as filters, only people with the same values are
+             compared, as boosts, the matching names are ranked by a weighted
+             score of their equal values. City and country are always filters:
+             """,
+            mode="md",
+            class_name="color-primary",
+        )
+        with tgb.layout("1 1 1 1 1"):
+            for field in ["email", "phone", "city", "country"]:
+                tgb.selector(
+                    f"{{column_{field}}}",
+                    lov="{field_colums}",
+                    dropdown=True,
+                    label=field.capitalize(),
+                )
+            tgb.toggle(
+                "{field_mode_people}",
+                lov=["filter", "boost"],
+                hover_text="filter: only compare names with the same values."
+                " boost: rank the matches by their equal emails and phones",
+            )
 
         tgb.button(
             label="Find People",
@@ -58,4 +94,13 @@ with tgb.Page() as find_people_page:
             class_name="fullwidth plain",
         )
 
+        with tgb.layout("4 1"):
+            tgb.button(
+                label="Export All Results",
+                on_action=export_similar_people_callback,
+                class_name="fullwidth",
+            )
+            tgb.toggle("{export_format}", lov=["parquet", "csv"])
+
+        tgb.text("{comparison_report}", class_name="color-secondary")
         tgb.table("{df_similar_people}", rebuild=True, downloadable=True)
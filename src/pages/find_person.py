@@ -1,11 +1,23 @@
 import taipy.gui.builder as tgb
 
-from callbacks.look_for_person_callback import look_for_person_callback
+from callbacks.look_for_person_callback import (
+    export_similar_person_callback,
+    look_for_person_callback,
+    select_suggestion_callback,
+    suggest_names_callback,
+)
 
 with tgb.Page() as find_person_page:
     tgb.text("## Find **Person** in Database", mode="md", class_name="color-primary")
     with tgb.layout("4 1"):
-        tgb.input("{person_name}", label="Person Name", class_name="fullwidth")
+        tgb.input(
+            "{person_name}",
+            label="Person Name",
+            class_name="fullwidth",
+            on_change=suggest_names_callback,
+            change_delay=300,
+            on_action=look_for_person_callback,
+        )
         tgb.slider(
             "{threshold_person}",
             min=0.8,
@@ -14,11 +26,26 @@ with tgb.Page() as find_person_page:
             continuous=False,
             hover_text="Threshold for Jaro-Winkler Score",
         )
+    with tgb.part(render="{len(name_suggestions) > 0}"):
+        tgb.selector(
+            "{selected_suggestion}",
+            lov="{name_suggestions}",
+            on_change=select_suggestion_callback,
+            class_name="fullwidth",
+        )
     tgb.button(
         "Look for Person",
         on_action=look_for_person_callback,
         class_name="fullwidth plain",
     )
 
+    with tgb.layout("4 1"):
+        tgb.button(
+            "Export All Results",
+            on_action=export_similar_person_callback,
+            class_name="fullwidth",
+        )
+        tgb.toggle("{export_format}", lov=["parquet", "csv"])
+
     with tgb.part():
         tgb.table("{df_similar_person}", rebuild=True, downloadable=True, filter=True)
@@ -1,7 +1,17 @@
 import taipy.gui.builder as tgb
 
+from callbacks.dataset_callbacks import select_dataset_callback
+
 with tgb.Page() as root:
-    with tgb.layout("4 1 1"):
+    with tgb.layout("4 1 1 1"):
         tgb.text("# Taipy 🔎 Person Finder", mode="md", class_name="color-primary")
+        tgb.selector(
+            "{dataset_name}",
+            lov="{dataset_names}",
+            dropdown=True,
+            label="Dataset",
+            on_change=select_dataset_callback,
+            hover_text="{dataset_report}",
+        )
         tgb.navbar()
         tgb.toggle(theme=True)
@@ -0,0 +1,108 @@
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+SRC_DIR = Path(__file__).resolve().parents[1] / "src"
+
+# Runs the batch matcher in a fresh interpreter, then checks the modules it
+# imported: `main` gets its arguments from the command line
+RUN_AND_LIST_MODULES = """
+import sys
+import batch_match
+
+batch_match.main(sys.argv[1:])
+print(",".join(sorted(set(sys.modules) & {"pandas", "numpy", "pyarrow", "taipy"})))
+"""
+
+
+class TestBatchMatch:
+    def setup_method(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.company_file = self.temp_dir / "company.parquet"
+        pd.DataFrame(
+            {
+                "id": [1, 2, 3],
+                "first_name": ["John", "Jon", "Jane"],
+                "family_name": ["Doe", "Doe", "Smith"],
+            }
+        ).to_parquet(self.company_file, index=False)
+        self.input_file = self.temp_dir / "input.csv"
+        pd.DataFrame({"first": ["John", "Janet"], "last": ["Doe", "Smith"]}).to_csv(
+            self.input_file, index=False
+        )
+        self.output_file = self.temp_dir / "output.parquet"
+
+    def _run(self, *args):
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                RUN_AND_LIST_MODULES,
+                "--output",
+                str(self.output_file),
+                "--database",
+                str(self.temp_dir / "company.duckdb"),
+                "--company-file",
+                str(self.company_file),
+                *args,
+            ],
+            cwd=SRC_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return result.stdout.strip()
+
+    def test_file_matches_written_without_taipy(self):
+        imported = self._run(
+            "--input",
+            str(self.input_file),
+            "--first-name-column",
+            "first",
+            "--family-name-column",
+            "last",
+            "--threshold",
+            "0.85",
+        )
+
+        assert "taipy" not in imported.split(",")
+        matches = pd.read_parquet(self.output_file)
+        assert set(zip(matches["id"], matches["comparison_first_name"])) == {
+            (1, "John"),
+            (2, "John"),
+            (3, "Janet"),
+        }
+
+    def test_name_matches(self):
+        self._run("--name", "Jöhn Doe", "--threshold", "0.98")
+
+        assert list(pd.read_parquet(self.output_file)["id"]) == [1]
+
+    def test_name_search_rejects_file_options(self):
+        for options in (["--engine", "minhash"], ["--field", "city=town"]):
+            result = subprocess.run(
+                [
+                    sys.executable,
+                    "batch_match.py",
+                    "--name",
+                    "John Doe",
+                    "--output",
+                    str(self.output_file),
+                    *options,
+                ],
+                cwd=SRC_DIR,
+                capture_output=True,
+                text=True,
+            )
+            assert result.returncode == 2
+            assert "only apply to --input" in result.stderr
+
+    def test_file_comparisons_are_exact_by_default(self):
+        sys.path.insert(0, str(SRC_DIR))
+        import batch_match
+
+        args = batch_match.parse_args(["--input", "a.csv", "--output", "b.parquet"])
+        assert args.engine == "exact"
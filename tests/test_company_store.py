@@ -0,0 +1,280 @@
+import logging
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+import pytest
+
+from src.algorithms import company_store
+from src.algorithms.company_store import CompanyStore, rules_hash
+from src.algorithms.connection_pool import ConnectionPool
+from src.algorithms.name_index import NameIndex
+
+
+def _create_company_dataframe(*people):
+    """Helper to create company data.
+    Usage: _create_company_dataframe((1, 'John', 'Doe'), (2, 'Jane', 'Smith'))
+    """
+    return pd.DataFrame(
+        [
+            {
+                "id": id_,
+                "first_name": first,
+                "family_name": last,
+                "name_for_comparison": f"{first.lower()}-{last.lower()}",
+            }
+            for id_, first, last in people
+        ]
+    )
+
+
+class TestCompanyStore:
+    def setup_method(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.company_file = self.temp_dir / "company.parquet"
+        _create_company_dataframe(
+            (1, "John", "Doe"), (2, "Jane", "Smith"), (3, "Adam", "Johnson")
+        ).to_parquet(self.company_file, index=False)
+
+        self.pool = ConnectionPool(size=2)
+        self.store = CompanyStore(self.temp_dir / "company.duckdb", pool=self.pool)
+        self.store.prepare(str(self.company_file))
+
+    def _people(self) -> pd.DataFrame:
+        with self.pool.connection() as connection:
+            return connection.execute(
+                f"SELECT * FROM {self.store.data_source} ORDER BY id"
+            ).df()
+
+    def test_load_creates_table(self):
+        assert self.store.is_loaded()
+        assert list(self._people()["id"]) == [1, 2, 3]
+        assert self.store.version() == 0
+
+    def test_derived_columns_computed_at_ingest(self):
+        """Derived columns in the raw file are ignored and recomputed"""
+        raw_file = self.temp_dir / "raw.csv"
+        pd.DataFrame(
+            [
+                {
+                    "id": 1,
+                    "first_name": "Jöhn",
+                    "family_name": "Doe",
+                    "name_for_comparison": "garbage",
+                },
+                {"id": 2, "first_name": "Jane", "family_name": "Smith"},
+            ]
+        ).to_csv(raw_file, index=False)
+        self.store.load(str(raw_file))
+
+        people = self._people()
+        assert list(people["name_for_comparison"]) == ["john-doe", "jane-smith"]
+        assert list(people["name_length"]) == [8, 10]
+        assert list(people["name_key"]) == ["doe-john", "jane-smith"]
+        assert self.store.stored_rules_hash() == rules_hash()
+
+    def test_rules_change_triggers_recomputation(self, monkeypatch):
+        monkeypatch.setitem(
+            company_store.DERIVED_COLUMNS,
+            "name_length",
+            "length(name_for_comparison)::INTEGER + 100",
+        )
+        assert self.store.stored_rules_hash() != rules_hash()
+
+        self.store.prepare()
+
+        assert list(self._people()["name_length"]) == [108, 110, 112]
+        assert self.store.stored_rules_hash() == rules_hash()
+
+    def test_regenerated_source_is_reloaded(self):
+        change_sets = []
+        self.store.add_listener(change_sets.append)
+        self.store.prepare(str(self.company_file))
+        assert change_sets == []
+
+        _create_company_dataframe((7, "Eric", "Lee")).to_parquet(
+            self.company_file, index=False
+        )
+        self.store.prepare(str(self.company_file))
+
+        assert list(self._people()["id"]) == [7]
+        assert self.store.version() == 1
+        assert [(c.version, c.full_reload) for c in change_sets] == [(1, True)]
+
+    def test_refresh_bumps_the_version_and_notifies(self):
+        change_sets = []
+        self.store.add_listener(change_sets.append)
+        self.store.refresh_derived_columns()
+
+        assert self.store.version() == 1
+        assert [(c.version, c.full_reload) for c in change_sets] == [(1, True)]
+
+    def test_apply_changes_by_id(self):
+        summary = self.store.apply_changes(
+            upserts=_create_company_dataframe(
+                (2, "Janet", "Smith"), (4, "Eric", "Lee")
+            ),
+            deletes=[3, 99],
+        )
+
+        assert (summary.inserted, summary.updated, summary.deleted) == (1, 1, 1)
+        assert summary.version == 1
+        people = self._people()
+        assert list(people["id"]) == [1, 2, 4]
+        assert people.loc[people["id"] == 2, "first_name"].item() == "Janet"
+
+    def test_derived_columns_computed_for_changes(self):
+        upserts = pd.DataFrame(
+            [
+                {
+                    "id": 5,
+                    "first_name": "Chloé",
+                    "family_name": "Dû",
+                    "name_for_comparison": "garbage",
+                }
+            ]
+        )
+        self.store.apply_changes(upserts=upserts)
+
+        row = self._people().set_index("id").loc[5]
+        assert row["name_for_comparison"] == "chloe-du"
+        assert row["name_length"] == 8
+
+    def test_failed_change_is_rolled_back(self):
+        upserts = pd.DataFrame([{"id": 2, "unknown_column": "x"}])
+        with pytest.raises(duckdb.BinderException):
+            self.store.apply_changes(upserts=upserts, deletes=[1])
+
+        assert list(self._people()["id"]) == [1, 2, 3]
+        assert self.store.version() == 0
+
+    def test_readers_keep_their_snapshot_during_changes(self):
+        with self.pool.connection() as reader:
+            reader.execute("BEGIN TRANSACTION")
+            query = f"SELECT count(*) FROM {self.store.data_source}"
+            assert reader.execute(query).fetchone()[0] == 3
+
+            self.store.apply_changes(deletes=[1, 2])
+
+            assert reader.execute(query).fetchone()[0] == 3
+            reader.execute("COMMIT")
+            assert reader.execute(query).fetchone()[0] == 1
+
+    def test_listener_updates_name_index_incrementally(self):
+        index = NameIndex.build_from_source(
+            self.temp_dir / "name_index", self.store.data_source, self.pool
+        )
+        self.store.add_listener(index.apply_changes)
+
+        self.store.apply_changes(
+            upserts=_create_company_dataframe((4, "Jon", "Do")), deletes=[1]
+        )
+
+        candidates = set(index.candidates("john-doe"))
+        assert 1 not in candidates
+        assert 4 in candidates
+        assert index.data_version == 1
+
+    def test_failing_listener_doesnt_fail_the_commit(self, caplog):
+        def failing_listener(change_set):
+            raise RuntimeError("listener failure")
+
+        calls = []
+        self.store.add_listener(failing_listener)
+        self.store.add_listener(calls.append)
+
+        with caplog.at_level(logging.ERROR):
+            summary = self.store.apply_changes(deletes=[1])
+
+        assert summary.version == 1
+        assert len(calls) == 1
+        assert "listener failure" in caplog.text
+
+    def test_snapshots_are_opt_in(self):
+        self.store.apply_changes(deletes=[1])
+        assert not self.store.snapshot_path.exists()
+
+    def test_commits_publish_a_snapshot(self):
+        self.store.publish_snapshots = True
+        self.store.apply_changes(deletes=[1])
+        with self.pool.connection() as connection:
+            ids = connection.execute(
+                f"SELECT id FROM '{self.store.snapshot_path}' ORDER BY id"
+            ).fetchall()
+        assert ids == [(2,), (3,)]
+
+    def test_other_processes_read_the_snapshot(self):
+        """A second process can't open the database file, it reads the
+        snapshot published by the first one"""
+        self.store.publish_snapshots = True
+        self.store.apply_changes(deletes=[1])
+        self.store.detach()
+        holder = subprocess.Popen(
+            [
+                sys.executable,
+                "-c",
+                "import duckdb, sys; "
+                f"holder = duckdb.connect({str(self.store.database_path)!r}); "
+                "print('ready', flush=True); sys.stdin.read()",
+            ],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        try:
+            assert holder.stdout.readline().strip() == "ready"
+            reader = CompanyStore(self.store.database_path, pool=ConnectionPool(1))
+            reader.prepare()
+
+            assert reader.read_only
+            assert reader.version() == 1
+            assert reader.stored_rules_hash() == rules_hash()
+            with reader.pool.connection() as connection:
+                count = connection.execute(
+                    f"SELECT count(*) FROM {reader.data_source}"
+                ).fetchone()[0]
+            assert count == 2
+            with pytest.raises(PermissionError):
+                reader.apply_changes(deletes=[2])
+
+            # The writer publishes a newer snapshot
+            change_sets = []
+            reader.add_listener(change_sets.append)
+            assert not reader.poll_snapshot()
+            partial = self.temp_dir / "snapshot.partial"
+            with reader.pool.connection() as connection:
+                connection.execute(
+                    f"""COPY (SELECT * FROM {reader.data_source} WHERE id = 3)
+                    TO '{partial}' (FORMAT parquet, KV_METADATA {{version: '2'}})"""
+                )
+            partial.replace(reader.snapshot_path)
+            assert reader.poll_snapshot()
+            assert [(c.version, c.full_reload) for c in change_sets] == [(2, True)]
+            assert not reader.poll_snapshot()
+        finally:
+            holder.communicate("")
+
+    def test_apply_change_file(self):
+        changes_file = self.temp_dir / "changes.csv"
+        pd.DataFrame(
+            {
+                "id": [1, 3, 4],
+                "first_name": ["John", "Adam", "Eric"],
+                "family_name": ["Doe", "Jonson", "Lee"],
+                "deleted": [True, False, False],
+            }
+        ).to_csv(changes_file, index=False)
+
+        summary = self.store.apply_change_file(changes_file)
+        assert (summary.inserted, summary.updated, summary.deleted) == (1, 1, 1)
+        people = self._people()
+        assert list(people["id"]) == [2, 3, 4]
+        assert "deleted" not in people.columns
+        assert list(people["name_for_comparison"]) == [
+            "jane-smith",
+            "adam-jonson",
+            "eric-lee",
+        ]
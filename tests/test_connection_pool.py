@@ -0,0 +1,85 @@
+import threading
+
+import pytest
+
+from src.algorithms.connection_pool import ConnectionPool, get_default_pool
+from src.algorithms.similarity_score import RetrieveSimilarNames
+
+
+def test_connections_share_one_database():
+    """Tables created on one pooled connection are visible from the others"""
+    pool = ConnectionPool(size=2)
+    with pool.connection() as first, pool.connection() as second:
+        first.execute("CREATE TABLE people AS SELECT 'john-doe' AS name")
+        assert second.execute("SELECT name FROM people").fetchall() == [("john-doe",)]
+
+
+def test_macros_are_created_with_the_pool():
+    pool = ConnectionPool(size=1)
+    with pool.connection() as connection:
+        result = connection.execute("SELECT normalize_name(' Jöhn  Doe ')").fetchone()
+    assert result[0] == "john-doe"
+
+
+def test_metrics_track_checkouts_and_saturation():
+    pool = ConnectionPool(size=2)
+    with pool.connection():
+        metrics = pool.metrics()
+        assert metrics.in_use == 1
+        assert metrics.saturation == 0.5
+
+    metrics = pool.metrics()
+    assert metrics.in_use == 0
+    assert metrics.peak_in_use == 1
+    assert metrics.checkouts == 1
+    assert metrics.waits == 0
+
+
+def test_checkout_times_out_when_pool_is_exhausted():
+    pool = ConnectionPool(size=1)
+    with pool.connection(), pytest.raises(TimeoutError):
+        with pool.connection(timeout=0.01):
+            pass
+    assert pool.metrics().waits == 1
+
+
+def test_waiting_checkout_gets_returned_connection():
+    pool = ConnectionPool(size=1)
+    checking_out = threading.Event()
+    results = []
+
+    def wait_for_connection():
+        checking_out.set()
+        with pool.connection() as connection:
+            results.append(connection.execute("SELECT 42").fetchone()[0])
+
+    with pool.connection():
+        thread = threading.Thread(target=wait_for_connection)
+        thread.start()
+        # The held connection is only returned once the thread checks out
+        assert checking_out.wait(timeout=5)
+    thread.join()
+
+    assert results == [42]
+    assert pool.metrics().waits == 1
+    assert pool.metrics().max_wait_seconds > 0
+
+
+def test_concurrent_runners_share_the_default_pool():
+    test_data = (
+        "(SELECT * FROM (VALUES ('John', 'Doe', 'john-doe')) "
+        "AS test_table(first_name, family_name, name_for_comparison))"
+    )
+    results = []
+
+    def search():
+        results.append(len(RetrieveSimilarNames().run("john-doe", 0.9, test_data)))
+
+    threads = [threading.Thread(target=search) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [1] * 8
+    assert RetrieveSimilarNames().pool is get_default_pool()
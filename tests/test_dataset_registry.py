@@ -0,0 +1,274 @@
+import tempfile
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+import pytest
+
+from src.algorithms.connection_pool import ConnectionPool
+from src.algorithms.dataset_registry import DatasetRegistry
+from src.algorithms.minhash import (
+    SIGNATURE_TABLE_PREFIX,
+    MinHashSimilarNamesForParquet,
+)
+
+
+def _create_company_dataframe(*people):
+    """Helper to create company data.
+    Usage: _create_company_dataframe((1, 'John', 'Doe'), (2, 'Jane', 'Smith'))
+    """
+    return pd.DataFrame(
+        [
+            {"id": id_, "first_name": first, "family_name": last}
+            for id_, first, last in people
+        ]
+    )
+
+
+class TestDatasetRegistry:
+    def setup_method(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.sales_file = self.temp_dir / "sales.parquet"
+        _create_company_dataframe((1, "John", "Doe"), (2, "Jane", "Smith")).to_parquet(
+            self.sales_file, index=False
+        )
+        _create_company_dataframe(
+            (1, "Alice", "Brown"), (2, "Bob", "Wilson"), (3, "Carol", "White")
+        ).to_csv(self.temp_dir / "support.csv", index=False)
+
+        self.pool = ConnectionPool(size=1)
+        self.registry = DatasetRegistry(
+            pool=self.pool, memory_budget_bytes=10**9, directory=self.temp_dir
+        )
+
+    def _people(self, dataset):
+        with self.pool.connection() as connection:
+            return sorted(
+                name
+                for (name,) in connection.execute(
+                    f"SELECT name_for_comparison FROM {dataset.data_source}"
+                ).fetchall()
+            )
+
+    def test_discover_registers_the_files_of_the_directory(self):
+        assert self.registry.discover() == ["sales", "support"]
+        assert self.registry.discover() == []
+        assert self.registry.names() == ["sales", "support"]
+
+    def test_register_twice(self):
+        self.registry.register("sales", str(self.sales_file))
+        with pytest.raises(ValueError):
+            self.registry.register("sales", str(self.sales_file))
+
+    def test_unknown_dataset(self):
+        with pytest.raises(KeyError):
+            self.registry.get("marketing")
+
+    def test_datasets_have_their_own_table_and_stats(self):
+        self.registry.discover()
+        sales = self.registry.get("sales")
+        support = self.registry.get("support")
+
+        assert sales.data_source != support.data_source
+        assert self._people(sales) == ["jane-smith", "john-doe"]
+        assert self._people(support) == ["alice-brown", "bob-wilson", "carol-white"]
+        assert sales.stats().rows == 2
+        assert support.stats().distinct_names == 3
+        assert support.suggester.suggest("bo") == ["bob-wilson"]
+        assert sales.suggester.suggest("bo") == []
+        # The approximate name index is only built when used
+        assert not sales.index_directory.exists()
+
+    def test_result_cache(self):
+        self.registry.discover()
+        sales = self.registry.get("sales")
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return pd.DataFrame({"score": [1.0]})
+
+        result = sales.cached(("person", "john-doe"), compute)
+        result["score"] = 0.0
+        assert sales.cached(("person", "john-doe"), compute)["score"].iloc[0] == 1.0
+        assert len(calls) == 1
+        stats = sales.stats()
+        assert (stats.hits, stats.misses, stats.cached_results) == (1, 1, 1)
+
+        sales.store.apply_changes(deletes=[1])
+        sales.cached(("person", "john-doe"), compute)
+        assert len(calls) == 2
+
+    def test_result_cache_can_be_turned_off(self):
+        self.registry.discover()
+        sales = self.registry.get("sales")
+        sales.cached("result", lambda: pd.DataFrame({"score": [1.0]}))
+        sales.max_cached_results = 0
+
+        result = sales.cached("result", lambda: pd.DataFrame({"score": [0.5]}))
+        assert result["score"].iloc[0] == 0.5
+        stats = sales.stats()
+        assert (stats.hits, stats.misses) == (0, 2)
+
+    def test_least_recently_used_datasets_are_unloaded(self):
+        self.registry.discover()
+        sales = self.registry.get("sales")
+        support = self.registry.get("support")
+        sales.suggester.suggest("jo")
+        sales.cached("result", lambda: pd.DataFrame({"score": [1.0]}))
+
+        self.registry.memory_budget_bytes = support.memory_bytes()
+        assert self.registry.enforce_budget(keep="support") == ["sales"]
+        assert not sales.loaded
+        assert sales.memory_bytes() == 0
+        with self.pool.connection() as connection:
+            aliases = [
+                row[0] for row in connection.execute("SHOW DATABASES").fetchall()
+            ]
+        assert sales.alias not in aliases
+
+        # Selecting it again attaches the database, without ingesting it again
+        assert self.registry.get("sales") is sales
+        assert sales.store.version() == 0
+        assert self._people(sales) == ["jane-smith", "john-doe"]
+        assert sales.stats().cached_results == 0
+        assert not support.loaded
+
+    def test_selecting_a_loaded_dataset_keeps_it_warm(self):
+        self.registry.discover()
+        sales = self.registry.get("sales")
+        sales.cached("result", lambda: pd.DataFrame({"score": [1.0]}))
+        self.registry.get("support")
+        assert self.registry.get("sales").stats().cached_results == 1
+
+    def test_unloading_drops_the_band_hashes_of_the_dataset(self):
+        self.registry.discover()
+        sales = self.registry.get("sales")
+        support = self.registry.get("support")
+        retriever = MinHashSimilarNamesForParquet(pool=self.pool)
+        sales_bands = retriever.company_bands(sales.data_source)
+        support_bands = retriever.company_bands(support.data_source)
+        assert sales_bands.startswith(SIGNATURE_TABLE_PREFIX)
+
+        sales.unload()
+        with self.pool.connection() as connection:
+            tables = {
+                name
+                for (name,) in connection.execute(
+                    "SELECT table_name FROM duckdb_tables()"
+                ).fetchall()
+            }
+        assert sales_bands not in tables
+        assert support_bands in tables
+
+    def test_band_hashes_count_in_the_memory_of_the_dataset(self):
+        self.registry.discover()
+        sales = self.registry.get("sales")
+        support = self.registry.get("support")
+        memory = sales.memory_bytes()
+        support_memory = support.memory_bytes()
+        retriever = MinHashSimilarNamesForParquet(pool=self.pool)
+        retriever.company_bands(sales.data_source)
+        retriever.company_bands(sales.data_source)
+
+        # 2 people, each hashed in every band to (id, band, band_hash)
+        bands_bytes = 2 * retriever.bands * 3 * 8
+        assert sales.memory_bytes() == memory + bands_bytes
+        assert support.memory_bytes() == support_memory
+        sales.unload()
+        assert self.registry.get("sales").memory_bytes() == memory
+
+    def test_regenerated_source_rebuilds_the_dataset(self):
+        self.registry.discover()
+        sales = self.registry.get("sales")
+        sales.cached("result", lambda: pd.DataFrame({"score": [1.0]}))
+        sales.unload()
+        _create_company_dataframe((3, "Eric", "Lee")).to_parquet(
+            self.sales_file, index=False
+        )
+
+        sales = self.registry.get("sales")
+        assert self._people(sales) == ["eric-lee"]
+        assert sales.store.version() == 1
+        assert list(sales.name_index.candidates("eric-lee")) == [3]
+        assert sales.stats().cached_results == 0
+
+    def test_reloading_a_loaded_dataset_rebuilds_its_index(self):
+        self.registry.discover()
+        sales = self.registry.get("sales")
+        reloaded_file = self.temp_dir / "reloaded.parquet"
+        _create_company_dataframe((3, "Eric", "Lee")).to_parquet(
+            reloaded_file, index=False
+        )
+
+        sales.store.load(str(reloaded_file))
+        assert sales.name_index.data_version == 1
+        assert list(sales.name_index.candidates("eric-lee")) == [3]
+
+    def test_selecting_a_loaded_dataset_does_not_measure_it(self, monkeypatch):
+        self.registry.discover()
+        sales = self.registry.get("sales")
+        sales.suggester.suggest("jo")
+        memory = sales.memory_bytes()
+        assert memory > 0
+
+        def measure():
+            raise AssertionError("The table is measured when it's loaded")
+
+        monkeypatch.setattr(sales.store, "memory_bytes", measure)
+        self.registry.memory_budget_bytes = 1
+        assert self.registry.get("sales") is sales
+        assert sales.memory_bytes() == memory
+        assert sales.loaded
+
+    def test_pinned_datasets_are_not_unloaded(self):
+        self.registry.discover()
+        with self.registry.use("sales") as sales:
+            assert sales.pins == 1
+            self.registry.memory_budget_bytes = 1
+            self.registry.get("support")
+            assert sales.loaded
+            assert self._people(sales) == ["jane-smith", "john-doe"]
+        assert sales.pins == 0
+        assert self.registry.enforce_budget(keep="support") == ["sales"]
+
+    def test_failed_load_releases_the_pin(self):
+        missing = self.registry.register(
+            "missing", str(self.temp_dir / "missing.parquet")
+        )
+        with pytest.raises(duckdb.IOException):
+            self.registry.get("missing", pin=True)
+        assert missing.pins == 0
+
+    def _changes_file(self, name, deleted_id):
+        path = self.temp_dir / name
+        pd.DataFrame(
+            {
+                "id": [3, deleted_id],
+                "first_name": ["Eric", None],
+                "family_name": ["Lee", None],
+                "deleted": [False, True],
+            }
+        ).to_parquet(path, index=False)
+        return path
+
+    def test_ingest_applies_a_change_file(self):
+        self.registry.discover()
+        summary = self.registry.ingest("sales", self._changes_file("feed.parquet", 1))
+        assert (summary.inserted, summary.deleted) == (1, 1)
+        assert self._people(self.registry.get("sales")) == ["eric-lee", "jane-smith"]
+
+    def test_sync_applies_the_queued_change_files(self):
+        self.registry.discover()
+        sales = self.registry.get("sales")
+        sales.cached("result", lambda: pd.DataFrame({"score": [1.0]}))
+        sales.queue_changes(self._changes_file("feed.parquet", 1))
+        (sales.inbox_directory / "broken.parquet").write_text("not parquet")
+
+        self.registry.sync()
+        assert self._people(sales) == ["eric-lee", "jane-smith"]
+        assert sales.stats().cached_results == 0
+        assert sorted(path.name for path in sales.inbox_directory.iterdir()) == [
+            "broken.parquet.failed"
+        ]
+        assert sales.pins == 0
@@ -0,0 +1,116 @@
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+from src.algorithms.company_store import HIDDEN_COLUMNS, CompanyStore
+from src.algorithms.connection_pool import ConnectionPool
+from src.algorithms.deduplicate import DeduplicatePeople, UnionFind, cluster_pairs
+
+
+def _create_company_dataframe(*people):
+    """Helper to create company data.
+    Usage: _create_company_dataframe((1, 'John', 'Doe'), (2, 'Jane', 'Smith'))
+    """
+    return pd.DataFrame(
+        [
+            {"id": id_, "first_name": first, "family_name": last}
+            for id_, first, last in people
+        ]
+    )
+
+
+def _pairs(*pairs):
+    return pd.DataFrame(
+        pairs, columns=["id_a", "id_b", "jaro_winkler_similarity_score"]
+    )
+
+
+class TestClusterPairs:
+    def test_union_find(self):
+        sets = UnionFind(5)
+        sets.union(0, 1)
+        sets.union(3, 4)
+        sets.union(1, 4)
+        assert sets.find(0) == sets.find(3)
+        assert sets.find(2) != sets.find(0)
+
+    def test_transitive_pairs_form_one_cluster(self):
+        clusters = cluster_pairs(
+            _pairs((10, 20, 0.95), (20, 30, 0.92), (40, 50, 0.99))
+        ).set_index("id")
+
+        assert list(clusters["cluster_id"]) == [10, 10, 10, 40, 40]
+        assert list(clusters["cluster_size"]) == [3, 3, 3, 2, 2]
+        assert clusters.loc[20, "best_score"] == 0.95
+
+    def test_no_pairs(self):
+        assert cluster_pairs(_pairs()).empty
+
+
+class TestDeduplicatePeople:
+    def setup_method(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        company_file = self.temp_dir / "company.parquet"
+        _create_company_dataframe(
+            (1, "John", "Doe"),
+            (2, "Jon", "Doe"),
+            (3, "John", "Do"),
+            (4, "Doe", "John"),
+            (5, "Adam", "Johnson"),
+            (6, "Jane", "Smith"),
+            (7, "Jane", "Smyth"),
+            (8, "John", "Dow"),
+        ).to_parquet(company_file, index=False)
+
+        self.pool = ConnectionPool(size=1)
+        self.store = CompanyStore(self.temp_dir / "company.duckdb", pool=self.pool)
+        self.store.prepare(str(company_file))
+
+    def test_finds_clusters(self):
+        result = DeduplicatePeople(pool=self.pool).run(0.9, self.store.data_source)
+
+        clusters = result.groupby("cluster_id")["id"].apply(sorted).to_dict()
+        assert clusters == {1: [1, 2, 3, 8], 6: [6, 7]}
+        assert not set(HIDDEN_COLUMNS) & set(result.columns)
+        assert {"first_name", "family_name", "cluster_size"} <= set(result.columns)
+
+    def test_pairs_match_exhaustive_comparison(self):
+        pairs = DeduplicatePeople(pool=self.pool).find_pairs(
+            0.8, self.store.data_source
+        )
+        with self.pool.connection() as connection:
+            exhaustive = connection.execute(
+                f"""SELECT a.id AS id_a, b.id AS id_b
+                FROM {self.store.data_source} a, {self.store.data_source} b
+                WHERE a.id < b.id
+                AND jaro_winkler_similarity(
+                    a.name_for_comparison, b.name_for_comparison
+                ) > 0.8"""
+            ).df()
+        found = set(pairs[["id_a", "id_b"]].itertuples(index=False, name=None))
+        expected = set(exhaustive.itertuples(index=False, name=None))
+        assert found <= expected
+        assert {(1, 2), (1, 3), (6, 7)} <= found
+
+    def test_large_blocks_are_compared_by_neighbourhood(self):
+        runner = DeduplicatePeople(
+            pool=self.pool,
+            blocking_keys={"first_token": "split_part(name_for_comparison, '-', 1)"},
+            max_block_size=2,
+            window_size=1,
+        )
+        pairs = runner.find_pairs(0.8, self.store.data_source)
+
+        # The "john" block has 3 rows, over the limit: sorted by name (john-do,
+        # john-doe, john-dow), each row is only compared with the next one
+        assert set(pairs[["id_a", "id_b"]].itertuples(index=False, name=None)) == {
+            (1, 3),
+            (1, 8),
+            (6, 7),
+        }
+        assert runner.windowed_rows(self.store.data_source) == 3
+
+    def test_small_blocks_have_no_windowed_rows(self):
+        runner = DeduplicatePeople(pool=self.pool)
+        assert runner.windowed_rows(self.store.data_source) == 0
@@ -0,0 +1,87 @@
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from src.algorithms import similarity_score
+from src.algorithms.connection_pool import ConnectionPool
+from src.algorithms.export_files import new_export_path
+from src.algorithms.similarity_score import (
+    RetrieveSimilarNames,
+    RetrieveSimilarNamesForParquet,
+)
+
+DATA_SOURCE = """(SELECT * FROM (VALUES
+    (1, 'John', 'Doe', 'john-doe'),
+    (2, 'Jon', 'Doe', 'jon-doe'),
+    (3, 'John', 'Do', 'john-do'),
+    (4, 'Jane', 'Smith', 'jane-smith')
+) AS t(id, first_name, family_name, name_for_comparison))"""
+SORT_COLUMNS = ["id", "comparison_first_name", "comparison_family_name"]
+
+
+class TestExport:
+    def setup_method(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.upload_file = self.temp_dir / "upload.parquet"
+        pd.DataFrame(
+            {"first_name": ["John", "Johnny", "Jane"], "family_name": ["Doe"] * 3}
+        ).to_parquet(self.upload_file, index=False)
+        self.pool = ConnectionPool(size=1)
+        self.retriever = RetrieveSimilarNamesForParquet(pool=self.pool)
+        self.args = (str(self.upload_file), "first_name", "family_name", 0.8)
+
+    @pytest.mark.parametrize(
+        "file_format, reader", [("parquet", pd.read_parquet), ("csv", pd.read_csv)]
+    )
+    def test_export_holds_complete_results(self, monkeypatch, file_format, reader):
+        complete = self.retriever.run(*self.args, DATA_SOURCE)
+        monkeypatch.setattr(similarity_score, "RESULT_LIMIT", 2)
+        assert len(self.retriever.run(*self.args, DATA_SOURCE)) == 2
+
+        output_path = new_export_path(file_format, self.temp_dir / "exports")
+        rows = self.retriever.export(
+            output_path, *self.args, DATA_SOURCE, file_format=file_format
+        )
+
+        exported = reader(output_path)
+        assert rows == len(complete) == len(exported)
+        pd.testing.assert_frame_equal(
+            exported.sort_values(SORT_COLUMNS).reset_index(drop=True),
+            complete.sort_values(SORT_COLUMNS).reset_index(drop=True),
+            check_dtype=False,
+        )
+
+    def test_export_single_person(self):
+        retriever = RetrieveSimilarNames(pool=self.pool)
+        output_path = self.temp_dir / "person.parquet"
+
+        rows = retriever.export(output_path, "john-doe", 0.8, DATA_SOURCE)
+
+        pd.testing.assert_frame_equal(
+            pd.read_parquet(output_path),
+            retriever.run("john-doe", 0.8, DATA_SOURCE),
+        )
+        assert rows == 3
+
+    def test_unknown_format(self):
+        with pytest.raises(ValueError):
+            self.retriever.export(
+                self.temp_dir / "out.json", *self.args, DATA_SOURCE, file_format="json"
+            )
+
+    def test_old_exports_are_removed(self):
+        directory = self.temp_dir / "exports"
+        old_export = new_export_path("csv", directory)
+        old_export.write_text("old")
+        two_hours_ago = time.time() - 2 * 3600
+        os.utime(old_export, (two_hours_ago, two_hours_ago))
+
+        new_export = new_export_path("csv", directory)
+
+        assert not old_export.exists()
+        assert new_export.name.endswith(".csv.gz")
+        assert new_export != old_export
@@ -0,0 +1,29 @@
+import sys
+import tempfile
+from pathlib import Path
+
+# The callbacks run from the `src` directory, like the application
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from callbacks import export_callbacks  # noqa: E402
+
+
+def test_remove_export_only_removes_the_downloaded_file(monkeypatch):
+    directory = Path(tempfile.mkdtemp())
+    monkeypatch.setattr(export_callbacks, "EXPORT_DIRECTORY", str(directory))
+    downloaded = directory / "0a1b.parquet"
+    other_session = directory / "2c3d.csv.gz"
+    downloaded.touch()
+    other_session.touch()
+
+    export_callbacks.remove_export(
+        None,
+        "Gui.download",
+        {
+            "action": "remove_export",
+            "args": ["similar_people.parquet", "/taipy-content/abc/0a1b.parquet"],
+        },
+    )
+
+    assert not downloaded.exists()
+    assert other_session.exists()
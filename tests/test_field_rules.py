@@ -0,0 +1,158 @@
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from src.algorithms.blocking import BlockedSimilarNamesForParquet
+from src.algorithms.company_store import CompanyStore
+from src.algorithms.connection_pool import ConnectionPool
+from src.algorithms.field_rules import FieldRule, field_rule_params
+from src.algorithms.minhash import MinHashSimilarNamesForParquet
+from src.algorithms.similarity_score import (
+    RetrieveSimilarNamesForParquet,
+    StreamingSimilarNamesForParquet,
+)
+
+COMPANY_PEOPLE = [
+    (1, "John", "Smith", "john@example.com", "+33 6 11 22 33 44", "Paris"),
+    (2, "John", "Smith", "jsmith@example.org", "+33 6 99 88 77 66", "Lyon"),
+    (3, "Jane", "Doe", "jane@example.com", "+33 6 55 44 33 22", "Paris"),
+    (4, "Jon", "Smith", "jon@example.net", "+33 6 00 00 00 01", "Paris"),
+]
+UPLOADED_PEOPLE = [
+    ("John", "Smith", " JOHN@example.com", "06.11.22.33.44", "paris"),
+    ("Jane", "Doe", "other@example.com", None, "PARIS"),
+]
+
+
+class TestFieldRule:
+    def test_default_normalizer_of_company_fields(self):
+        assert FieldRule("email", "mail").normalizer_key == "email"
+        assert FieldRule("city", "town", "filter").normalizer_key == "name"
+        assert FieldRule("address", "address").normalizer_key == "exact"
+
+    def test_invalid_rules(self):
+        with pytest.raises(ValueError):
+            FieldRule("email", "email", mode="require")
+        with pytest.raises(ValueError):
+            FieldRule("email", "email", normalizer="soundex")
+        with pytest.raises(ValueError):
+            FieldRule("email", "email", weight=-1)
+
+    def test_city_and_country_are_only_filters(self):
+        with pytest.raises(ValueError):
+            FieldRule("city", "town")
+        with pytest.raises(ValueError):
+            FieldRule("country", "country", "boost")
+        assert FieldRule("country", "country", "filter").mode == "filter"
+
+    def test_params_split_filters_and_boosts(self):
+        params = field_rule_params(
+            [FieldRule("city", "town", "filter"), FieldRule("email", "mail")]
+        )
+        assert len(params["field_filters"]) == 1
+        assert [boost["weight"] for boost in params["field_boosts"]] == [0.25]
+
+
+class TestMultiFieldMatch:
+    def setup_method(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        company_file = self.temp_dir / "company.parquet"
+        pd.DataFrame(
+            COMPANY_PEOPLE,
+            columns=["id", "first_name", "family_name", "email", "phone", "city"],
+        ).to_parquet(company_file, index=False)
+        self.upload_file = self.temp_dir / "upload.parquet"
+        pd.DataFrame(
+            UPLOADED_PEOPLE,
+            columns=["first_name", "family_name", "mail", "phone_number", "town"],
+        ).to_parquet(self.upload_file, index=False)
+
+        self.pool = ConnectionPool(size=1)
+        self.store = CompanyStore(self.temp_dir / "company.duckdb", pool=self.pool)
+        self.store.prepare(str(company_file))
+
+    def _run(self, retriever_class, field_rules, threshold=0.9):
+        return retriever_class(pool=self.pool).run(
+            data_for_comparison=str(self.upload_file),
+            comparison_first_name="first_name",
+            comparison_family_name="family_name",
+            threshold=threshold,
+            data_source=self.store.data_source,
+            prune_with_bounds=True,
+            field_rules=field_rules,
+        )
+
+    def test_without_rules_only_names_are_compared(self):
+        result = self._run(RetrieveSimilarNamesForParquet, None)
+        assert "weighted_similarity_score" not in result.columns
+        assert {1, 2, 3, 4} <= set(result["id"])
+
+    @pytest.mark.parametrize(
+        "retriever_class",
+        [
+            RetrieveSimilarNamesForParquet,
+            StreamingSimilarNamesForParquet,
+            BlockedSimilarNamesForParquet,
+            MinHashSimilarNamesForParquet,
+        ],
+    )
+    def test_filter_field_restricts_the_candidates(self, retriever_class):
+        result = self._run(
+            retriever_class, [FieldRule("phone", "phone_number", "filter")]
+        )
+        # Phones are compared on their national number, Jane has no phone
+        assert list(result["id"]) == [1]
+        assert result["weighted_similarity_score"].iloc[0] == 1.0
+
+    def test_filter_fields_are_combined(self):
+        result = self._run(
+            RetrieveSimilarNamesForParquet,
+            [
+                FieldRule("city", "town", "filter"),
+                FieldRule("email", "mail", "filter"),
+            ],
+        )
+        assert list(result["id"]) == [1]
+
+    def test_boost_field_ranks_equal_fields_first(self):
+        result = self._run(
+            RetrieveSimilarNamesForParquet,
+            [FieldRule("email", "mail", "boost", weight=1.0)],
+            threshold=0.4,
+        )
+        john = result[result["comparison_first_name"] == "John"]
+        assert john["id"].iloc[0] == 1
+        assert john["weighted_similarity_score"].iloc[0] == 1.0
+        # Same name, other email: (1 + 0) / 2, still a match
+        assert john.set_index("id").loc[2, "weighted_similarity_score"] == 0.5
+
+    @pytest.mark.parametrize(
+        "retriever_class",
+        [RetrieveSimilarNamesForParquet, StreamingSimilarNamesForParquet],
+    )
+    def test_boosts_never_change_the_matches(self, retriever_class):
+        def matches(field_rules):
+            result = self._run(retriever_class, field_rules, 0.99)
+            return set(zip(result["comparison_first_name"], result["id"]))
+
+        # Jon Smith is below the threshold, with or without the same email
+        without_boosts = matches(None)
+        assert ("John", 4) not in without_boosts
+        assert matches([FieldRule("email", "mail", weight=10.0)]) == without_boosts
+        assert matches([FieldRule("phone", "phone_number")]) == without_boosts
+
+    def test_missing_boost_value_is_not_counted(self):
+        result = self._run(
+            RetrieveSimilarNamesForParquet,
+            [FieldRule("phone", "phone_number", weight=1.0)],
+        )
+        scores = result.set_index(["comparison_first_name", "id"])[
+            "weighted_similarity_score"
+        ]
+        # Jane has no phone: her score is the name similarity
+        assert scores[("Jane", 3)] == 1.0
+        # John Smith 2 has another phone: (1 + 0) / 2
+        assert scores[("John", 2)] == 0.5
+        assert scores[("John", 1)] == 1.0
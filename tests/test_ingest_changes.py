@@ -0,0 +1,53 @@
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+
+SRC_DIR = Path(__file__).resolve().parents[1] / "src"
+
+
+class TestIngestChanges:
+    def setup_method(self):
+        # The script works on the app's data directory, relative to its cwd
+        self.temp_dir = Path(tempfile.mkdtemp())
+        (self.temp_dir / "data").mkdir()
+        pd.DataFrame(
+            {
+                "id": [1, 2],
+                "first_name": ["John", "Jane"],
+                "family_name": ["Doe", "Smith"],
+            }
+        ).to_parquet(self.temp_dir / "data" / "fake_data.parquet", index=False)
+        self.changes_file = self.temp_dir / "feed.csv"
+        pd.DataFrame(
+            {
+                "id": [1, 3],
+                "first_name": ["John", "Eric"],
+                "family_name": ["Doe", "Lee"],
+                "deleted": [True, False],
+            }
+        ).to_csv(self.changes_file, index=False)
+
+    def _run(self, *args):
+        return subprocess.run(
+            [sys.executable, str(SRC_DIR / "ingest_changes.py"), *args],
+            cwd=self.temp_dir,
+            capture_output=True,
+            text=True,
+        )
+
+    def test_changes_are_applied_by_id(self):
+        result = self._run(str(self.changes_file))
+        assert result.returncode == 0, result.stderr
+        assert "1 inserted, 0 updated, 1 deleted: version 1" in result.stderr
+        with duckdb.connect(str(self.temp_dir / "data" / "company.duckdb")) as db:
+            ids = db.execute("SELECT id FROM people ORDER BY id").fetchall()
+        assert ids == [(2,), (3,)]
+
+    def test_unknown_dataset(self):
+        result = self._run(str(self.changes_file), "--dataset", "marketing")
+        assert result.returncode == 2
+        assert "No dataset marketing" in result.stderr
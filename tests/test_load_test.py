@@ -0,0 +1,101 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# The load test runs from the `src` directory, like the application
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from load_test import (  # noqa: E402
+    LoadTestConfig,
+    LoadTestResults,
+    parse_args,
+    percentile,
+    summarize,
+)
+
+
+class TestPercentile:
+    def test_empty(self):
+        assert percentile([], 0.5) == 0.0
+
+    def test_nearest_rank(self):
+        values = [float(value) for value in range(100, 0, -1)]
+        assert percentile(values, 0.50) == 50.0
+        assert percentile(values, 0.95) == 95.0
+        assert percentile(values, 0.99) == 99.0
+        assert percentile(values, 1.0) == 100.0
+
+    def test_bounds(self):
+        assert percentile([3.0], 0.0) == 3.0
+        assert percentile([1.0, 2.0], 0.01) == 1.0
+
+
+class TestSummarize:
+    def test_throughput_latency_and_errors(self):
+        results = LoadTestResults(started_at=10.0, finished_at=12.0)
+        for latency in [0.1, 0.2, 0.3, 0.4]:
+            results.record("look_for_person", latency)
+        results.record("find_similar_people", 1.0, TimeoutError())
+        results.record("find_similar_people", 1.0, TimeoutError())
+        results.record("find_similar_people", 1.0, ValueError())
+
+        person, people = summarize(results)[::-1]
+        assert person["operation"] == "look_for_person"
+        assert person["count"] == 4
+        assert person["errors"] == 0
+        assert person["throughput_per_s"] == 2.0
+        assert person["p50_ms"] == pytest.approx(200.0)
+        assert person["max_ms"] == pytest.approx(400.0)
+        assert people["count"] == 0
+        assert people["errors"] == 3
+        assert results.errors["find_similar_people"] == {
+            "TimeoutError": 2,
+            "ValueError": 1,
+        }
+
+    def test_first_failure_is_logged_once(self, caplog):
+        results = LoadTestResults(started_at=0.0)
+        results.record("look_for_person", 0.1, KeyError("company"))
+        results.record("look_for_person", 0.1, KeyError("company"))
+        assert len(caplog.records) == 1
+        assert caplog.records[0].exc_info[0] is KeyError
+
+
+class TestParseArgs:
+    def test_defaults(self):
+        assert parse_args([]) == LoadTestConfig()
+
+    def test_options(self):
+        config = parse_args(
+            [
+                "--sessions",
+                "4",
+                "--duration",
+                "5",
+                "--file-share",
+                "0.5",
+                "--think-time",
+                "0",
+                "--threshold",
+                "0.95",
+                "--comparison-file",
+                "upload.parquet",
+                "--memory-interval",
+                "0.25",
+                "--seed",
+                "7",
+                "--result-cache",
+            ]
+        )
+        assert config == LoadTestConfig(
+            sessions=4,
+            duration=5.0,
+            file_share=0.5,
+            think_time=0.0,
+            threshold=0.95,
+            comparison_file="upload.parquet",
+            memory_interval=0.25,
+            seed=7,
+            result_cache=True,
+        )
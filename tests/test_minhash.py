@@ -0,0 +1,112 @@
+import random
+import string
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from src.algorithms.company_store import CompanyStore
+from src.algorithms.connection_pool import ConnectionPool
+from src.algorithms.file_and_model_selection import FileProcessorFactory
+from src.algorithms.minhash import (
+    SIGNATURE_TABLE_PREFIX,
+    MinHashSimilarNamesForParquet,
+    clear_signature_cache,
+)
+from src.algorithms.similarity_score import RetrieveSimilarNamesForParquet
+
+FIRST_NAMES = ["Christopher", "Alexandra", "Jonathan", "Margaret", "Elizabeth"]
+FAMILY_NAMES = ["Richardson", "Henderson", "Fitzgerald", "Montgomery", "Castellano"]
+PAIR_COLUMNS = ["id", "comparison_first_name", "comparison_family_name"]
+
+
+def _add_typo(name, rng):
+    position = rng.randrange(len(name))
+    return name[:position] + rng.choice(string.ascii_lowercase) + name[position + 1 :]
+
+
+def _random_people(size, seed):
+    rng = random.Random(seed)
+    return pd.DataFrame(
+        [
+            {
+                "id": id_,
+                "first_name": _add_typo(rng.choice(FIRST_NAMES), rng),
+                "family_name": _add_typo(rng.choice(FAMILY_NAMES), rng),
+            }
+            for id_ in range(size)
+        ]
+    )
+
+
+def _pairs(result):
+    return set(result[PAIR_COLUMNS].itertuples(index=False, name=None))
+
+
+class TestMinHashEngine:
+    def setup_method(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        company_file = self.temp_dir / "company.parquet"
+        _random_people(400, seed=1).to_parquet(company_file, index=False)
+        self.upload_file = self.temp_dir / "upload.parquet"
+        _random_people(30, seed=2).to_parquet(self.upload_file, index=False)
+
+        self.pool = ConnectionPool(size=1)
+        self.store = CompanyStore(self.temp_dir / "company.duckdb", pool=self.pool)
+        self.store.prepare(str(company_file))
+
+    def _run(self, retriever, threshold=0.9):
+        return retriever.run(
+            data_for_comparison=str(self.upload_file),
+            comparison_first_name="first_name",
+            comparison_family_name="family_name",
+            threshold=threshold,
+            data_source=self.store.data_source,
+        )
+
+    def test_registered_in_factory(self):
+        processor = FileProcessorFactory.get_processor(
+            str(self.upload_file), engine="minhash", bands=4, rows=2
+        )
+        assert isinstance(processor, MinHashSimilarNamesForParquet)
+        assert (processor.bands, processor.rows) == (4, 2)
+        with pytest.raises(ValueError):
+            FileProcessorFactory.get_processor(str(self.upload_file), engine="nope")
+
+    def test_results_are_exact_scores_of_candidates(self):
+        exact = self._run(RetrieveSimilarNamesForParquet(pool=self.pool))
+        approximate = self._run(MinHashSimilarNamesForParquet(pool=self.pool))
+
+        assert _pairs(approximate) <= _pairs(exact)
+        assert len(approximate) >= 0.9 * len(exact)
+        merged = approximate.merge(exact, on=PAIR_COLUMNS)
+        assert (
+            merged["jaro_winkler_similarity_score_x"]
+            == merged["jaro_winkler_similarity_score_y"]
+        ).all()
+
+    def test_more_bands_never_lower_recall(self):
+        results = [
+            _pairs(
+                self._run(MinHashSimilarNamesForParquet(pool=self.pool, bands=bands))
+            )
+            for bands in (1, 4, 16)
+        ]
+        assert results[0] <= results[1] <= results[2]
+        assert len(results[0]) < len(results[2])
+
+    def test_signature_cache(self):
+        retriever = MinHashSimilarNamesForParquet(pool=self.pool)
+        table_name = retriever.company_bands(self.store.data_source)
+        assert table_name == retriever.company_bands(self.store.data_source)
+        assert table_name.startswith(SIGNATURE_TABLE_PREFIX)
+
+        clear_signature_cache(self.pool)
+
+        with self.pool.connection() as connection:
+            tables = connection.execute(
+                "SELECT count(*) FROM duckdb_tables() WHERE table_name = ?",
+                [table_name],
+            ).fetchone()[0]
+        assert tables == 0
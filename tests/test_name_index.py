@@ -0,0 +1,133 @@
+import json
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.algorithms.company_store import CompanyStore
+from src.algorithms.connection_pool import ConnectionPool
+from src.algorithms.name_index import NameIndex, phonetic_key
+from src.algorithms.similarity_score import RetrieveSimilarNames
+
+PEOPLE = [
+    (10, "John", "Doe"),
+    (11, "Jon", "Do"),
+    (12, "Jane", "Smith"),
+    (13, "Xavier", "Zzz"),
+    (14, "Doe", "John"),
+]
+
+
+def _create_test_data_source(people):
+    values = ", ".join(
+        f"({id_}, '{first}', '{last}', '{first.lower()}-{last.lower()}')"
+        for id_, first, last in people
+    )
+    return f"(SELECT * FROM (VALUES {values}) AS test_table(id, first_name,\
+          family_name, name_for_comparison))"
+
+
+class TestNameIndex:
+    def setup_method(self):
+        self.directory = Path(tempfile.mkdtemp()) / "name_index"
+        self.index = NameIndex.build(
+            [id_ for id_, _, _ in PEOPLE],
+            [f"{first.lower()}-{last.lower()}" for _, first, last in PEOPLE],
+            self.directory,
+        )
+
+    def test_index_is_memory_mapped(self):
+        assert isinstance(self.index.ids, np.memmap)
+        assert isinstance(self.index.ngram_postings, np.memmap)
+
+    def test_arrays_are_aligned_on_rows(self):
+        reopened = NameIndex.open(self.directory)
+        assert len(reopened) == len(PEOPLE)
+        assert reopened.name(2) == "jane-smith"
+        assert list(reopened.lengths) == [8, 6, 10, 10, 8]
+
+    def test_candidates_include_similar_names(self):
+        candidates = set(self.index.candidates("john-doe"))
+        assert {10, 11} <= candidates
+        assert 13 not in candidates
+
+    def test_phonetic_key_matches_inverted_names(self):
+        assert phonetic_key("doe-john") == phonetic_key("john-doe", swapped=True)
+        assert 14 in set(self.index.candidates("john-doe", min_shared_ngrams=100))
+
+    def test_min_shared_ngrams_reduces_candidates(self):
+        loose = self.index.candidates("jane-smith", min_shared_ngrams=1)
+        strict = self.index.candidates("jane-smith", min_shared_ngrams=5)
+        assert set(strict) <= set(loose)
+        assert 12 in set(strict)
+
+    def test_phonetic_postings_are_sorted_by_key(self):
+        keys = np.asarray(self.index.phonetic_sorted_keys)
+        assert list(keys) == sorted(keys)
+        assert list(self.index.phonetic_keys[self.index.phonetic_order]) == list(keys)
+
+    def test_candidates_can_miss_matches(self):
+        # No shared trigram and another sound, above 0.9 all the same
+        index = NameIndex.build([1], ["luc-leeb"], None)
+        data_source = _create_test_data_source([(1, "Luc", "Leeb")])
+        matches = RetrieveSimilarNames().run("lwucl-eelb", 0.9, data_source)
+        assert list(matches["id"]) == [1]
+        assert list(index.candidates("lwucl-eelb")) == []
+
+    def test_open_missing_index_raises(self):
+        with pytest.raises(FileNotFoundError):
+            NameIndex.open(self.directory.parent / "missing")
+
+    def test_retrieve_similar_names_uses_index_candidates(self):
+        data_source = _create_test_data_source(PEOPLE)
+        full_scan = RetrieveSimilarNames().run("john-doe", 0.8, data_source)
+        with_index = RetrieveSimilarNames(candidate_index=self.index).run(
+            "john-doe", 0.8, data_source
+        )
+        assert list(with_index["id"]) == list(full_scan["id"])
+
+
+class TestOpenOrBuild:
+    def setup_method(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        company_file = self.temp_dir / "company.parquet"
+        pd.DataFrame(
+            [
+                {"id": id_, "first_name": first, "family_name": last}
+                for id_, first, last in PEOPLE
+            ]
+        ).to_parquet(company_file, index=False)
+        self.store = CompanyStore(
+            self.temp_dir / "company.duckdb", pool=ConnectionPool(size=1)
+        )
+        self.store.prepare(str(company_file))
+        self.directory = self.temp_dir / "name_index"
+
+    def test_builds_a_missing_index(self):
+        index = NameIndex.open_or_build(self.directory, self.store)
+        assert len(index) == len(PEOPLE)
+        assert (self.directory / "meta.json").exists()
+
+    def test_rebuilds_an_index_of_another_format(self):
+        NameIndex.build([1], ["john-doe"], self.directory)
+        meta_file = self.directory / "meta.json"
+        meta_file.write_text(
+            json.dumps({**json.loads(meta_file.read_text()), "version": 0})
+        )
+        index = NameIndex.open_or_build(self.directory, self.store)
+        assert len(index) == len(PEOPLE)
+
+    def test_rebuilds_a_stale_index(self):
+        """Changes applied by another process make the written index stale"""
+        stale = NameIndex.open_or_build(self.directory, self.store)
+        self.store.apply_changes(deletes=[int(stale.ids[0])])
+
+        with pytest.raises(ValueError):
+            NameIndex.open(self.directory, data_version=self.store.version())
+        index = NameIndex.open_or_build(self.directory, self.store)
+        assert index.data_version == 1
+        assert len(index) == len(PEOPLE) - 1
+        # The previously mapped files are left untouched
+        assert len(stale) == len(PEOPLE)
@@ -0,0 +1,86 @@
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+from src.algorithms.company_store import CompanyStore
+from src.algorithms.connection_pool import ConnectionPool
+from src.algorithms.name_suggester import NameSuggester
+
+
+def _create_company_dataframe(*people):
+    """Helper to create company data.
+    Usage: _create_company_dataframe((1, 'John', 'Doe'), (2, 'Jane', 'Smith'))
+    """
+    return pd.DataFrame(
+        [
+            {"id": id_, "first_name": first, "family_name": last}
+            for id_, first, last in people
+        ]
+    )
+
+
+class TestNameSuggester:
+    def setup_method(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        company_file = self.temp_dir / "company.parquet"
+        _create_company_dataframe(
+            (1, "John", "Doe"),
+            (2, "John", "Doe"),
+            (3, "Johnny", "Smith"),
+            (4, "Jane", "Johnson"),
+            (5, "Jean-Luc", "Picard"),
+        ).to_parquet(company_file, index=False)
+
+        self.pool = ConnectionPool(size=1)
+        self.store = CompanyStore(self.temp_dir / "company.duckdb", pool=self.pool)
+        self.store.prepare(str(company_file))
+        self.suggester = NameSuggester(self.store)
+        self.store.add_listener(self.suggester.invalidate)
+
+    def test_prefix_of_any_token(self):
+        assert self.suggester.suggest("John") == [
+            "john-doe",
+            "johnny-smith",
+            "jane-johnson",
+        ]
+        assert self.suggester.suggest("john-d") == ["john-doe"]
+        assert self.suggester.suggest("Pic") == ["jean-luc-picard"]
+        assert self.suggester.suggest("johns") == ["jane-johnson"]
+
+    def test_typed_text_is_normalized(self):
+        assert self.suggester.suggest("  Jöhn D") == ["john-doe"]
+        assert self.suggester.suggest("") == []
+        assert self.suggester.suggest("xyz") == []
+
+    def test_limit(self):
+        assert len(self.suggester.suggest("j", limit=2)) == 2
+
+    def test_store_changes_are_suggested(self):
+        assert self.suggester.suggest("eric") == []
+
+        self.store.apply_changes(
+            upserts=_create_company_dataframe((6, "Eric", "Lee")), deletes=[3]
+        )
+
+        self.suggester.suggest("eric")
+        assert self.suggester.wait(timeout=5)
+        assert self.suggester.suggest("eric") == ["eric-lee"]
+        assert self.suggester.suggest("johnny") == []
+
+    def test_previous_names_are_suggested_during_the_rebuild(self):
+        assert self.suggester.suggest("johnny") == ["johnny-smith"]
+        self.store.apply_changes(deletes=[3])
+
+        # The rebuild waits for the only pooled connection
+        with self.pool.connection():
+            assert self.suggester.suggest("johnny") == ["johnny-smith"]
+            assert not self.suggester.wait(timeout=0.1)
+
+        assert self.suggester.wait(timeout=5)
+        assert self.suggester.suggest("johnny") == []
+
+    def test_cleared_suggester_is_rebuilt_synchronously(self):
+        self.suggester.suggest("john")
+        self.suggester.clear()
+        assert self.suggester.suggest("pic") == ["jean-luc-picard"]
@@ -0,0 +1,139 @@
+import random
+import string
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from src.algorithms.company_store import CompanyStore
+from src.algorithms.connection_pool import ConnectionPool
+from src.algorithms.similarity_score import (
+    RetrieveSimilarNames,
+    RetrieveSimilarNamesForParquet,
+)
+
+FIRST_NAMES = ["John", "Jon", "Jane", "Eric", "Erik", "Mohammed", "Muhammad", "Zoé"]
+FAMILY_NAMES = ["Doe", "Do", "Smith", "Smyth", "Martin", "Martins", "Lee", "Ng"]
+THRESHOLDS = [0.0, 0.5, 0.8, 0.85, 0.9, 0.95, 0.99]
+RESULT_ORDER = [
+    "id",
+    "comparison_first_name",
+    "comparison_family_name",
+    "jaro_winkler_similarity_score",
+]
+
+
+def _misspell(name, rng):
+    """Randomly replace, drop or insert one letter"""
+    position = rng.randrange(len(name))
+    letter = rng.choice(string.ascii_lowercase)
+    operation = rng.choice(["replace", "drop", "insert", "keep"])
+    if operation == "replace":
+        return name[:position] + letter + name[position + 1 :]
+    if operation == "drop" and len(name) > 1:
+        return name[:position] + name[position + 1 :]
+    if operation == "insert":
+        return name[:position] + letter + name[position:]
+    return name
+
+
+def _random_people(size, seed):
+    rng = random.Random(seed)
+    return pd.DataFrame(
+        [
+            {
+                "id": id_,
+                "first_name": _misspell(rng.choice(FIRST_NAMES), rng),
+                "family_name": _misspell(rng.choice(FAMILY_NAMES), rng),
+            }
+            for id_ in range(size)
+        ]
+    )
+
+
+class TestPruningWithBounds:
+    def setup_method(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        company_file = self.temp_dir / "company.parquet"
+        _random_people(300, seed=1).to_parquet(company_file, index=False)
+        self.upload_file = self.temp_dir / "upload.parquet"
+        _random_people(40, seed=2).to_parquet(self.upload_file, index=False)
+
+        self.pool = ConnectionPool(size=1)
+        self.store = CompanyStore(self.temp_dir / "company.duckdb", pool=self.pool)
+        self.store.prepare(str(company_file))
+
+    def test_bound_is_never_below_the_score(self):
+        with self.pool.connection() as connection:
+            violations = connection.execute(
+                f"""SELECT count(*)
+                FROM {self.store.data_source} a, {self.store.data_source} b
+                WHERE jaro_winkler_similarity(
+                    a.name_for_comparison, b.name_for_comparison
+                ) > jaro_winkler_upper_bound(
+                    a.name_length, a.name_char_mask, b.name_length, b.name_char_mask
+                ) + 1e-9"""
+            ).fetchone()[0]
+        assert violations == 0
+
+    def test_filter_agrees_with_bound(self):
+        with self.pool.connection() as connection:
+            disagreements = connection.execute(
+                f"""SELECT count(*)
+                FROM {self.store.data_source} a, {self.store.data_source} b,
+                    (VALUES (0.5), (0.8), (0.9), (0.95)) thresholds(threshold)
+                WHERE jaro_winkler_similarity(
+                    a.name_for_comparison, b.name_for_comparison
+                ) > threshold
+                AND NOT jaro_winkler_can_exceed(
+                    a.name_length,
+                    a.name_char_mask,
+                    b.name_length,
+                    b.name_char_mask,
+                    threshold
+                )"""
+            ).fetchone()[0]
+        assert disagreements == 0
+
+    @pytest.mark.parametrize("threshold", THRESHOLDS)
+    def test_pruning_never_changes_person_results(self, threshold):
+        retriever = RetrieveSimilarNames(pool=self.pool)
+        for name in ["john-doe", "eric-smith", "muhamad-martin", "zoe-ng"]:
+            exhaustive = retriever.run(name, threshold, self.store.data_source)
+            pruned = retriever.run(
+                name, threshold, self.store.data_source, prune_with_bounds=True
+            )
+            pd.testing.assert_frame_equal(
+                exhaustive.sort_values("id").reset_index(drop=True),
+                pruned.sort_values("id").reset_index(drop=True),
+            )
+
+    @pytest.mark.parametrize("threshold", THRESHOLDS)
+    def test_pruning_never_changes_file_results(self, threshold):
+        retriever = RetrieveSimilarNamesForParquet(pool=self.pool)
+        results = [
+            retriever.run(
+                data_for_comparison=str(self.upload_file),
+                comparison_first_name="first_name",
+                comparison_family_name="family_name",
+                threshold=threshold,
+                data_source=self.store.data_source,
+                prune_with_bounds=prune,
+            )
+            .sort_values(RESULT_ORDER)
+            .reset_index(drop=True)
+            for prune in (False, True)
+        ]
+        pd.testing.assert_frame_equal(*results)
+
+    def test_pruning_skips_rows(self):
+        """The bound is useful: some rows can't reach a high threshold"""
+        with self.pool.connection() as connection:
+            pruned = connection.execute(
+                f"""SELECT count(*) FROM {self.store.data_source}
+                WHERE jaro_winkler_upper_bound(
+                    8, name_char_mask('john-doe'), name_length, name_char_mask
+                ) <= 0.9"""
+            ).fetchone()[0]
+        assert pruned > 0
@@ -0,0 +1,160 @@
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from src.algorithms import similarity_score
+from src.algorithms.blocking import BlockedSimilarNamesForParquet
+from src.algorithms.company_store import CompanyStore
+from src.algorithms.connection_pool import ConnectionPool
+from src.algorithms.query_planner import PlanEstimates, QueryPlanner
+from src.algorithms.similarity_score import (
+    RetrieveSimilarNamesForParquet,
+    StreamingSimilarNamesForParquet,
+)
+
+GIB = 1024**3
+RESULT_ORDER = [
+    "id",
+    "comparison_first_name",
+    "comparison_family_name",
+    "jaro_winkler_similarity_score",
+]
+
+
+def _estimates(upload_rows, company_rows, threshold=0.9, memory_gib=0.1):
+    return PlanEstimates(
+        upload_rows=upload_rows,
+        company_rows=company_rows,
+        threshold=threshold,
+        available_memory_bytes=16 * GIB,
+        memory_bytes=int(memory_gib * GIB),
+    )
+
+
+class TestChoosePlan:
+    def setup_method(self):
+        self.planner = QueryPlanner(pool=ConnectionPool(size=1))
+
+    @pytest.mark.parametrize(
+        "estimates, engine",
+        [
+            (_estimates(100, 100_000), "exact"),
+            (_estimates(10_000, 1_000_000), "blocked"),
+            (_estimates(1_000_000, 5_000_000), "minhash"),
+            (_estimates(1_000_000, 5_000_000, threshold=0.8), "exact"),
+            (_estimates(100, 100_000, memory_gib=20), "streaming"),
+            (
+                _estimates(1_000_000, 5_000_000, threshold=0.8, memory_gib=20),
+                "streaming",
+            ),
+            # The pairs decide first, tight memory doesn't stream a huge comparison
+            (_estimates(1_000_000, 5_000_000, memory_gib=20), "minhash"),
+        ],
+    )
+    def test_engine(self, estimates, engine):
+        assert self.planner.choose(estimates).engine == engine
+
+    def test_streaming_chunks_fit_in_memory(self):
+        plan = self.planner.choose(_estimates(100, 100, memory_gib=20))
+        assert plan.options == {"chunks": 3}
+        assert "streaming" in plan.describe()
+
+
+class TestPlanner:
+    def setup_method(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        company_file = self.temp_dir / "company.parquet"
+        pd.DataFrame(
+            {
+                "id": range(6),
+                "first_name": ["John", "Jon", "Jane", "Eric", "Erik", "John"],
+                "family_name": ["Doe", "Doe", "Smith", "Lee", "Lee", "Smyth"],
+            }
+        ).to_parquet(company_file, index=False)
+        self.upload = pd.DataFrame(
+            {
+                "first_name": ["John", "Jane", "Erick", "Jhon"],
+                "family_name": ["Doe", "Smith", "Lee", "Smith"],
+            }
+        )
+        self.upload_file = self.temp_dir / "upload.parquet"
+        self.upload.to_parquet(self.upload_file, index=False)
+
+        self.pool = ConnectionPool(size=1)
+        self.store = CompanyStore(self.temp_dir / "company.duckdb", pool=self.pool)
+        self.store.prepare(str(company_file))
+
+    def _run(self, retriever):
+        return (
+            retriever.run(
+                str(self.upload_file),
+                "first_name",
+                "family_name",
+                0.85,
+                self.store.data_source,
+            )
+            .sort_values(RESULT_ORDER)
+            .reset_index(drop=True)
+        )
+
+    def test_estimates(self):
+        csv_file = self.temp_dir / "upload.csv"
+        self.upload.to_csv(csv_file, index=False)
+        planner = QueryPlanner(pool=self.pool)
+
+        for path in (self.upload_file, csv_file):
+            estimates = planner.estimate(str(path), 0.9, self.store.data_source)
+            assert (estimates.upload_rows, estimates.company_rows) == (4, 6)
+        plan = planner.plan(str(self.upload_file), 0.9, self.store.data_source)
+        assert plan.engine == "exact"
+
+    def test_streaming_matches_exhaustive(self):
+        pd.testing.assert_frame_equal(
+            self._run(RetrieveSimilarNamesForParquet(pool=self.pool)),
+            self._run(StreamingSimilarNamesForParquet(pool=self.pool, chunks=3)),
+        )
+
+    def test_streaming_keeps_the_best_rows_over_the_chunks(self, monkeypatch):
+        exhaustive = self._run(RetrieveSimilarNamesForParquet(pool=self.pool))
+        monkeypatch.setattr(similarity_score, "RESULT_LIMIT", 2)
+        streamed = StreamingSimilarNamesForParquet(pool=self.pool, chunks=3).run(
+            str(self.upload_file),
+            "first_name",
+            "family_name",
+            0.85,
+            self.store.data_source,
+        )
+
+        assert list(streamed["jaro_winkler_similarity_score"]) == list(
+            exhaustive["jaro_winkler_similarity_score"]
+            .sort_values(ascending=False)
+            .head(2)
+        )
+
+    def test_blocked_scores_candidates_sharing_a_key(self):
+        exhaustive = self._run(RetrieveSimilarNamesForParquet(pool=self.pool))
+        blocked = self._run(BlockedSimilarNamesForParquet(pool=self.pool))
+
+        # "jhon-smith" and "john-smyth" share no blocking key
+        missed = (exhaustive["comparison_first_name"] == "Jhon") & (
+            exhaustive["id"] == 5
+        )
+        assert missed.sum() == 1
+        pd.testing.assert_frame_equal(
+            blocked, exhaustive[~missed].reset_index(drop=True)
+        )
+
+    def test_large_blocks_are_skipped(self):
+        blocked = self._run(
+            BlockedSimilarNamesForParquet(
+                pool=self.pool,
+                blocking_keys={
+                    "last_token": "split_part(name_for_comparison, '-', -1)"
+                },
+                max_block_size=1,
+            )
+        )
+        # Only the "smith" and "smyth" blocks hold a single company row
+        assert set(blocked["last_name"]) == {"Smith"}
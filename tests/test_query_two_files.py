@@ -354,3 +354,47 @@ class TestFileComparisonIntegration:
                 parquet_sorted["jaro_winkler_similarity_score"],
                 check_names=False,
             )
+
+
+class TestDuplicateUploadedNames:
+    """Tests for uploads repeating the same person"""
+
+    def setup_method(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.parquet_path = self.temp_dir / "duplicates.parquet"
+        _create_test_comparison_dataframe(
+            ("John", "Doe"),
+            ("John", "Doe"),
+            ("JOHN", "doe"),
+            ("Jane", "Smith"),
+        ).to_parquet(self.parquet_path, index=False)
+        self.retriever = RetrieveSimilarNamesForParquet()
+
+    def teardown_method(self):
+        self.parquet_path.unlink()
+        self.temp_dir.rmdir()
+
+    def test_scores_fanned_out_to_every_uploaded_row(self):
+        """Each uploaded row still gets its match, scored once per name"""
+        primary_data = _create_test_data_source(("John", "Doe"), ("Alice", "Brown"))
+
+        result = self.retriever.run(
+            data_for_comparison=str(self.parquet_path),
+            comparison_first_name="first_name",
+            comparison_family_name="family_name",
+            threshold=0.9,
+            data_source=primary_data,
+        )
+
+        assert len(result) == 3
+        assert sorted(result["comparison_first_name"]) == ["JOHN", "John", "John"]
+        assert (result["jaro_winkler_similarity_score"] == 1).all()
+
+    def test_describe_input_counts_duplicates(self):
+        stats = self.retriever.describe_input(
+            str(self.parquet_path), "first_name", "family_name"
+        )
+
+        assert stats.input_rows == 4
+        assert stats.distinct_names == 2
+        assert stats.duplicates_eliminated == 2
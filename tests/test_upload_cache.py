@@ -0,0 +1,117 @@
+import hashlib
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from src.algorithms import upload_cache
+from src.algorithms.connection_pool import ConnectionPool
+from src.algorithms.similarity_score import (
+    RetrieveSimilarNamesForCSV,
+    RetrieveSimilarNamesForParquet,
+)
+from src.algorithms.upload_cache import UploadCache
+
+
+def _write_csv(path, *people):
+    pd.DataFrame(
+        [{"first_name": first, "family_name": last} for first, last in people]
+    ).to_csv(path, index=False)
+
+
+class TestUploadCache:
+    def setup_method(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.csv_path = self.temp_dir / "upload.csv"
+        _write_csv(self.csv_path, ("John", "Doe"), ("Jane", "Smith"))
+        self.pool = ConnectionPool(size=1)
+        self.cache = UploadCache(self.temp_dir / "cache", pool=self.pool)
+
+    def test_csv_is_converted_to_parquet(self):
+        copy = self.cache.columnar_copy(str(self.csv_path))
+
+        assert copy.endswith(".parquet")
+        pd.testing.assert_frame_equal(pd.read_parquet(copy), pd.read_csv(self.csv_path))
+
+    def test_copy_keyed_by_content(self):
+        same_content = self.temp_dir / "renamed.csv"
+        same_content.write_bytes(self.csv_path.read_bytes())
+        other_content = self.temp_dir / "other.csv"
+        _write_csv(other_content, ("Adam", "Johnson"))
+
+        copy = self.cache.columnar_copy(str(self.csv_path))
+        assert self.cache.columnar_copy(str(same_content)) == copy
+        assert self.cache.columnar_copy(str(other_content)) != copy
+
+    def test_unchanged_file_is_hashed_once(self, monkeypatch):
+        hashed = []
+
+        def content_hash(file_path):
+            hashed.append(file_path)
+            return hashlib.sha256(Path(file_path).read_bytes()).hexdigest()
+
+        monkeypatch.setattr(upload_cache, "content_hash", content_hash)
+        copy = self.cache.columnar_copy(str(self.csv_path))
+        assert self.cache.columnar_copy(str(self.csv_path)) == copy
+        assert len(hashed) == 1
+
+        _write_csv(self.csv_path, ("Adam", "Johnson"), ("Jane", "Smith"))
+        assert self.cache.columnar_copy(str(self.csv_path)) != copy
+        assert len(hashed) == 2
+
+    def test_parquet_is_not_copied(self):
+        parquet_path = str(self.temp_dir / "upload.parquet")
+        assert self.cache.columnar_copy(parquet_path) == parquet_path
+
+    def test_expired_copies_are_evicted(self):
+        old_copy = Path(self.cache.columnar_copy(str(self.csv_path)))
+        two_days_ago = time.time() - 2 * 24 * 3600
+        os.utime(old_copy, (two_days_ago, two_days_ago))
+
+        other_content = self.temp_dir / "other.csv"
+        _write_csv(other_content, ("Adam", "Johnson"))
+        new_copy = Path(self.cache.columnar_copy(str(other_content)))
+
+        assert not old_copy.exists()
+        assert new_copy.exists()
+
+    def test_evicted_copy_is_converted_again(self):
+        """Another session can evict a copy, resolving it again rebuilds it"""
+        copy = Path(self.cache.columnar_copy(str(self.csv_path)))
+        copy.unlink()
+
+        assert Path(self.cache.columnar_copy(str(self.csv_path))) == copy
+        assert copy.exists()
+
+    def test_least_recently_used_copies_evicted_over_size(self):
+        paths = []
+        for position in range(3):
+            path = self.temp_dir / f"upload_{position}.csv"
+            _write_csv(path, (f"Name{position}", "Doe"))
+            paths.append(Path(self.cache.columnar_copy(str(path))))
+            used_at = time.time() - 100 + position
+            os.utime(paths[-1], (used_at, used_at))
+        self.cache.max_total_bytes = 2 * paths[0].stat().st_size + 10
+
+        self.cache.evict()
+
+        assert [path.exists() for path in paths] == [False, True, True]
+
+    def test_same_comparison_results(self):
+        copy = self.cache.columnar_copy(str(self.csv_path))
+        data_source = (
+            "(SELECT * FROM (VALUES (1, 'John', 'Doe', 'john-doe')) "
+            "AS t(id, first_name, family_name, name_for_comparison))"
+        )
+        results = [
+            retriever(pool=self.pool).run(
+                path, "first_name", "family_name", 0.8, data_source
+            )
+            for retriever, path in (
+                (RetrieveSimilarNamesForCSV, str(self.csv_path)),
+                (RetrieveSimilarNamesForParquet, copy),
+            )
+        ]
+        pd.testing.assert_frame_equal(*results)